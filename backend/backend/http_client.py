@@ -0,0 +1,275 @@
+"""
+Shared client for outbound HTTP calls (e.g. questions/leetcode.py).
+
+One requests.Session per process keeps connections to each host alive,
+every call is bounded by connect/read timeouts, transient failures are
+retried a few times with jittered backoff, and a per-host circuit breaker
+fails fast while an upstream keeps failing. Settings live in
+settings.HTTP_CLIENT. Per-host counters are served to staff at
+/questions/health/http/, and a warning is logged whenever a circuit opens.
+Tests swap the client with use_client().
+"""
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# Responses worth another attempt; anything else is returned to the caller
+RETRY_STATUSES = frozenset([429, 502, 503, 504])
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """Raised without a request while a host's circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Opens after `threshold` consecutive failed calls and rejects calls for
+    `cooldown` seconds, then lets one trial call through: success closes
+    it, failure opens it again.
+    """
+
+    def __init__(self, threshold, cooldown):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+        self.lock = threading.Lock()
+
+    def allow(self):
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            if self.trial_running or time.monotonic() - self.opened_at < self.cooldown:
+                return False
+            self.trial_running = True
+            return True
+
+    def record(self, ok):
+        """
+        Settle a call, releasing the trial slot if it was the trial.
+
+        Args:
+            ok (bool | None): True if the host answered, False if it failed to,
+                None if the call failed through no fault of the host.
+
+        Returns:
+            bool: True if this failure opened a closed circuit.
+        """
+        with self.lock:
+            self.trial_running = False
+            if ok is None:
+                return False
+            if ok:
+                self.failures = 0
+                self.opened_at = None
+                return False
+            self.failures += 1
+            if self.opened_at is not None or self.failures >= self.threshold:
+                opened = self.opened_at is None
+                self.opened_at = time.monotonic()
+                return opened
+            return False
+
+    @property
+    def state(self):
+        return "closed" if self.opened_at is None else "open"
+
+
+class HostMetrics:
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.rejected = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def snapshot(self):
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'retries': self.retries,
+            'rejected': self.rejected,
+            'avg_ms': round(self.total_seconds / self.requests * 1000, 1) if self.requests else None,
+            'max_ms': round(self.max_seconds * 1000, 1),
+        }
+
+
+class HttpClient:
+    """
+    Pooled, timeout-bounded requests with retries and per-host circuit breakers.
+
+    Args:
+        connect_timeout, read_timeout (float): Seconds, per attempt.
+        retries (int): Extra attempts after a connection error, timeout or RETRY_STATUSES response.
+        backoff (float): Base delay in seconds; attempt n sleeps uniformly in [0, backoff * 2**n].
+        pool_size (int): Kept-alive connections per host.
+        breaker_threshold (int): Consecutive failed calls that open a host's circuit.
+        breaker_cooldown (float): Seconds an open circuit rejects calls.
+    """
+
+    def __init__(self, connect_timeout=3.05, read_timeout=10, retries=2, backoff=0.5, pool_size=10,
+                 breaker_threshold=5, breaker_cooldown=30):
+        self.timeout = (connect_timeout, read_timeout)
+        self.retries = retries
+        self.backoff = backoff
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.breakers = {}
+        self.host_metrics = {}
+        self.lock = threading.Lock()
+
+    def _host_state(self, url):
+        host = urlsplit(url).netloc
+        with self.lock:
+            if host not in self.breakers:
+                self.breakers[host] = CircuitBreaker(self.breaker_threshold, self.breaker_cooldown)
+                self.host_metrics[host] = HostMetrics()
+            return self.breakers[host], self.host_metrics[host]
+
+    def _count(self, metrics, **deltas):
+        with self.lock:
+            for name, delta in deltas.items():
+                setattr(metrics, name, getattr(metrics, name) + delta)
+
+    def _sleep_before_retry(self, attempt):
+        time.sleep(random.uniform(0, self.backoff * 2 ** attempt))
+
+    def request(self, method, url, retry=None, **kwargs):
+        """
+        Send one request through the pool.
+
+        Args:
+            retry (bool): Retry transient failures. Defaults to True for GET,
+                HEAD and OPTIONS only; pass True for other idempotent calls.
+            **kwargs: Passed to requests.Session.request. timeout defaults
+                to (connect_timeout, read_timeout).
+
+        Returns:
+            requests.Response: The last response, whatever its status.
+
+        Raises:
+            CircuitOpenError: The host's circuit is open; nothing was sent.
+            requests.RequestException: Every attempt failed to get a response,
+                or the request itself was invalid (e.g. InvalidURL, InvalidHeader).
+                Only connection errors, timeouts and 5xx responses count
+                against the host's circuit.
+        """
+        breaker, metrics = self._host_state(url)
+        if not breaker.allow():
+            self._count(metrics, rejected=1)
+            raise CircuitOpenError(f"Circuit open for {urlsplit(url).netloc}")
+
+        if retry is None:
+            retry = method.upper() in ('GET', 'HEAD', 'OPTIONS')
+        kwargs.setdefault('timeout', self.timeout)
+        attempts = 1 + (self.retries if retry else 0)
+
+        # Set once the host has answered (True) or failed to (False); None leaves the breaker as it was
+        ok = None
+        try:
+            for attempt in range(attempts):
+                last = attempt == attempts - 1
+                started = time.monotonic()
+                try:
+                    response = self.session.request(method, url, **kwargs)
+                except (requests.ConnectionError, requests.Timeout):
+                    self._record_attempt(metrics, started, error=True)
+                    if last:
+                        ok = False
+                        raise
+                except requests.RequestException:
+                    # InvalidURL, MissingSchema, InvalidHeader...: the caller's mistake, not the host's
+                    self._record_attempt(metrics, started, error=True)
+                    raise
+                else:
+                    retryable = response.status_code in RETRY_STATUSES
+                    self._record_attempt(metrics, started, error=retryable or response.status_code >= 500)
+                    if not retryable or last:
+                        ok = response.status_code < 500
+                        return response
+                    response.close()
+                self._count(metrics, retries=1)
+                self._sleep_before_retry(attempt)
+        finally:
+            # Always settle the call, even for unexpected errors, so a half-open trial never stays stuck
+            if breaker.record(ok=ok):
+                logger.warning("Circuit opened for %s: %s", urlsplit(url).netloc, metrics.snapshot())
+
+    def _record_attempt(self, metrics, started, error):
+        elapsed = time.monotonic() - started
+        with self.lock:
+            metrics.requests += 1
+            metrics.errors += int(error)
+            metrics.total_seconds += elapsed
+            metrics.max_seconds = max(metrics.max_seconds, elapsed)
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def metrics(self):
+        """
+        Per-host counters and latencies since the process started.
+
+        Returns:
+            dict: {host: {'requests', 'errors', 'retries', 'rejected', 'avg_ms', 'max_ms', 'circuit'}}
+        """
+        with self.lock:
+            return {
+                host: {**metrics.snapshot(), 'circuit': self.breakers[host].state}
+                for host, metrics in self.host_metrics.items()
+            }
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """
+    The process-wide client, built from settings.HTTP_CLIENT on first use.
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = HttpClient(**{key.lower(): value for key, value in settings.HTTP_CLIENT.items()})
+        return _client
+
+
+def set_client(client):
+    """
+    Replace the process-wide client, e.g. with a fake. None rebuilds it from settings on next use.
+
+    Returns:
+        The previous client.
+    """
+    global _client
+    with _client_lock:
+        previous, _client = _client, client
+    return previous
+
+
+@contextmanager
+def use_client(client):
+    previous = set_client(client)
+    try:
+        yield client
+    finally:
+        set_client(previous)
@@ -163,3 +163,53 @@ CORS_ALLOW_HEADERS = list(default_headers) + [
 ]
 
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+
+
+# Sheet catalog cache (questions/catalog.py). Point CATALOG_CACHE_ALIAS at a
+# configured CACHES alias to share built catalogs between workers.
+CATALOG_CACHE_ALIAS = env('CATALOG_CACHE_ALIAS', default=None)
+CATALOG_CACHE_TIMEOUT = 60 * 60 * 24
+CATALOG_LOCAL_CACHE_SIZE = 32
+# Seconds a process reuses the max score derived from sheet totals
+MAX_SCORE_CACHE_TIMEOUT = 60 * 5
+
+REST_FRAMEWORK = {
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'users.authentication.CachedJWTAuthentication',
+        'rest_framework.authentication.SessionAuthentication',
+        'rest_framework.authentication.BasicAuthentication',
+    ],
+}
+
+SIMPLE_JWT = {
+    'ACCESS_TOKEN_LIFETIME': timedelta(minutes=30),
+    'REFRESH_TOKEN_LIFETIME': timedelta(seconds=SESSION_COOKIE_AGE),
+    'USER_ID_FIELD': 'id',
+    'USER_ID_CLAIM': 'user_id',
+}
+
+# In-process cache of token users (users/authentication.py). 0 disables it.
+JWT_USER_CACHE_TTL = 60
+JWT_USER_CACHE_SIZE = 1024
+# Let requests without a token act as the user named by their email/username
+# parameter. Only for clients that predate token auth; turn off once they send tokens.
+ALLOW_ANONYMOUS_USER_LOOKUP = True
+
+# LeetCode problem cache (questions/leetcode.py): an in-process TTL LRU in
+# front of the LeetCodeProblem table, so popular problems need no HTTP call.
+LEETCODE_GRAPHQL_URL = env('LEETCODE_GRAPHQL_URL', default='https://leetcode.com/graphql')
+LEETCODE_PROBLEM_CACHE_SIZE = 256
+LEETCODE_PROBLEM_CACHE_TTL = 60 * 60
+
+# Outbound HTTP client (backend/http_client.py), shared by every upstream call
+HTTP_CLIENT = {
+    'CONNECT_TIMEOUT': 3.05,
+    'READ_TIMEOUT': 10,
+    # Extra attempts for idempotent calls, with jittered exponential backoff
+    'RETRIES': 2,
+    'BACKOFF': 0.5,
+    'POOL_SIZE': 10,
+    # Consecutive failed calls before a host is failed fast, and for how long
+    'BREAKER_THRESHOLD': 5,
+    'BREAKER_COOLDOWN': 30,
+}
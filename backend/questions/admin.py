@@ -1,5 +1,35 @@
 from django.contrib import admin
+from django.contrib.postgres.search import SearchQuery, SearchVector
 from .models import DSASheet, Topic, Question, UserQuestionStatus, UserSheetProgress, UserNote, MarkdownNote
+from .search import SEARCH_CONFIG, full_text_supported
+
+
+class FullTextSearchMixin:
+    """
+    On PostgreSQL, match full_text_field through its full-text index instead
+    of an icontains scan, OR'd with the default lookups on the other search_fields.
+    """
+    full_text_field = None
+
+    def full_text_matches(self, queryset, query):
+        raise NotImplementedError
+
+    def get_search_fields(self, request):
+        fields = super().get_search_fields(request)
+        if full_text_supported():
+            return tuple(field for field in fields if field != self.full_text_field)
+        return fields
+
+    def get_search_results(self, request, queryset, search_term):
+        if not (search_term and full_text_supported()):
+            return super().get_search_results(request, queryset, search_term)
+        query = SearchQuery(search_term, search_type='websearch', config=SEARCH_CONFIG)
+        matches = self.full_text_matches(queryset, query)
+        if not self.get_search_fields(request):
+            return matches, False
+        others, may_have_duplicates = super().get_search_results(request, queryset, search_term)
+        return matches | others, may_have_duplicates
+
 
 @admin.register(DSASheet)
 class DSASheetAdmin(admin.ModelAdmin):
@@ -13,10 +43,14 @@ class TopicAdmin(admin.ModelAdmin):
     search_fields = ('name',)
 
 @admin.register(Question)
-class QuestionAdmin(admin.ModelAdmin):
-    list_display = ('question', 'topic', 'platform', 'difficulty')
-    list_filter = ('topic__sheet', 'topic', 'platform', 'difficulty')
+class QuestionAdmin(FullTextSearchMixin, admin.ModelAdmin):
+    list_display = ('question', 'topic', 'platform', 'difficulty', 'is_active')
+    list_filter = ('topic__sheet', 'topic', 'platform', 'difficulty', 'is_active')
     search_fields = ('question', 'platform')
+    full_text_field = 'question'
+
+    def full_text_matches(self, queryset, query):
+        return queryset.filter(search_vector=query)
 
 @admin.register(UserQuestionStatus)
 class UserQuestionStatusAdmin(admin.ModelAdmin):
@@ -31,10 +65,16 @@ class UserSheetProgressAdmin(admin.ModelAdmin):
     search_fields = ('user__email', 'sheet__name')
 
 @admin.register(UserNote)
-class UserNoteAdmin(admin.ModelAdmin):
+class UserNoteAdmin(FullTextSearchMixin, admin.ModelAdmin):
     list_display = ('user', 'question', 'content', 'created_at')
     list_filter = ('question__topic__sheet',)
     search_fields = ('user__email', 'question__question', 'content')
+    full_text_field = 'content'
+
+    def full_text_matches(self, queryset, query):
+        # Same expression as the usernote_content_search_gin index
+        vector = SearchVector('content', config=SEARCH_CONFIG)
+        return queryset.filter(pk__in=UserNote.objects.annotate(vector=vector).filter(vector=query).values('pk'))
 
 @admin.register(MarkdownNote)
 class MarkdownNoteAdmin(admin.ModelAdmin):
@@ -5,6 +5,5 @@ class QuestionsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "questions"
 
-
-def ready(self):
-    import questions.signals
+    def ready(self):
+        import questions.signals
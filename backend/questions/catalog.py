@@ -0,0 +1,192 @@
+import threading
+
+from cachetools import LRUCache, TTLCache
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Case, Count, F, IntegerField, Max, Prefetch, Q, Sum, Value, When
+
+from .models import DSASheet, Topic, Question, SCORE_MAPPING
+
+# Pre-serialized topic/question trees, keyed by (sheet id, catalog version)
+_local_catalogs = LRUCache(maxsize=settings.CATALOG_LOCAL_CACHE_SIZE)
+_local_lock = threading.Lock()
+
+# Highest attainable score, derived from the sheets' denormalized totals
+_max_score = TTLCache(maxsize=1, ttl=settings.MAX_SCORE_CACHE_TIMEOUT)
+
+
+def _shared_cache():
+    alias = settings.CATALOG_CACHE_ALIAS
+    return caches[alias] if alias else None
+
+
+def catalog_cache_key(sheet_id, version):
+    return f"questions:catalog:{sheet_id}:v{version}"
+
+
+def get_catalog_version(sheet_id):
+    """
+    Return the sheet's current catalog version, or None if the sheet does not exist.
+    """
+    return DSASheet.objects.filter(id=sheet_id).values_list('catalog_version', flat=True).first()
+
+
+def bump_catalog_version(sheet_id):
+    """
+    Invalidate every cached copy of a sheet's catalog.
+
+    Cached entries are keyed by version, so other workers pick up the change
+    on their next version read and stale entries simply age out.
+    """
+    DSASheet.objects.filter(id=sheet_id).update(catalog_version=F('catalog_version') + 1)
+    evict_local_catalog(sheet_id)
+
+
+def sheet_totals(sheet_id):
+    """
+    Count a sheet's questions by difficulty in one aggregate query.
+    """
+    return Question.objects.filter(topic__sheet_id=sheet_id, is_active=True).aggregate(
+        total_questions=Count('id'),
+        total_easy=Count('id', filter=Q(difficulty='EASY')),
+        total_medium=Count('id', filter=Q(difficulty='MEDIUM')),
+        total_hard=Count('id', filter=Q(difficulty='HARD')),
+    )
+
+
+def refresh_sheet_totals(sheet_id):
+    """
+    Recount a sheet's denormalized totals and invalidate its catalog.
+
+    Call this after any change to the sheet's questions that bypasses
+    model signals (bulk_create, bulk_update, queryset update/delete).
+    """
+    DSASheet.objects.filter(id=sheet_id).update(
+        catalog_version=F('catalog_version') + 1,
+        **sheet_totals(sheet_id),
+    )
+    evict_local_catalog(sheet_id)
+    evict_max_score()
+
+
+def evict_local_catalog(sheet_id):
+    prefix = catalog_cache_key(sheet_id, '')
+    with _local_lock:
+        for key in [k for k in _local_catalogs if k.startswith(prefix)]:
+            del _local_catalogs[key]
+
+
+def question_score_expression():
+    """
+    A question's score (Question.get_score) as a database expression.
+    """
+    return Case(
+        *[When(difficulty=difficulty, then=Value(score)) for difficulty, score in SCORE_MAPPING.items()],
+        default=Value(SCORE_MAPPING['UNMARKED']),
+        output_field=IntegerField(),
+    )
+
+
+def get_max_score():
+    """
+    Return the score a user would have after solving every active question.
+
+    A problem listed in several sheets is only credited once, so each
+    Problem counts at its highest-scoring active copy, and active questions
+    without a problem count on their own. The value is reused for
+    MAX_SCORE_CACHE_TIMEOUT seconds and dropped when this process changes
+    questions or problems.
+    """
+    with _local_lock:
+        max_score = _max_score.get('max_score')
+    if max_score is not None:
+        return max_score
+
+    score = question_score_expression()
+    active = Question.objects.filter(is_active=True)
+    per_problem = (
+        active.filter(problem__isnull=False)
+        .values('problem_id')
+        .annotate(best=Max(score))
+        .values_list('best', flat=True)
+    )
+    standalone = active.filter(problem__isnull=True).aggregate(total=Sum(score))['total'] or 0
+    max_score = sum(per_problem) + standalone
+
+    with _local_lock:
+        _max_score['max_score'] = max_score
+    return max_score
+
+
+def evict_max_score():
+    with _local_lock:
+        _max_score.clear()
+
+
+def build_sheet_catalog(sheet_id):
+    """
+    Serialize a sheet's topics and questions without any per-user state.
+
+    Returns:
+        list: [{'id', 'name', 'questions': [{'id', 'question', 'link', 'solution', 'platform', 'difficulty', 'problem_id'}, ...]}, ...]
+            problem_id is internal: StatusOverlay uses it and leaves it out of responses.
+    """
+    topics = Topic.objects.filter(sheet_id=sheet_id).order_by('id').prefetch_related(
+        Prefetch('questions', queryset=Question.objects.filter(is_active=True).order_by('id'))
+    )
+
+    return [
+        {
+            'id': topic.id,
+            'name': topic.name,
+            'questions': [
+                {
+                    'id': q.id,
+                    'question': q.question,
+                    'link': q.link,
+                    'solution': q.solution,
+                    'platform': q.platform,
+                    'difficulty': q.difficulty,
+                    'problem_id': q.problem_id,
+                }
+                for q in topic.questions.all()
+            ],
+        }
+        for topic in topics
+    ]
+
+
+def get_sheet_catalog(sheet_id, version=None):
+    """
+    Return the cached catalog for a sheet, building it on a miss.
+
+    Lookup order is process memory, then the shared cache backend (if
+    CATALOG_CACHE_ALIAS is set), then the database. The returned structure
+    is shared between requests and must not be mutated.
+
+    Returns:
+        list or None: The catalog, or None if the sheet does not exist.
+    """
+    if version is None:
+        version = get_catalog_version(sheet_id)
+        if version is None:
+            return None
+
+    key = catalog_cache_key(sheet_id, version)
+    with _local_lock:
+        catalog = _local_catalogs.get(key)
+    if catalog is not None:
+        return catalog
+
+    shared = _shared_cache()
+    if shared is not None:
+        catalog = shared.get(key)
+
+    if catalog is None:
+        catalog = build_sheet_catalog(sheet_id)
+        if shared is not None:
+            shared.set(key, catalog, settings.CATALOG_CACHE_TIMEOUT)
+
+    with _local_lock:
+        _local_catalogs[key] = catalog
+    return catalog
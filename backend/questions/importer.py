@@ -0,0 +1,219 @@
+import csv
+
+from django.db import transaction
+
+from .catalog import refresh_sheet_totals
+from .models import Topic, Question
+from .problems import problem_id_for, resolve_problem_ids, sync_status_problems
+from .progress import recompute_progress_for_problems
+from .search import refresh_search_vectors
+from .signals import sheet_signals_muted
+from .utils import normalize_problem_link
+
+BATCH_SIZE = 500
+
+# Difficulty mapping to ensure it matches the DIFFICULTY_CHOICES
+DIFFICULTY_MAPPING = {
+    "Easy": "EASY",
+    "Medium": "MEDIUM",
+    "Hard": "HARD",
+    "Unmarked": "UNMARKED",  # For cases where difficulty is not provided
+}
+
+
+# Helper to extract platform from problem link
+def get_platform_from_link(link):
+    if "leetcode.com" in link:
+        return "leetcode"
+    elif "geeksforgeeks.org" in link:
+        return "geeksforgeeks"
+    elif "interviewbit.com" in link:
+        return "interviewbit"
+    else:
+        return "misc"
+
+
+def read_tsv(tsv_file):
+    """
+    Stream the rows of a question TSV as dicts keyed by its header
+    (Problem Name, Problem Link, Topic, Solution Link, Difficulty).
+    """
+    with open(tsv_file, newline='', encoding='utf-8') as f:
+        yield from csv.DictReader(f, delimiter='\t')
+
+
+def delete_sheet(sheet):
+    """
+    Delete a sheet with its topics, questions and everything hanging off them.
+
+    The per-row Topic and Question receivers are muted, so the query count
+    does not grow with the sheet. The sheet's own post_delete receiver
+    evicts its cached catalog and the max score once; with the sheet gone
+    there are no totals or catalog version left to refresh.
+    """
+    with transaction.atomic(), sheet_signals_muted(sheet.id):
+        sheet.delete()
+
+
+class ImportReport:
+    def __init__(self):
+        self.topics_created = 0
+        self.questions_created = 0
+        self.questions_updated = 0
+        self.questions_unchanged = 0
+        self.questions_retired = 0
+        self.rows_skipped = 0
+
+    def __str__(self):
+        return (
+            f"{self.topics_created} topics created, "
+            f"{self.questions_created} questions created, "
+            f"{self.questions_updated} updated, "
+            f"{self.questions_unchanged} unchanged, "
+            f"{self.questions_retired} retired, "
+            f"{self.rows_skipped} duplicate rows skipped"
+        )
+
+
+def import_rows(sheet, rows, dry_run=False, match_links=False, retire_missing=False, batch_size=BATCH_SIZE):
+    """
+    Diff question rows against a sheet and apply the result in bulk.
+
+    Existing topics and questions are loaded once. New topics and questions
+    are bulk-created and changed questions bulk-updated inside one
+    transaction, so a file costs a handful of queries instead of two per row.
+
+    By default rows match existing questions on (topic name, question text)
+    and the first row for a key wins. With match_links, rows match on their
+    normalized problem link first, preferring a question in the same topic,
+    so renamed or moved questions are updated in place rather than recreated.
+
+    Args:
+        sheet (DSASheet): Target sheet. May be None for a dry run against a sheet that does not exist yet.
+        rows (iterable): Dicts with 'topic' and 'question' plus the Question fields the
+            caller manages ('link', 'solution', 'platform', 'difficulty'). Fields left
+            out of a row are never touched on existing questions.
+        dry_run (bool): Compute the report without writing anything.
+        match_links (bool): Match rows to existing questions by problem link.
+        retire_missing (bool): Soft-retire active questions that no row matched.
+            Their user statuses and notes are kept.
+
+    Returns:
+        ImportReport
+    """
+    report = ImportReport()
+
+    with transaction.atomic():
+        topics = {t.name: t for t in sheet.topics.all()} if sheet else {}
+        topic_names = {t.id: name for name, t in topics.items()}
+        existing = list(Question.objects.filter(topic__sheet=sheet)) if sheet else []
+
+        by_name, by_link = {}, {}
+        for question in existing:
+            by_name.setdefault((topic_names[question.topic_id], question.question), question)
+            if match_links:
+                by_link.setdefault(normalize_problem_link(question.link), []).append(question)
+        by_link.pop("", None)
+
+        new_topics, new_questions, changed, reactivated = [], [], {}, []
+        update_fields = set()
+        matched, seen = set(), set()
+
+        for row in rows:
+            fields = dict(row)
+            topic_name = fields.pop('topic')
+            question_text = fields.pop('question')
+            key = (topic_name, question_text)
+
+            if key in seen:
+                report.rows_skipped += 1
+                continue
+            seen.add(key)
+
+            topic = topics.get(topic_name)
+            if topic is None:
+                topic = Topic(sheet=sheet, name=topic_name)
+                topics[topic_name] = topic
+                new_topics.append(topic)
+
+            question = None
+            if match_links:
+                candidates = [
+                    q for q in by_link.get(normalize_problem_link(fields.get('link', '')), [])
+                    if q.id not in matched
+                ]
+                question = next((q for q in candidates if q.topic_id == topic.id), None)
+                if question is None and candidates:
+                    question = candidates[0]
+            if question is None:
+                question = by_name.get(key)
+                if question is not None and question.id in matched:
+                    question = None
+
+            if question is None:
+                new_questions.append(Question(topic=topic, question=question_text, **fields))
+                continue
+            matched.add(question.id)
+
+            fields['question'] = question_text
+            fields['is_active'] = True
+            diff = {name: value for name, value in fields.items() if getattr(question, name) != value}
+            if topic.id is None or question.topic_id != topic.id:
+                question.topic = topic
+                diff['topic'] = topic
+            if not diff:
+                report.questions_unchanged += 1
+                continue
+            if 'is_active' in diff:
+                reactivated.append(question.id)
+            for name, value in diff.items():
+                setattr(question, name, value)
+            update_fields.update(diff)
+            changed[question.id] = question
+
+        retired = []
+        if retire_missing:
+            retired = [q.id for q in existing if q.is_active and q.id not in matched]
+
+        report.topics_created = len(new_topics)
+        report.questions_created = len(new_questions)
+        report.questions_updated = len(changed)
+        report.questions_retired = len(retired)
+
+        if dry_run:
+            return report
+
+        # Point new and edited questions at their canonical problems
+        kept = [q for q in existing if q.id in matched]
+        problem_ids = resolve_problem_ids(new_questions + kept)
+        affected = set()
+        for question in new_questions:
+            question.problem_id = problem_id_for(question, problem_ids)
+            affected.add(question.problem_id)
+        repointed = []
+        for question in kept:
+            problem_id = problem_id_for(question, problem_ids)
+            if problem_id != question.problem_id:
+                affected.update((question.problem_id, problem_id))
+                question.problem_id = problem_id
+                repointed.append(question)
+
+        Topic.objects.bulk_create(new_topics, batch_size=batch_size)
+        Question.objects.bulk_create(new_questions, batch_size=batch_size)
+        if changed:
+            Question.objects.bulk_update(list(changed.values()), sorted(update_fields), batch_size=batch_size)
+        if repointed:
+            Question.objects.bulk_update(repointed, ['problem'], batch_size=batch_size)
+            sync_status_problems([q.id for q in repointed])
+        if retired:
+            Question.objects.filter(id__in=retired).update(is_active=False)
+
+        # Users who solved these problems in other sheets now have solves here too,
+        # and solves of retired or reactivated questions leave or rejoin the counts
+        recompute_progress_for_problems(affected, question_ids=[q.id for q in repointed] + reactivated + retired)
+
+        # Bulk writes skip model signals, so resync totals, the catalog and search vectors once
+        refresh_sheet_totals(sheet.id)
+        refresh_search_vectors(sheet_id=sheet.id)
+
+    return report
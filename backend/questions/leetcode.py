@@ -0,0 +1,253 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+from cachetools import TTLCache
+from django.conf import settings
+
+from backend.http_client import get_client
+from .models import LeetCodeProblem, Question
+from .utils import extract_formatted_text, leetcode_slug
+
+PROBLEM_QUERY = """
+query getQuestionDetail($titleSlug: String!) {
+  question(titleSlug: $titleSlug) {
+    title
+    content
+    codeSnippets {
+      lang
+      code
+    }
+  }
+}
+"""
+
+# slug -> {'title', 'content_text', 'code_snippets'}, in front of the LeetCodeProblem table
+_local_problems = TTLCache(maxsize=settings.LEETCODE_PROBLEM_CACHE_SIZE, ttl=settings.LEETCODE_PROBLEM_CACHE_TTL)
+_local_lock = threading.Lock()
+
+
+def evict_local_problem(slug=None):
+    """
+    Drop one slug, or every slug, from this process's problem cache.
+    """
+    with _local_lock:
+        if slug is None:
+            _local_problems.clear()
+        else:
+            _local_problems.pop(slug, None)
+
+
+def fetch_problem(slug):
+    """
+    Fetch one problem from the LeetCode GraphQL API.
+
+    Returns:
+        dict: {'title', 'content_text', 'code_snippets': {lang: code}}, or None if LeetCode has no such problem.
+
+    Raises:
+        requests.RequestException: The request failed or timed out, or LeetCode's circuit is open.
+    """
+    # A read-only query, so safe to retry
+    response = get_client().post(
+        settings.LEETCODE_GRAPHQL_URL,
+        json={"query": PROBLEM_QUERY, "variables": {"titleSlug": slug}},
+        headers={
+            "Content-Type": "application/json",
+            "Referer": f"https://leetcode.com/problems/{slug}/",
+            "User-Agent": "Mozilla/5.0",
+        },
+        retry=True,
+    )
+    response.raise_for_status()
+
+    question = (response.json().get("data") or {}).get("question")
+    if not question:
+        return None
+    return {
+        "title": question.get("title") or "",
+        "content_text": extract_formatted_text(question.get("content") or ""),
+        "code_snippets": {c["lang"]: c["code"] for c in question.get("codeSnippets") or []},
+    }
+
+
+def store_problem(slug, problem):
+    LeetCodeProblem.objects.update_or_create(slug=slug, defaults=problem)
+
+
+def store_problems(problems):
+    """
+    Insert or overwrite many fetched problems in one statement.
+
+    Args:
+        problems (dict): {slug: {'title', 'content_text', 'code_snippets'}}
+    """
+    LeetCodeProblem.objects.bulk_create(
+        [LeetCodeProblem(slug=slug, **problem) for slug, problem in problems.items()],
+        update_conflicts=True,
+        unique_fields=['slug'],
+        update_fields=['title', 'content_text', 'code_snippets', 'fetched_at'],
+    )
+
+
+def get_problem(slug):
+    """
+    Return a problem from the process cache, else the database, else LeetCode.
+
+    Fetched problems are stored so every worker, and every later restart,
+    serves them without an outbound call. Misses for unknown slugs are not
+    cached, so a problem published later is still found.
+
+    Returns:
+        dict: {'title', 'content_text', 'code_snippets'}, or None for an unknown slug.
+    """
+    with _local_lock:
+        problem = _local_problems.get(slug)
+    if problem is not None:
+        return problem
+
+    problem = (
+        LeetCodeProblem.objects.filter(slug=slug)
+        .values('title', 'content_text', 'code_snippets')
+        .first()
+    )
+    if problem is None:
+        problem = fetch_problem(slug)
+        if problem is None:
+            return None
+        store_problem(slug, problem)
+
+    with _local_lock:
+        _local_problems[slug] = problem
+    return problem
+
+
+def get_leetcode_problem_html(slug, lang="C++"):
+    """
+    Fetch LeetCode problem title, clean description text, and starter code.
+
+    Args:
+        slug (str): Problem slug (e.g., "set-matrix-zeroes")
+        lang (str): Programming language for starter code (default: "C++")
+
+    Returns:
+        dict: {'title': ..., 'content_text': ..., 'code': ...}
+    """
+    problem = get_problem(slug)
+    if problem is None:
+        return {"error": "Problem not found."}
+    return {
+        "title": problem["title"],
+        "content_text": problem["content_text"],
+        "code": problem["code_snippets"].get(lang, ""),
+    }
+
+
+def catalog_slugs():
+    """
+    Every distinct LeetCode slug linked from a question, in any sheet.
+    """
+    links = Question.objects.values_list('link', flat=True).distinct()
+    return sorted({slug for slug in map(leetcode_slug, links) if slug})
+
+
+class RateLimiter:
+    """
+    Space calls at least 1/rate seconds apart across threads. A rate of 0 disables it.
+    """
+
+    def __init__(self, rate):
+        self.interval = 1 / rate if rate > 0 else 0
+        self.next_at = 0
+        self.lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self.lock:
+            now = time.monotonic()
+            at = max(now, self.next_at)
+            self.next_at = at + self.interval
+        if at > now:
+            time.sleep(at - now)
+
+
+class PrewarmReport:
+    def __init__(self):
+        self.stored = 0
+        self.skipped = 0
+        self.missing = []
+        self.failed = {}
+
+    def __str__(self):
+        return (
+            f"{self.stored} problems stored, "
+            f"{self.skipped} already stored, "
+            f"{len(self.missing)} not found, "
+            f"{len(self.failed)} failed"
+        )
+
+
+def prewarm_problems(slugs=None, workers=4, rate=2.0, refresh=False, batch_size=50):
+    """
+    Fetch problems into the LeetCodeProblem table ahead of the first user request.
+
+    Slugs already stored are skipped unless refresh is set, and results are
+    written every batch_size problems, so an interrupted run resumes where
+    it stopped. Fetches run on a bounded thread pool sharing one rate limit;
+    only the calling thread touches the database.
+
+    Args:
+        slugs (iterable): Slugs to fetch. Defaults to catalog_slugs().
+        workers (int): Concurrent requests.
+        rate (float): Requests per second across all workers. 0 for no limit.
+        refresh (bool): Refetch slugs that are already stored.
+        batch_size (int): Problems per bulk write.
+
+    Returns:
+        PrewarmReport
+    """
+    report = PrewarmReport()
+    slugs = sorted(set(catalog_slugs() if slugs is None else slugs))
+    if not refresh:
+        stored = set(LeetCodeProblem.objects.filter(slug__in=slugs).values_list('slug', flat=True))
+        report.skipped = len(stored)
+        slugs = [slug for slug in slugs if slug not in stored]
+
+    limiter = RateLimiter(rate)
+
+    def fetch(slug):
+        limiter.wait()
+        return fetch_problem(slug)
+
+    pending = {}
+
+    def flush():
+        store_problems(pending)
+        report.stored += len(pending)
+        pending.clear()
+
+    pool = ThreadPoolExecutor(max_workers=max(1, workers))
+    try:
+        futures = {pool.submit(fetch, slug): slug for slug in slugs}
+        for future in as_completed(futures):
+            slug = futures[future]
+            try:
+                problem = future.result()
+            except requests.RequestException as e:
+                report.failed[slug] = str(e)
+                continue
+            if problem is None:
+                report.missing.append(slug)
+                continue
+            pending[slug] = problem
+            if len(pending) >= batch_size:
+                flush()
+    finally:
+        # On interruption, drop queued fetches but keep what was already fetched
+        pool.shutdown(cancel_futures=True)
+        if pending:
+            flush()
+    report.missing.sort()
+    return report
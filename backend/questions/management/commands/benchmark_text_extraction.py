@@ -0,0 +1,81 @@
+import os
+import timeit
+
+from bs4 import BeautifulSoup
+from bs4.element import NavigableString
+from django.core.management.base import BaseCommand, CommandError
+from questions.utils import BLOCK_TAGS, extract_formatted_text
+
+CORPUS = os.path.join(os.path.dirname(__file__), '..', '..', 'testdata', 'html_to_text')
+
+
+def extract_formatted_text_soup(html_content):
+    """
+    Convert HTML content to well-formatted plain text.
+    Handles newlines and spacing for readability.
+
+    The original BeautifulSoup implementation of extract_formatted_text, kept
+    as the reference this benchmark and the golden-file tests compare against.
+    """
+    soup = BeautifulSoup(html_content, "html.parser")
+
+    # Add newlines before and after block-level elements
+    for tag in soup.find_all(BLOCK_TAGS):
+        tag.insert_before(NavigableString("\n"))
+        tag.insert_after(NavigableString("\n"))
+
+    # Replace <br> with line breaks
+    for br in soup.find_all("br"):
+        br.replace_with("\n")
+
+    # Optional: Format <pre> code blocks more clearly
+    for pre in soup.find_all("pre"):
+        text = pre.get_text(strip=True)
+        pre.string = f"\n{text}\n"
+
+    # Convert to plain text
+    text = soup.get_text()
+
+    # Remove excessive empty lines
+    lines = [line.strip() for line in text.splitlines()]
+    cleaned_text = "\n".join([line for line in lines if line])
+
+    return cleaned_text
+
+
+class Command(BaseCommand):
+    help = "Time extract_formatted_text against the BeautifulSoup implementation on the golden HTML corpus"
+
+    def add_arguments(self, parser):
+        parser.add_argument('files', nargs='*', help='HTML files to convert (default: the golden corpus)')
+        parser.add_argument('--number', type=int, default=200, help='Conversions of each document per timing run')
+        parser.add_argument('--repeat', type=int, default=5, help='Timing runs; the fastest is reported')
+
+    def handle(self, *args, **kwargs):
+        files = kwargs['files'] or sorted(
+            os.path.join(CORPUS, name) for name in os.listdir(CORPUS) if name.endswith('.html')
+        )
+        documents = []
+        for path in files:
+            with open(path, encoding='utf-8') as f:
+                html = f.read()
+            if extract_formatted_text(html) != extract_formatted_text_soup(html):
+                raise CommandError(f"Outputs differ for {path}")
+            documents.append((os.path.basename(path), html))
+
+        number, repeat = kwargs['number'], kwargs['repeat']
+        totals = [0.0, 0.0]
+        for name, html in documents:
+            times = [
+                min(timeit.repeat(lambda: convert(html), number=number, repeat=repeat)) / number
+                for convert in (extract_formatted_text_soup, extract_formatted_text)
+            ]
+            totals = [total + t for total, t in zip(totals, times)]
+            self.stdout.write(
+                f"{name:<28} {len(html):>7} chars  soup {times[0] * 1e6:>9.1f} µs  "
+                f"stream {times[1] * 1e6:>9.1f} µs  {times[0] / times[1]:>5.1f}x"
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {len(documents)} documents: soup {totals[0] * 1e3:.2f} ms, "
+            f"stream {totals[1] * 1e3:.2f} ms, {totals[0] / totals[1]:.1f}x faster"
+        ))
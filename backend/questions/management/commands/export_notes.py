@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+from users.models import CustomUser
+from questions.notes import EXPORT_CHUNK_SIZE, iter_notes_zip
+
+
+class Command(BaseCommand):
+    help = "Export a user's markdown notes and notes as a ZIP with one Markdown file per topic"
+
+    def add_arguments(self, parser):
+        parser.add_argument('username', type=str, help='User whose notes to export')
+        parser.add_argument('output', type=str, help='Path of the ZIP file to write')
+        parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE, help='Rows fetched per database round trip')
+
+    def handle(self, *args, **kwargs):
+        try:
+            user = CustomUser.objects.get(username=kwargs['username'])
+        except CustomUser.DoesNotExist:
+            raise CommandError(f"User {kwargs['username']} not found")
+
+        size = 0
+        with open(kwargs['output'], 'wb') as f:
+            for chunk in iter_notes_zip(user, chunk_size=kwargs['chunk_size']):
+                f.write(chunk)
+                size += len(chunk)
+
+        self.stdout.write(self.style.SUCCESS(f"✅ Exported notes for {user.username} to {kwargs['output']} ({size} bytes)"))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from questions.leetcode import prewarm_problems
+
+
+class Command(BaseCommand):
+    help = "Fetch and store the LeetCode description of every problem linked from a sheet"
+
+    def add_arguments(self, parser):
+        parser.add_argument('slugs', nargs='*', help='Only these slugs (default: every slug in the catalog)')
+        parser.add_argument('--workers', type=int, default=4, help='Concurrent requests to LeetCode')
+        parser.add_argument('--rate', type=float, default=2.0, help='Requests per second across all workers (0 for no limit)')
+        parser.add_argument('--refresh', action='store_true', help='Refetch problems that are already stored')
+        parser.add_argument('--batch-size', type=int, default=50, help='Problems written per bulk insert')
+
+    def handle(self, *args, **kwargs):
+        report = prewarm_problems(
+            slugs=kwargs['slugs'] or None,
+            workers=kwargs['workers'],
+            rate=kwargs['rate'],
+            refresh=kwargs['refresh'],
+            batch_size=kwargs['batch_size'],
+        )
+
+        for slug in report.missing:
+            self.stdout.write(self.style.WARNING(f"Not found on LeetCode: {slug}"))
+        for slug, error in report.failed.items():
+            self.stdout.write(self.style.ERROR(f"Failed to fetch {slug}: {error}"))
+        self.stdout.write(self.style.SUCCESS(f"✅ Prewarmed problem descriptions: {report}"))
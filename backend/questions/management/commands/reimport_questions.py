@@ -1,7 +1,8 @@
 from django.core.management.base import BaseCommand
-from questions.models import DSASheet, Topic, Question
-from users.models import CustomUser
-import csv
+from django.db import transaction
+from questions.models import DSASheet
+from questions.importer import delete_sheet, import_rows, read_tsv
+
 
 class Command(BaseCommand):
     help = 'Reimport NeetCode DSA questions after deleting old ones'
@@ -9,57 +10,71 @@ class Command(BaseCommand):
     def add_arguments(self, parser):
         parser.add_argument('tsv_file', type=str, help='Path to the TSV file with NeetCode questions')
         parser.add_argument('sheet_name', type=str, help='Name of the DSASheet (NeetCode)')
+        parser.add_argument('--dry-run', action='store_true', help='Report what would change without writing')
+        parser.add_argument(
+            '--incremental', action='store_true',
+            help='Update the sheet in place, matching questions by problem link, instead of deleting and '
+                 'recreating it. Keeps user statuses, notes and progress; removed questions are retired.',
+        )
 
     def handle(self, *args, **kwargs):
         tsv_file = kwargs['tsv_file']
         sheet_name = kwargs['sheet_name']
+        dry_run = kwargs['dry_run']
+        incremental = kwargs['incremental']
 
-        # 1. Delete existing NeetCode questions and topics
-        try:
-            sheet = DSASheet.objects.get(name=sheet_name)
-            # Delete topics and questions related to NeetCode sheet
-            sheet.topics.all().delete()
-            sheet.delete()
-            self.stdout.write(self.style.SUCCESS(f'✅ Successfully deleted all topics and questions for sheet: {sheet_name}.'))
-        except DSASheet.DoesNotExist:
-            self.stdout.write(self.style.WARNING(f'⚠️ No sheet found with name: {sheet_name}.'))
-
-        # 2. Recreate the NeetCode sheet and import questions with updated data
-        sheet = DSASheet.objects.create(
-            name=sheet_name,
-            description=f"NeetCode DSA Sheet (Reimported)",
+        # Create the question with platform = "leetcode" and the TSV difficulty upper-cased
+        rows = (
+            {
+                'topic': row['Topic'].strip(),
+                'question': row['Problem Name'].strip(),
+                'link': row['Problem Link'].strip(),
+                'solution': row['Solution Link'].strip(),
+                'difficulty': row['Difficulty'].strip().upper(),
+                'platform': "leetcode",
+            }
+            for row in read_tsv(tsv_file)
         )
 
-        topic_cache = {}
+        if incremental:
+            sheet = DSASheet.objects.filter(name=sheet_name).first()
+            if sheet is None and not dry_run:
+                sheet = DSASheet.objects.create(name=sheet_name, description=f"NeetCode DSA Sheet (Reimported)")
+
+            report = import_rows(sheet, rows, dry_run=dry_run, match_links=True, retire_missing=True)
+
+            if dry_run:
+                self.stdout.write(self.style.WARNING(f'Dry run: would resync sheet {sheet_name}: {report}'))
+            else:
+                self.stdout.write(self.style.SUCCESS(f'✅ Successfully resynced sheet {sheet_name}: {report}'))
+            return
 
-        with open(tsv_file, newline='', encoding='utf-8') as f:
-            reader = csv.DictReader(f, delimiter='\t')
-            created_count = 0
+        if dry_run:
+            existing = DSASheet.objects.filter(name=sheet_name).first()
+            if existing:
+                self.stdout.write(self.style.WARNING(
+                    f'Dry run: would delete sheet {sheet_name} with {existing.total_questions} questions.'
+                ))
+            report = import_rows(None, rows, dry_run=True)
+            self.stdout.write(self.style.WARNING(f'Dry run: would reimport {report}'))
+            return
 
-            for row in reader:
-                topic_name = row['Topic'].strip()
-                question_text = row['Problem Name'].strip()
-                problem_link = row['Problem Link'].strip()
-                solution_link = row['Solution Link'].strip()
-                difficulty = row['Difficulty'].strip().upper()
+        with transaction.atomic():
+            # 1. Delete existing NeetCode questions and topics
+            try:
+                sheet = DSASheet.objects.get(name=sheet_name)
+                # Delete topics and questions related to NeetCode sheet, in a handful of queries
+                delete_sheet(sheet)
+                self.stdout.write(self.style.SUCCESS(f'✅ Successfully deleted all topics and questions for sheet: {sheet_name}.'))
+            except DSASheet.DoesNotExist:
+                self.stdout.write(self.style.WARNING(f'⚠️ No sheet found with name: {sheet_name}.'))
 
-                # Get or create the topic
-                if topic_name not in topic_cache:
-                    topic, _ = Topic.objects.get_or_create(sheet=sheet, name=topic_name)
-                    topic_cache[topic_name] = topic
-                else:
-                    topic = topic_cache[topic_name]
+            # 2. Recreate the NeetCode sheet and import questions with updated data
+            sheet = DSASheet.objects.create(
+                name=sheet_name,
+                description=f"NeetCode DSA Sheet (Reimported)",
+            )
 
-                # Create the question with platform = "leetcode" and difficulty = "UNMARKED"
-                if not Question.objects.filter(topic=topic, question=question_text).exists():
-                    Question.objects.create(
-                        topic=topic,
-                        question=question_text,
-                        link=problem_link,
-                        solution=solution_link,
-                        difficulty=difficulty,  # Default difficulty
-                        platform="leetcode"     # Set platform to lowercase "leetcode"
-                    )
-                    created_count += 1
+            report = import_rows(sheet, rows)
 
-        self.stdout.write(self.style.SUCCESS(f'✅ Successfully reimported {created_count} NeetCode questions into the sheet: {sheet_name}.'))
+        self.stdout.write(self.style.SUCCESS(f'✅ Successfully reimported NeetCode questions into the sheet: {sheet_name}: {report}'))
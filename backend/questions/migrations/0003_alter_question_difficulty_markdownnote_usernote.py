@@ -0,0 +1,104 @@
+# Generated by Django 5.1.7 on 2026-10-18 11:32
+
+# Catch-up migration for models that had drifted from the committed migrations:
+# UserNote, MarkdownNote and the difficulty choices.
+# Databases that already have them should record it without running it,
+# scoped so that later migrations still run:
+#   python manage.py migrate users 0005 --fake
+#   python manage.py migrate questions 0003 --fake
+#   python manage.py migrate
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("questions", "0002_usersheetprogress_solved_easy_and_more"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="question",
+            name="difficulty",
+            field=models.CharField(
+                choices=[
+                    ("UNMARKED", "Unmarked"),
+                    ("EASY", "Easy"),
+                    ("MEDIUM", "Medium"),
+                    ("HARD", "Hard"),
+                ],
+                default="MEDIUM",
+                max_length=10,
+            ),
+        ),
+        migrations.CreateModel(
+            name="MarkdownNote",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("content", models.TextField(blank=True)),
+                (
+                    "question",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="markdown_notes",
+                        to="questions.question",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="markdown_notes",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="UserNote",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("content", models.TextField()),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "question",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="notes",
+                        to="questions.question",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="notes",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-created_at"],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-18 11:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("questions", "0003_alter_question_difficulty_markdownnote_usernote"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="dsasheet",
+            name="catalog_version",
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+    ]
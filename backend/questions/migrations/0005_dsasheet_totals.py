@@ -0,0 +1,48 @@
+# Generated by Django 5.1.7 on 2026-10-18 11:33
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def backfill_totals(apps, schema_editor):
+    DSASheet = apps.get_model("questions", "DSASheet")
+    Question = apps.get_model("questions", "Question")
+    for sheet_id in DSASheet.objects.values_list("id", flat=True):
+        totals = Question.objects.filter(topic__sheet_id=sheet_id).aggregate(
+            total_questions=Count("id"),
+            total_easy=Count("id", filter=Q(difficulty="EASY")),
+            total_medium=Count("id", filter=Q(difficulty="MEDIUM")),
+            total_hard=Count("id", filter=Q(difficulty="HARD")),
+        )
+        DSASheet.objects.filter(id=sheet_id).update(**totals)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("questions", "0004_dsasheet_catalog_version"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="dsasheet",
+            name="total_easy",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="dsasheet",
+            name="total_hard",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="dsasheet",
+            name="total_medium",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="dsasheet",
+            name="total_questions",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_totals, migrations.RunPython.noop),
+    ]
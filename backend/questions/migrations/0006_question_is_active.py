@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-18 11:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("questions", "0005_dsasheet_totals"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="question",
+            name="is_active",
+            field=models.BooleanField(default=True),
+        ),
+    ]
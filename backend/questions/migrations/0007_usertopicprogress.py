@@ -0,0 +1,84 @@
+# Generated by Django 5.1.7 on 2026-10-18 11:44
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_topic_progress(apps, schema_editor):
+    UserQuestionStatus = apps.get_model("questions", "UserQuestionStatus")
+    UserTopicProgress = apps.get_model("questions", "UserTopicProgress")
+    counts = (
+        UserQuestionStatus.objects.filter(status="SOLVED")
+        .values_list("user_id", "question__topic_id")
+        .order_by()
+        .annotate(n=Count("id"))
+    )
+    UserTopicProgress.objects.bulk_create(
+        (UserTopicProgress(user_id=user_id, topic_id=topic_id, solved_count=n) for user_id, topic_id, n in counts),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("questions", "0006_question_is_active"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UserTopicProgress",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("solved_count", models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="usersheetprogress",
+            index=models.Index(
+                fields=["sheet", "-solved_count", "user"],
+                name="sheet_progress_rank_idx",
+            ),
+        ),
+        migrations.AddField(
+            model_name="usertopicprogress",
+            name="topic",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="user_progress",
+                to="questions.topic",
+            ),
+        ),
+        migrations.AddField(
+            model_name="usertopicprogress",
+            name="user",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="topic_progress",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="usertopicprogress",
+            index=models.Index(
+                fields=["topic", "-solved_count", "user"],
+                name="topic_progress_rank_idx",
+            ),
+        ),
+        migrations.AlterUniqueTogether(
+            name="usertopicprogress",
+            unique_together={("user", "topic")},
+        ),
+        migrations.RunPython(backfill_topic_progress, migrations.RunPython.noop),
+    ]
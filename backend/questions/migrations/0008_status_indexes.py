@@ -0,0 +1,29 @@
+# Generated by Django 5.1.7 on 2026-10-18 11:48
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("questions", "0007_usertopicprogress"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="userquestionstatus",
+            index=models.Index(
+                fields=["user", "status", "question"], name="status_user_status_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="userquestionstatus",
+            index=models.Index(
+                condition=models.Q(("status", "SAVED")),
+                fields=["user", "question"],
+                name="status_saved_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.1.7 on 2026-10-18 11:54
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+# GIN indexes and tsvectors exist only on PostgreSQL; other databases search with icontains
+VECTOR_SQL = (
+    "setweight(to_tsvector('english', q.question), 'A') || "
+    "setweight(to_tsvector('english', t.name), 'B')"
+)
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS question_search_vector_gin "
+        "ON questions_question USING gin (search_vector)"
+    )
+    schema_editor.execute(
+        f"UPDATE questions_question q SET search_vector = {VECTOR_SQL} "
+        "FROM questions_topic t WHERE t.id = q.topic_id"
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS question_search_vector_gin")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("questions", "0008_status_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="question",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,150 @@
+# Generated by Django 5.1.7 on 2026-10-18 11:57
+
+import re
+from urllib.parse import urlsplit
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+# Frozen copies of questions.utils as of this migration, so later edits there don't change what it does
+LEETCODE_PROBLEM_PATH = re.compile(r"^/problems/([^/]+)")
+
+
+def leetcode_slug(link):
+    parts = urlsplit(link.strip().lower())
+    if parts.netloc.removeprefix("www.") != "leetcode.com":
+        return None
+    match = LEETCODE_PROBLEM_PATH.match(parts.path)
+    return match.group(1) if match else None
+
+
+def normalize_problem_link(link):
+    if not link or not link.strip():
+        return ""
+    slug = leetcode_slug(link)
+    if slug:
+        return f"leetcode.com/problems/{slug}"
+    parts = urlsplit(link.strip().lower())
+    return f"{parts.netloc.removeprefix('www.')}{parts.path.rstrip('/')}"
+
+
+SOLVED_COUNTERS = {"EASY": "solved_easy", "MEDIUM": "solved_medium", "HARD": "solved_hard"}
+
+
+def link_problems(apps, schema_editor):
+    Problem = apps.get_model("questions", "Problem")
+    Question = apps.get_model("questions", "Question")
+    UserQuestionStatus = apps.get_model("questions", "UserQuestionStatus")
+    UserSheetProgress = apps.get_model("questions", "UserSheetProgress")
+    UserTopicProgress = apps.get_model("questions", "UserTopicProgress")
+
+    questions = list(Question.objects.only("id", "question", "link").order_by("id"))
+    keys = {}
+    for question in questions:
+        key = normalize_problem_link(question.link)
+        if key:
+            keys.setdefault(key, (question.question, leetcode_slug(question.link)))
+    Problem.objects.bulk_create(
+        [Problem(key=key, title=title, slug=slug) for key, (title, slug) in keys.items()],
+        batch_size=500,
+    )
+    problem_ids = dict(Problem.objects.values_list("key", "id"))
+    for question in questions:
+        question.problem_id = problem_ids.get(normalize_problem_link(question.link))
+    Question.objects.bulk_update(questions, ["problem"], batch_size=500)
+    UserQuestionStatus.objects.update(
+        problem_id=Subquery(Question.objects.filter(pk=OuterRef("question_id")).values("problem_id")[:1])
+    )
+
+    # Solves now count in every sheet holding the same problem; scores are unchanged
+    solved = UserQuestionStatus.objects.filter(status="SOLVED")
+    rows = set(solved.values_list(
+        "user_id", "question_id", "question__topic_id", "question__topic__sheet_id", "question__difficulty",
+    )) | set(solved.filter(problem__isnull=False).values_list(
+        "user_id", "problem__questions__id", "problem__questions__topic_id",
+        "problem__questions__topic__sheet_id", "problem__questions__difficulty",
+    ))
+    sheets, topics = {}, {}
+    for user_id, _, topic_id, sheet_id, difficulty in rows:
+        counters = sheets.setdefault((user_id, sheet_id), {"solved_count": 0})
+        counters["solved_count"] += 1
+        counter = SOLVED_COUNTERS.get(difficulty)
+        if counter:
+            counters[counter] = counters.get(counter, 0) + 1
+        topics[(user_id, topic_id)] = topics.get((user_id, topic_id), 0) + 1
+
+    UserSheetProgress.objects.all().delete()
+    UserTopicProgress.objects.all().delete()
+    UserSheetProgress.objects.bulk_create(
+        [UserSheetProgress(user_id=u, sheet_id=s, **c) for (u, s), c in sheets.items()], batch_size=500
+    )
+    UserTopicProgress.objects.bulk_create(
+        [UserTopicProgress(user_id=u, topic_id=t, solved_count=n) for (u, t), n in topics.items()], batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("questions", "0009_question_search_vector"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Problem",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("key", models.CharField(max_length=255, unique=True)),
+                (
+                    "slug",
+                    models.CharField(
+                        blank=True, db_index=True, max_length=255, null=True
+                    ),
+                ),
+                ("title", models.CharField(max_length=255)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="question",
+            name="problem",
+            field=models.ForeignKey(
+                blank=True,
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="questions",
+                to="questions.problem",
+            ),
+        ),
+        migrations.AddField(
+            model_name="userquestionstatus",
+            name="problem",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="user_statuses",
+                to="questions.problem",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="userquestionstatus",
+            index=models.Index(
+                condition=models.Q(("status", "SOLVED")),
+                fields=["user", "problem"],
+                name="status_solved_problem_idx",
+            ),
+        ),
+        migrations.RunPython(link_problems, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.1.7 on 2026-10-18 12:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("questions", "0010_problem"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LeetCodeProblem",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("slug", models.CharField(max_length=255, unique=True)),
+                ("title", models.CharField(max_length=255)),
+                ("content_text", models.TextField()),
+                ("code_snippets", models.JSONField(default=dict)),
+                ("fetched_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
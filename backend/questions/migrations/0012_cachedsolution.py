@@ -0,0 +1,36 @@
+# Generated by Django 5.1.7 on 2026-10-18 12:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("questions", "0011_leetcodeproblem"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CachedSolution",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("slug", models.CharField(max_length=255)),
+                ("language", models.CharField(max_length=50)),
+                ("prompt_hash", models.CharField(max_length=64)),
+                ("config_hash", models.CharField(max_length=64)),
+                ("chunks", models.JSONField(default=list)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "unique_together": {("slug", "language", "prompt_hash", "config_hash")},
+            },
+        ),
+    ]
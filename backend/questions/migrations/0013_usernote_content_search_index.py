@@ -0,0 +1,30 @@
+# Generated by Django 5.1.7 on 2026-10-18 14:10
+
+from django.db import migrations
+
+
+# Matches the SearchVector('content', config='english') expression UserNoteAdmin searches with
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS usernote_content_search_gin ON questions_usernote "
+        "USING gin (to_tsvector('english'::regconfig, COALESCE(content, '')))"
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS usernote_content_search_gin")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("questions", "0012_cachedsolution"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
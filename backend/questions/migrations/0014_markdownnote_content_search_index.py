@@ -0,0 +1,30 @@
+# Generated by Django 5.1.7 on 2026-10-18 15:40
+
+from django.db import migrations
+
+
+# Matches the SearchVector('content', config='english') expression question search filters notes with
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS markdownnote_content_search_gin ON questions_markdownnote "
+        "USING gin (to_tsvector('english'::regconfig, COALESCE(content, '')))"
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS markdownnote_content_search_gin")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("questions", "0013_usernote_content_search_index"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -1,4 +1,6 @@
 from django.db import models
+from django.contrib.postgres.search import SearchVectorField
+from django.db.models import Q
 from users.models import CustomUser
 
 DIFFICULTY_CHOICES = [
@@ -26,6 +28,15 @@ class DSASheet(models.Model):
     image = models.ImageField(upload_to='sheet_images/', blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # Bumped whenever the sheet's topics or questions change; keys the catalog cache
+    catalog_version = models.PositiveIntegerField(default=1, editable=False)
+
+    # Denormalized question totals, kept in sync by questions.catalog.refresh_sheet_totals
+    total_questions = models.PositiveIntegerField(default=0, editable=False)
+    total_easy = models.PositiveIntegerField(default=0, editable=False)
+    total_medium = models.PositiveIntegerField(default=0, editable=False)
+    total_hard = models.PositiveIntegerField(default=0, editable=False)
+
     def __str__(self):
         return self.name
 
@@ -41,13 +52,62 @@ class Topic(models.Model):
         return f"{self.name} ({self.sheet.name})"
 
 
+# One row per distinct problem across all sheets, e.g. Two Sum in Blind 75 and NeetCode
+class Problem(models.Model):
+    # questions.utils.normalize_problem_link of the problem URL
+    key = models.CharField(max_length=255, unique=True)
+    slug = models.CharField(max_length=255, blank=True, null=True, db_index=True)
+    title = models.CharField(max_length=255)
+
+    def __str__(self):
+        return self.title
+
+
+# Problem statements fetched from LeetCode's GraphQL API, kept by questions/leetcode.py
+class LeetCodeProblem(models.Model):
+    slug = models.CharField(max_length=255, unique=True)
+    title = models.CharField(max_length=255)
+    # questions.utils.extract_formatted_text of the problem HTML
+    content_text = models.TextField()
+    # {language name: starter code}, e.g. {"C++": "class Solution {...}"}
+    code_snippets = models.JSONField(default=dict)
+    fetched_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.title
+
+
+# Complete AI solution streams, replayed by questions/solutions.py instead of calling Gemini again
+class CachedSolution(models.Model):
+    slug = models.CharField(max_length=255)
+    language = models.CharField(max_length=50)
+    # Hashes of the prompt template and of the model plus generation config that produced it
+    prompt_hash = models.CharField(max_length=64)
+    config_hash = models.CharField(max_length=64)
+    # The streamed text chunks, in order
+    chunks = models.JSONField(default=list)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('slug', 'language', 'prompt_hash', 'config_hash')
+
+    def __str__(self):
+        return f"{self.slug} ({self.language})"
+
+
 class Question(models.Model):
     topic = models.ForeignKey(Topic, on_delete=models.CASCADE, related_name='questions')
+    # Questions sharing a problem share their SOLVED status; kept by questions/problems.py
+    problem = models.ForeignKey(Problem, on_delete=models.SET_NULL, null=True, blank=True, editable=False, related_name='questions')
     question = models.CharField(max_length=255)
     link = models.URLField()
     solution = models.URLField(blank=True, null=True)
     platform = models.CharField(max_length=100)
     difficulty = models.CharField(max_length=10, choices=DIFFICULTY_CHOICES, default="MEDIUM")
+    # Retired questions drop out of the sheet but keep their user statuses and notes
+    is_active = models.BooleanField(default=True)
+    # Weighted tsvector of the question text and topic name, kept by questions/search.py (PostgreSQL only)
+    search_vector = SearchVectorField(null=True, editable=False)
 
     def get_score(self):
         return SCORE_MAPPING.get(self.difficulty, 10)
@@ -61,9 +121,20 @@ class UserQuestionStatus(models.Model):
     question = models.ForeignKey(Question, on_delete=models.CASCADE, related_name='user_statuses')
     status = models.CharField(max_length=10, choices=STATUS_CHOICES)
     updated_at = models.DateTimeField(auto_now=True)
+    # Copy of question.problem, so status overlays never join the question table
+    problem = models.ForeignKey(Problem, on_delete=models.SET_NULL, null=True, blank=True, related_name='user_statuses')
 
     class Meta:
+        # Also serves (user, question, status) existence probes and user-only filters
         unique_together = ('user', 'question', 'status')
+        indexes = [
+            # (user, status) scans, returning question ids from the index alone
+            models.Index(fields=['user', 'status', 'question'], name='status_user_status_idx'),
+            # Saved-questions listing; SAVED rows are a small share of the table
+            models.Index(fields=['user', 'question'], condition=Q(status='SAVED'), name='status_saved_idx'),
+            # "Has the user solved this problem in any sheet?"
+            models.Index(fields=['user', 'problem'], condition=Q(status='SOLVED'), name='status_solved_problem_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.display_name} - {self.question.question} ({self.status})"
@@ -80,11 +151,31 @@ class UserSheetProgress(models.Model):
 
     class Meta:
         unique_together = ('user', 'sheet')
+        indexes = [
+            # Per-sheet leaderboard: ORDER BY solved_count DESC within a sheet
+            models.Index(fields=['sheet', '-solved_count', 'user'], name='sheet_progress_rank_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.display_name} - {self.sheet.name} Progress"
 
 
+class UserTopicProgress(models.Model):
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='topic_progress')
+    topic = models.ForeignKey(Topic, on_delete=models.CASCADE, related_name='user_progress')
+
+    solved_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('user', 'topic')
+        indexes = [
+            models.Index(fields=['topic', '-solved_count', 'user'], name='topic_progress_rank_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.display_name} - {self.topic.name} Progress"
+
+
 class UserNote(models.Model):
     user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='notes')
     question = models.ForeignKey(Question, on_delete=models.CASCADE, related_name='notes')
@@ -0,0 +1,173 @@
+import heapq
+import re
+import zipfile
+
+from django.db.models import OuterRef, Subquery, TextField, Value
+from django.db.models.functions import Coalesce
+
+from .models import MarkdownNote, Question, UserNote
+
+EXPORT_CHUNK_SIZE = 500
+
+
+def questions_with_notes(user, **filters):
+    """
+    Questions matching filters, each annotated with 'content': the user's markdown note, or '' if none.
+
+    One query. The note comes from a correlated subquery taking the user's
+    first note on the question, since (user, question) is not unique.
+    """
+    note = MarkdownNote.objects.filter(user=user, question=OuterRef('pk')).order_by('pk').values('content')[:1]
+    return (
+        Question.objects.filter(**filters)
+        .annotate(content=Coalesce(Subquery(note), Value(''), output_field=TextField()))
+        .order_by('id')
+    )
+
+
+def iter_sheet_notes(user, sheet_id, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Stream a user's markdown notes for one sheet, ordered by topic then question.
+
+    Rows are fetched chunk_size at a time, so memory stays flat however
+    many notes the user has.
+
+    Yields:
+        dict: {'topic_id', 'topic', 'question_id', 'question', 'link', 'content'}
+    """
+    rows = (
+        MarkdownNote.objects.filter(user=user, question__topic__sheet_id=sheet_id)
+        .order_by('question__topic_id', 'question_id', 'pk')
+        .values_list(
+            'question__topic_id', 'question__topic__name',
+            'question_id', 'question__question', 'question__link', 'content',
+        )
+        .iterator(chunk_size=chunk_size)
+    )
+
+    previous = None
+    for topic_id, topic, question_id, question, link, content in rows:
+        # Only the first note per question, as questions_with_notes shows
+        if question_id == previous:
+            continue
+        previous = question_id
+        yield {
+            'topic_id': topic_id,
+            'topic': topic,
+            'question_id': question_id,
+            'question': question,
+            'link': link,
+            'content': content,
+        }
+
+
+_NOTE_FIELDS = (
+    'question__topic__sheet_id', 'question__topic__sheet__name',
+    'question__topic_id', 'question__topic__name',
+    'question_id', 'question__question', 'question__link',
+    'pk', 'content',
+)
+_NOTE_ORDER = ('question__topic__sheet_id', 'question__topic_id', 'question_id', 'pk')
+
+MARKDOWN_NOTE, USER_NOTE = 0, 1
+
+
+def _note_rows(queryset, kind, chunk_size, *extra):
+    rows = queryset.order_by(*_NOTE_ORDER).values_list(*_NOTE_FIELDS, *extra).iterator(chunk_size=chunk_size)
+    for row in rows:
+        yield (*row[:7], kind, *row[7:])
+
+
+def iter_user_notes(user, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Stream all of a user's markdown notes and plain notes across every sheet.
+
+    Both tables are read with server-side cursors in (sheet, topic, question)
+    order and merged lazily, so only one chunk per table is in memory.
+
+    Yields:
+        tuple: (sheet_id, sheet, topic_id, topic, question_id, question, link, kind, pk, content, created_at),
+            kind being MARKDOWN_NOTE (created_at None) or USER_NOTE. Markdown notes come first per question.
+    """
+    markdown = (
+        (*row, None)
+        for row in _note_rows(MarkdownNote.objects.filter(user=user), MARKDOWN_NOTE, chunk_size)
+    )
+    notes = _note_rows(UserNote.objects.filter(user=user), USER_NOTE, chunk_size, 'created_at')
+    return heapq.merge(markdown, notes, key=lambda row: (row[0], row[2], row[4], row[7], row[8]))
+
+
+class _StreamBuffer:
+    """
+    Write-only file object for zipfile: collects the bytes it writes until the response drains them.
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _archive_name(text):
+    return re.sub(r'[^\w\-. ()]+', '_', text).strip() or 'untitled'
+
+
+def iter_notes_zip(user, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Stream a ZIP of the user's notes with one Markdown file per topic, named "<sheet>/<topic>.md".
+
+    Compressed bytes are yielded as each question is written. The archive
+    is never held in memory, and neither are the notes.
+
+    Yields:
+        bytes
+    """
+    buffer = _StreamBuffer()
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        entry, names = None, set()
+        topic_id = question_id = None
+
+        for sheet_id, sheet, t_id, topic, q_id, question, link, kind, _, content, created_at in iter_user_notes(user, chunk_size):
+            if t_id != topic_id:
+                if entry is not None:
+                    entry.close()
+                name = f"{_archive_name(sheet)}/{_archive_name(topic)}.md"
+                if name in names:
+                    name = f"{_archive_name(sheet)}/{_archive_name(topic)} ({t_id}).md"
+                names.add(name)
+
+                entry = archive.open(name, 'w')
+                entry.write(f"# {topic} ({sheet})\n".encode())
+                topic_id, question_id = t_id, None
+
+            text = []
+            if q_id != question_id:
+                text.append(f"\n## [{question}]({link})\n" if link else f"\n## {question}\n")
+                question_id, wrote_notes_heading = q_id, False
+            if kind == MARKDOWN_NOTE:
+                text.append(f"\n{content.strip()}\n")
+            else:
+                if not wrote_notes_heading:
+                    text.append("\n### Notes\n\n")
+                    wrote_notes_heading = True
+                body = content.strip().replace("\n", "\n  ")
+                text.append(f"- {created_at:%Y-%m-%d}: {body}\n")
+            entry.write("".join(text).encode())
+
+            chunk = buffer.drain()
+            if chunk:
+                yield chunk
+
+        if entry is not None:
+            entry.close()
+    yield buffer.drain()
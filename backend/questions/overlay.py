@@ -0,0 +1,105 @@
+from django.db.models import Q
+
+from .models import UserQuestionStatus
+
+# Catalog keys that are not part of API responses
+_INTERNAL_KEYS = ('problem_id',)
+
+
+def _public(question):
+    return {key: value for key, value in question.items() if key not in _INTERNAL_KEYS}
+
+
+class StatusOverlay:
+    """
+    A user's SAVED and SOLVED question ids, plus the problems they solved.
+
+    Loaded with a single query so serializers can answer per-question
+    status with set lookups instead of one query per question. SOLVED is
+    projected across sheets: a question counts as solved when its problem
+    was solved through any question.
+    """
+
+    def __init__(self, saved=(), solved=(), first_status=None, solved_problems=()):
+        self.saved = set(saved)
+        self.solved = set(solved)
+        # question id -> the status row created first, as UserQuestionStatus.first() would return
+        self.first_status = first_status or {}
+        self.solved_problems = set(solved_problems)
+
+    @classmethod
+    def for_user(cls, user, sheet_id=None):
+        """
+        Load the user's statuses, optionally restricted to one sheet.
+
+        Without a sheet the query stays on the status table alone; callers
+        that already hold the sheet's question ids (e.g. a cached catalog)
+        only ever probe the sets with those ids.
+        """
+        if not user or not user.is_authenticated:
+            return cls()
+
+        rows = UserQuestionStatus.objects.filter(user=user)
+        if sheet_id is not None:
+            # Plus solves made in other sheets of problems this sheet lists
+            rows = rows.filter(
+                Q(question__topic__sheet_id=sheet_id)
+                | Q(status="SOLVED", problem__questions__topic__sheet_id=sheet_id)
+            ).distinct()
+
+        saved, solved, first_status, solved_problems = set(), set(), {}, set()
+        for question_id, problem_id, status in rows.order_by('pk').values_list('question_id', 'problem_id', 'status'):
+            first_status.setdefault(question_id, status)
+            if status == "SAVED":
+                saved.add(question_id)
+            elif status == "SOLVED":
+                solved.add(question_id)
+                if problem_id is not None:
+                    solved_problems.add(problem_id)
+        return cls(saved, solved, first_status, solved_problems)
+
+    def is_saved(self, question_id):
+        return question_id in self.saved
+
+    def is_solved(self, question_id, problem_id=None):
+        return question_id in self.solved or (problem_id is not None and problem_id in self.solved_problems)
+
+    def user_status(self, question_id, problem_id=None):
+        status = self.first_status.get(question_id)
+        if status is None and self.is_solved(question_id, problem_id):
+            return "SOLVED"
+        return status
+
+    def apply(self, catalog):
+        """
+        Merge this overlay into a cached sheet catalog without mutating it.
+        """
+        return [
+            {
+                **topic,
+                'questions': [
+                    {
+                        **_public(q),
+                        'is_saved': q['id'] in self.saved,
+                        'is_solved': self.is_solved(q['id'], q.get('problem_id')),
+                    }
+                    for q in topic['questions']
+                ],
+            }
+            for topic in catalog
+        ]
+
+    def apply_user_status(self, catalog):
+        """
+        Merge this overlay into a cached sheet catalog as a single 'user_status' per question.
+        """
+        return [
+            {
+                **topic,
+                'questions': [
+                    {**_public(q), 'user_status': self.user_status(q['id'], q.get('problem_id'))}
+                    for q in topic['questions']
+                ],
+            }
+            for topic in catalog
+        ]
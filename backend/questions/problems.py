@@ -0,0 +1,83 @@
+from django.db.models import OuterRef, Subquery
+
+from .models import Problem, Question, UserQuestionStatus
+from .utils import leetcode_slug, normalize_problem_link
+
+
+def resolve_problem_ids(questions, create=True):
+    """
+    Look up (and optionally create) the canonical Problem of each question by its normalized link.
+
+    Args:
+        questions (iterable): Question instances, saved or not. Only link and question are read.
+        create (bool): Create Problems for links seen for the first time.
+
+    Returns:
+        dict: {normalized link: problem id}. Links without a problem (empty, or
+            new with create=False) are absent.
+    """
+    titles = {}
+    for question in questions:
+        key = normalize_problem_link(question.link)
+        if key:
+            titles.setdefault(key, (question.question, leetcode_slug(question.link)))
+    if not titles:
+        return {}
+
+    problem_ids = dict(Problem.objects.filter(key__in=titles).values_list('key', 'id'))
+    missing = [key for key in titles if key not in problem_ids]
+    if create and missing:
+        Problem.objects.bulk_create(
+            [Problem(key=key, title=titles[key][0], slug=titles[key][1]) for key in missing],
+            ignore_conflicts=True,
+        )
+        problem_ids.update(Problem.objects.filter(key__in=missing).values_list('key', 'id'))
+    return problem_ids
+
+
+def problem_id_for(question, problem_ids):
+    return problem_ids.get(normalize_problem_link(question.link))
+
+
+def sync_status_problems(question_ids):
+    """
+    Copy questions' current problem onto their user statuses after it changed.
+    """
+    UserQuestionStatus.objects.filter(question_id__in=question_ids).update(
+        problem_id=Subquery(Question.objects.filter(pk=OuterRef('question_id')).values('problem_id')[:1])
+    )
+
+
+def attach_problem(question):
+    """
+    Point one saved question at its canonical problem, e.g. after its link was edited.
+
+    Returns:
+        set: The old and new problem ids if the problem changed, else an empty set.
+    """
+    problem_id = problem_id_for(question, resolve_problem_ids([question]))
+    if problem_id == question.problem_id:
+        return set()
+    affected = {question.problem_id, problem_id} - {None}
+    Question.objects.filter(pk=question.pk).update(problem_id=problem_id)
+    question.problem_id = problem_id
+    sync_status_problems([question.pk])
+    return affected
+
+
+def projected_questions(questions):
+    """
+    Expand questions to every active question sharing their problems, in any sheet.
+
+    Questions without a problem stand alone. Retired questions are left out,
+    as they are from sheet totals. Each question appears once.
+
+    Returns:
+        list: Question instances with topic loaded.
+    """
+    problem_ids = {q.problem_id for q in questions if q.problem_id is not None}
+    expanded = {q.pk: q for q in questions if q.problem_id is None and q.is_active}
+    if problem_ids:
+        for question in Question.objects.select_related('topic').filter(problem_id__in=problem_ids, is_active=True):
+            expanded.setdefault(question.pk, question)
+    return list(expanded.values())
@@ -0,0 +1,402 @@
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.db.models.functions import Greatest
+
+from users.leaderboard import record_score_change
+from users.models import CustomUser
+from users.utils import calculate_rank
+from .catalog import get_max_score
+from .problems import projected_questions
+from .models import DSASheet, Question, Topic, UserQuestionStatus, UserSheetProgress, UserTopicProgress
+
+
+def backfill_progress_rows():
+    """
+    Insert an empty UserSheetProgress row for every (user, sheet) pair that lacks one.
+
+    Progress rows are otherwise created lazily on a user's first solve in a
+    sheet, and readers treat a missing row as zero. This runs as a single
+    INSERT ... SELECT, so the database does the users x sheets walk. The
+    NOT EXISTS skips pairs that already have a row, and ON CONFLICT covers
+    rows a concurrent first solve inserts while the statement runs.
+
+    Returns:
+        int: Number of rows inserted.
+    """
+    qn = connection.ops.quote_name
+    progress = qn(UserSheetProgress._meta.db_table)
+    users = qn(CustomUser._meta.db_table)
+    sheets = qn(DSASheet._meta.db_table)
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {progress} (user_id, sheet_id, solved_count, solved_easy, solved_medium, solved_hard) "
+            f"SELECT u.id, s.id, 0, 0, 0, 0 FROM {users} u CROSS JOIN {sheets} s "
+            f"WHERE NOT EXISTS (SELECT 1 FROM {progress} p WHERE p.user_id = u.id AND p.sheet_id = s.id) "
+            f"ON CONFLICT (user_id, sheet_id) DO NOTHING"
+        )
+        return cursor.rowcount
+
+
+SOLVED_COUNTERS = {
+    "EASY": "solved_easy",
+    "MEDIUM": "solved_medium",
+    "HARD": "solved_hard",
+}
+
+STATUS_ACTIONS = {
+    "solve": ("SOLVED", True),
+    "unsolve": ("SOLVED", False),
+    "save": ("SAVED", True),
+    "unsave": ("SAVED", False),
+}
+
+MAX_BATCH_OPERATIONS = 500
+
+
+def _lock_user(user_id):
+    """
+    Take the user's row lock for the rest of the transaction.
+
+    Every path that changes a user's SOLVED statuses locks the user first,
+    so status reads made under the lock are authoritative and concurrent
+    single and batch updates queue up instead of deadlocking.
+    """
+    CustomUser.objects.select_for_update().filter(pk=user_id).values_list('pk', flat=True).get()
+
+
+def _progress_deltas(solved=(), unsolved=()):
+    """
+    Sum progress counter deltas for newly solved (+1) and unsolved (-1) questions.
+
+    Returns:
+        tuple: ({sheet_id: {UserSheetProgress field: delta}}, {topic_id: solved_count delta})
+    """
+    sheet_deltas, topic_deltas = {}, {}
+    for questions, sign in ((solved, 1), (unsolved, -1)):
+        for question in questions:
+            counters = sheet_deltas.setdefault(question.topic.sheet_id, {})
+            counters['solved_count'] = counters.get('solved_count', 0) + sign
+            counter = SOLVED_COUNTERS.get(question.difficulty)
+            if counter:
+                counters[counter] = counters.get(counter, 0) + sign
+            topic_deltas[question.topic_id] = topic_deltas.get(question.topic_id, 0) + sign
+    return sheet_deltas, topic_deltas
+
+
+def _apply_progress_deltas(user_id, deltas):
+    """
+    Apply sheet and topic counter deltas with F() updates, creating missing rows and flooring at zero.
+    """
+    sheet_deltas, topic_deltas = deltas
+    sheet_deltas = {
+        sheet_id: {name: delta for name, delta in counters.items() if delta}
+        for sheet_id, counters in sheet_deltas.items()
+    }
+    sheet_deltas = {sheet_id: counters for sheet_id, counters in sheet_deltas.items() if counters}
+    topic_deltas = {topic_id: delta for topic_id, delta in topic_deltas.items() if delta}
+
+    UserSheetProgress.objects.bulk_create(
+        [UserSheetProgress(user_id=user_id, sheet_id=sheet_id) for sheet_id in sheet_deltas],
+        ignore_conflicts=True,
+    )
+    for sheet_id, counters in sheet_deltas.items():
+        UserSheetProgress.objects.filter(user_id=user_id, sheet_id=sheet_id).update(
+            **{name: Greatest(F(name) + delta, 0) for name, delta in counters.items()}
+        )
+
+    UserTopicProgress.objects.bulk_create(
+        [UserTopicProgress(user_id=user_id, topic_id=topic_id) for topic_id in topic_deltas],
+        ignore_conflicts=True,
+    )
+    # Topics sharing a delta (usually +1 or -1) are updated together
+    topics_by_delta = {}
+    for topic_id, delta in topic_deltas.items():
+        topics_by_delta.setdefault(delta, []).append(topic_id)
+    for delta, topic_ids in topics_by_delta.items():
+        UserTopicProgress.objects.filter(user_id=user_id, topic_id__in=topic_ids).update(
+            solved_count=Greatest(F('solved_count') + delta, 0)
+        )
+
+
+def _apply_score_delta(user_id, delta):
+    """
+    Shift a user's score by delta (floored at zero), recompute their rank
+    and move them on the leaderboard.
+
+    Callers hold the user's row lock, so the score read first is exact and
+    the rank written matches the new score.
+    """
+    users = CustomUser.objects.filter(pk=user_id)
+    old_score = users.values_list('score', flat=True).get()
+    score = max(old_score + delta, 0)
+    users.update(score=Greatest(F('score') + delta, 0), rank=calculate_rank(score, get_max_score()))
+    record_score_change(old_score, score)
+
+
+def solved_question_rows(user_ids, sheet_ids):
+    """
+    Every active question in these sheets each user has solved, directly or
+    through a shared problem solved in another sheet.
+
+    Two queries, each a single join from the status table.
+
+    Returns:
+        set: {(user_id, question_id, topic_id, sheet_id, difficulty)}
+    """
+    solved = UserQuestionStatus.objects.filter(user_id__in=user_ids, status="SOLVED")
+    direct = solved.filter(question__topic__sheet_id__in=sheet_ids, question__is_active=True).values_list(
+        'user_id', 'question_id', 'question__topic_id', 'question__topic__sheet_id', 'question__difficulty',
+    )
+    shared = solved.filter(
+        problem__questions__topic__sheet_id__in=sheet_ids, problem__questions__is_active=True,
+    ).values_list(
+        'user_id', 'problem__questions__id', 'problem__questions__topic_id',
+        'problem__questions__topic__sheet_id', 'problem__questions__difficulty',
+    )
+    return set(direct) | set(shared)
+
+
+def _excluding(keys, column):
+    """
+    A Q matching none of these (user_id, <column>) pairs, grouped by user.
+    """
+    grouped = {}
+    for user_id, other_id in keys:
+        grouped.setdefault(user_id, []).append(other_id)
+    excluded = Q()
+    for user_id, other_ids in grouped.items():
+        excluded |= Q(user_id=user_id, **{f'{column}__in': other_ids})
+    return ~excluded if grouped else Q()
+
+
+def recompute_progress(user_ids, topic_ids):
+    """
+    Recount some users' progress in some topics, and in the sheets holding those topics.
+
+    Needed when questions gain or change problems, which moves solves
+    between sheets without any solve/unsolve call. Non-zero counts are
+    upserted, one statement per table; existing rows in scope that dropped
+    to zero are reset by one UPDATE per table, and no zero rows are created,
+    since readers treat a missing row as zero. Scores are left alone.
+    """
+    user_ids, topic_ids = sorted(set(user_ids)), set(topic_ids)
+    if not user_ids or not topic_ids:
+        return
+
+    with transaction.atomic():
+        # Every lock in one statement, in the same pk order as the batch path
+        list(CustomUser.objects.select_for_update().filter(pk__in=user_ids).order_by('pk').values_list('pk', flat=True))
+
+        sheet_ids = set(Topic.objects.filter(id__in=topic_ids).values_list('sheet_id', flat=True))
+        sheets, topics = {}, {}
+        for user_id, _, topic_id, sheet_id, difficulty in solved_question_rows(user_ids, sheet_ids):
+            counters = sheets.setdefault(
+                (user_id, sheet_id), {'solved_count': 0, **dict.fromkeys(SOLVED_COUNTERS.values(), 0)}
+            )
+            counters['solved_count'] += 1
+            counter = SOLVED_COUNTERS.get(difficulty)
+            if counter:
+                counters[counter] += 1
+            if topic_id in topic_ids:
+                topics[(user_id, topic_id)] = topics.get((user_id, topic_id), 0) + 1
+
+        UserSheetProgress.objects.filter(user_id__in=user_ids, sheet_id__in=sheet_ids).filter(
+            _excluding(sheets, 'sheet_id')
+        ).update(solved_count=0, **dict.fromkeys(SOLVED_COUNTERS.values(), 0))
+        UserTopicProgress.objects.filter(user_id__in=user_ids, topic_id__in=topic_ids).filter(
+            _excluding(topics, 'topic_id')
+        ).update(solved_count=0)
+
+        UserSheetProgress.objects.bulk_create(
+            [
+                UserSheetProgress(user_id=user_id, sheet_id=sheet_id, **counters)
+                for (user_id, sheet_id), counters in sheets.items()
+            ],
+            update_conflicts=True,
+            unique_fields=['user', 'sheet'],
+            update_fields=['solved_count', *SOLVED_COUNTERS.values()],
+        )
+        UserTopicProgress.objects.bulk_create(
+            [
+                UserTopicProgress(user_id=user_id, topic_id=topic_id, solved_count=count)
+                for (user_id, topic_id), count in topics.items()
+            ],
+            update_conflicts=True,
+            unique_fields=['user', 'topic'],
+            update_fields=['solved_count'],
+        )
+
+
+def recompute_progress_for_problems(problem_ids, question_ids=()):
+    """
+    Recount progress wherever these problems or questions are listed, for every user who solved one of them.
+
+    Args:
+        problem_ids (iterable): Problems whose set of questions changed.
+        question_ids (iterable): Questions that moved between problems, lost
+            their problem, or were retired or reactivated.
+    """
+    problem_ids = [problem_id for problem_id in problem_ids if problem_id is not None]
+    question_ids = list(question_ids)
+    if not problem_ids and not question_ids:
+        return
+    # The questions' own problems too, so solves recorded against another copy are found
+    problems = (
+        Question.objects.filter(Q(problem_id__in=problem_ids) | Q(id__in=question_ids))
+        .exclude(problem=None).values('problem_id')
+    )
+    recompute_progress(
+        UserQuestionStatus.objects.filter(status="SOLVED")
+        .filter(Q(problem_id__in=problems) | Q(question_id__in=question_ids))
+        .values_list('user_id', flat=True).distinct(),
+        Question.objects.filter(Q(problem_id__in=problems) | Q(id__in=question_ids))
+        .values_list('topic_id', flat=True).distinct(),
+    )
+
+
+def _solved_rows(user, question):
+    """
+    The user's SOLVED rows for the question's problem, in any sheet, or for
+    the question itself when it has no problem.
+    """
+    rows = UserQuestionStatus.objects.filter(user=user, status="SOLVED")
+    if question.problem_id is not None:
+        return rows.filter(problem_id=question.problem_id)
+    return rows.filter(question=question)
+
+
+def _solve_key(question):
+    return ('problem', question.problem_id) if question.problem_id is not None else ('question', question.pk)
+
+
+def solve_question(user, question):
+    """
+    Mark a question's problem solved and credit the user's score and progress.
+
+    A problem is solved once across all sheets: the SOLVED row is stored on
+    this question, and progress is credited in every sheet and topic that
+    lists the same problem. Runs as one transaction with F() updates, so
+    concurrent requests for the same user never lose increments and a
+    problem is only credited once.
+
+    Returns:
+        bool: True if the problem was newly solved.
+    """
+    with transaction.atomic():
+        _lock_user(user.pk)
+        if _solved_rows(user, question).exists():
+            return False
+        UserQuestionStatus.objects.create(user=user, question=question, status="SOLVED", problem_id=question.problem_id)
+
+        _apply_score_delta(user.pk, question.get_score())
+        _apply_progress_deltas(user.pk, _progress_deltas(solved=projected_questions([question])))
+    return True
+
+
+def unsolve_question(user, question):
+    """
+    Clear the SOLVED status of a question's problem in every sheet and take back its score and progress.
+
+    Returns:
+        bool: True if the problem had been solved.
+    """
+    with transaction.atomic():
+        _lock_user(user.pk)
+        rows = list(_solved_rows(user, question).select_related('question'))
+        if not rows:
+            return False
+        UserQuestionStatus.objects.filter(id__in=[row.id for row in rows]).delete()
+
+        # Each row was credited with its own question's score when it was solved
+        _apply_score_delta(user.pk, -sum(row.question.get_score() for row in rows))
+        _apply_progress_deltas(user.pk, _progress_deltas(unsolved=projected_questions([question])))
+    return True
+
+
+def apply_status_operations(user, operations):
+    """
+    Apply a batch of solve/unsolve/save/unsave operations for one user.
+
+    Questions are resolved in one query and operations are replayed in
+    order against the user's current statuses in memory, with SOLVED
+    tracked per problem as in solve_question. Only the net change is
+    written: one bulk insert, at most one delete per status, and one
+    aggregated score and progress update, all in a single transaction.
+
+    Args:
+        user (CustomUser): The user whose statuses change.
+        operations (list): (question_id, action) pairs.
+
+    Returns:
+        list: One result dict per operation, in order: {'question_id', 'action', 'success',
+            and either 'changed' or 'error'}.
+    """
+    question_ids = {question_id for question_id, action in operations if action in STATUS_ACTIONS}
+    questions = Question.objects.select_related('topic').in_bulk(question_ids)
+    problem_ids = {q.problem_id for q in questions.values() if q.problem_id is not None}
+
+    results = []
+    with transaction.atomic():
+        _lock_user(user.pk)
+        initial_saved = set(
+            UserQuestionStatus.objects.filter(user=user, status="SAVED", question_id__in=questions)
+            .values_list('question_id', flat=True)
+        )
+        solved_rows = {}
+        for row in (
+            UserQuestionStatus.objects.filter(user=user, status="SOLVED")
+            .filter(Q(question_id__in=questions) | Q(problem_id__in=problem_ids))
+            .select_related('question')
+        ):
+            key = ('problem', row.problem_id) if row.problem_id is not None else ('question', row.question_id)
+            solved_rows.setdefault(key, []).append(row)
+
+        saved, solved = set(initial_saved), set(solved_rows)
+        # solve key -> the question whose operation last changed it
+        changed_by = {}
+
+        for question_id, action in operations:
+            result = {'question_id': question_id, 'action': action}
+            results.append(result)
+            if action not in STATUS_ACTIONS:
+                result.update(success=False, error="Invalid action")
+                continue
+            if question_id not in questions:
+                result.update(success=False, error="Question not found")
+                continue
+
+            status, present = STATUS_ACTIONS[action]
+            current, key = (saved, question_id) if status == "SAVED" else (solved, _solve_key(questions[question_id]))
+            result.update(success=True, changed=(key in current) != present)
+            if (key in current) != present and status == "SOLVED":
+                changed_by[key] = questions[question_id]
+            if present:
+                current.add(key)
+            else:
+                current.discard(key)
+
+        newly_solved = [changed_by[key] for key in solved - set(solved_rows)]
+        unsolved_rows = [row for key in set(solved_rows) - solved for row in solved_rows[key]]
+        unsolved = [changed_by[key] for key in set(solved_rows) - solved]
+
+        UserQuestionStatus.objects.bulk_create(
+            [UserQuestionStatus(user=user, question_id=question_id, status="SAVED") for question_id in saved - initial_saved]
+            + [UserQuestionStatus(user=user, question=q, status="SOLVED", problem_id=q.problem_id) for q in newly_solved]
+        )
+        if initial_saved - saved:
+            UserQuestionStatus.objects.filter(user=user, status="SAVED", question_id__in=initial_saved - saved).delete()
+        if unsolved_rows:
+            UserQuestionStatus.objects.filter(id__in=[row.id for row in unsolved_rows]).delete()
+
+        score_delta = sum(q.get_score() for q in newly_solved) - sum(row.question.get_score() for row in unsolved_rows)
+        if newly_solved or unsolved_rows:
+            _apply_score_delta(user.pk, score_delta)
+            projected = projected_questions(newly_solved + unsolved)
+            newly_solved_keys = {_solve_key(q) for q in newly_solved}
+            _apply_progress_deltas(user.pk, _progress_deltas(
+                solved=[q for q in projected if _solve_key(q) in newly_solved_keys],
+                unsolved=[q for q in projected if _solve_key(q) not in newly_solved_keys],
+            ))
+
+    return results
@@ -0,0 +1,96 @@
+from django.db.models import Count, Q
+
+from users.leaderboard import total_users
+from users.models import CustomUser
+from .models import UserSheetProgress, UserTopicProgress
+
+DEFAULT_TOP_N = 10
+MAX_TOP_N = 100
+
+
+def _photo_url(name):
+    return CustomUser._meta.get_field('profile_photo').storage.url(name) if name else None
+
+
+def _scope(model, **scope):
+    return model.objects.filter(solved_count__gt=0, **scope)
+
+
+def top_solvers(model, n=DEFAULT_TOP_N, **scope):
+    """
+    The n users with the most solved questions in a sheet or topic, best first.
+
+    Reads the (scope, -solved_count, user) index of the progress table.
+    Tied counts share a position.
+
+    Args:
+        model: UserSheetProgress or UserTopicProgress.
+        n (int): Number of users to return.
+        **scope: sheet_id=... or topic_id=...
+
+    Returns:
+        list: [{'position', 'username', 'display_name', 'profile_photo', 'solved_count'}, ...]
+    """
+    rows = (
+        _scope(model, **scope)
+        .order_by('-solved_count', 'user_id')
+        .values_list('solved_count', 'user__username', 'user__display_name', 'user__profile_photo')[:n]
+    )
+
+    entries, position, previous = [], 0, None
+    for i, (solved_count, username, display_name, profile_photo) in enumerate(rows, start=1):
+        if solved_count != previous:
+            position, previous = i, solved_count
+        entries.append({
+            'position': position,
+            'username': username,
+            'display_name': display_name,
+            'profile_photo': _photo_url(profile_photo),
+            'solved_count': solved_count,
+        })
+    return entries
+
+
+def solver_standing(model, solved_count, **scope):
+    """
+    Where a solved count places a user within a sheet or topic.
+
+    Users without a progress row have solved nothing there, so the
+    population is every user, counted from the leaderboard score buckets.
+
+    Returns:
+        dict: {'solved_count', 'position', 'percentile', 'total_users'}, where percentile is
+            the share of users (0-100) who solved fewer questions.
+    """
+    counts = _scope(model, **scope).aggregate(
+        active=Count('id'),
+        above=Count('id', filter=Q(solved_count__gt=solved_count)),
+        below=Count('id', filter=Q(solved_count__lt=solved_count)),
+    )
+    total = total_users()
+    below = counts['below'] + (total - counts['active']) if solved_count > 0 else 0
+
+    return {
+        'solved_count': solved_count,
+        'position': counts['above'] + 1,
+        'percentile': round(100 * below / total, 2) if total else 0.0,
+        'total_users': total,
+    }
+
+
+def sheet_top_solvers(sheet_id, n=DEFAULT_TOP_N):
+    return top_solvers(UserSheetProgress, n, sheet_id=sheet_id)
+
+
+def topic_top_solvers(topic_id, n=DEFAULT_TOP_N):
+    return top_solvers(UserTopicProgress, n, topic_id=topic_id)
+
+
+def sheet_standing(user, sheet_id):
+    solved = UserSheetProgress.objects.filter(user=user, sheet_id=sheet_id).values_list('solved_count', flat=True).first()
+    return solver_standing(UserSheetProgress, solved or 0, sheet_id=sheet_id)
+
+
+def topic_standing(user, topic_id):
+    solved = UserTopicProgress.objects.filter(user=user, topic_id=topic_id).values_list('solved_count', flat=True).first()
+    return solver_standing(UserTopicProgress, solved or 0, topic_id=topic_id)
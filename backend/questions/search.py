@@ -0,0 +1,169 @@
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connection
+from django.db.models import Case, F, FloatField, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce
+
+from .models import MarkdownNote, Question, Topic, UserNote
+
+SEARCH_CONFIG = 'english'
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+# How much a matching note of the user's counts next to a match on the question itself
+NOTE_WEIGHT = 0.5
+
+# Question text weighs more than its topic name
+_VECTOR_SQL = (
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', q.question), 'A') || "
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', t.name), 'B')"
+)
+
+
+def full_text_supported():
+    return connection.vendor == 'postgresql'
+
+
+def refresh_search_vectors(sheet_id=None, topic_id=None, question_id=None):
+    """
+    Recompute Question.search_vector for a sheet, a topic or one question (all questions if none given).
+
+    One UPDATE ... FROM that only rewrites rows whose vector changed. A no-op
+    on databases without full-text search.
+
+    Returns:
+        int: Number of questions updated.
+    """
+    if not full_text_supported():
+        return 0
+
+    qn = connection.ops.quote_name
+    conditions, params = ["t.id = q.topic_id", f"q.search_vector IS DISTINCT FROM ({_VECTOR_SQL})"], []
+    for column, value in (("t.sheet_id", sheet_id), ("t.id", topic_id), ("q.id", question_id)):
+        if value is not None:
+            conditions.append(f"{column} = %s")
+            params.append(value)
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"UPDATE {qn(Question._meta.db_table)} q SET search_vector = {_VECTOR_SQL} "
+            f"FROM {qn(Topic._meta.db_table)} t WHERE {' AND '.join(conditions)}",
+            params,
+        )
+        return cursor.rowcount
+
+
+def _matching_notes(model, user, query):
+    """
+    The user's notes of one kind whose content matches, filtered on the
+    to_tsvector(content) expression their GIN index covers.
+    """
+    return (
+        model.objects.annotate(vector=SearchVector('content', config=SEARCH_CONFIG))
+        .filter(user=user, vector=query)
+        .order_by()
+    )
+
+
+def _note_rank(model, user, query):
+    """
+    Best ts_rank of the user's matching notes of one kind on the outer question, NULL when none match.
+    """
+    notes = (
+        _matching_notes(model, user, query)
+        .filter(question=OuterRef('pk'))
+        .annotate(rank=SearchRank(F('vector'), query))
+        .order_by('-rank')
+        .values('rank')[:1]
+    )
+    return Subquery(notes, output_field=FloatField())
+
+
+def _full_text_search(terms, user):
+    query = SearchQuery(terms, search_type='websearch', config=SEARCH_CONFIG)
+
+    # Each side is matched on its own index and the ids are unioned, so notes
+    # are only ranked for questions that already matched
+    matches = Question.objects.filter(search_vector=query).values('id')
+    rank = Coalesce(SearchRank(F('search_vector'), query), Value(0.0))
+    if user is not None:
+        matches = matches.union(
+            _matching_notes(MarkdownNote, user, query).values('question_id'),
+            _matching_notes(UserNote, user, query).values('question_id'),
+        )
+        rank = rank + NOTE_WEIGHT * (
+            Coalesce(_note_rank(MarkdownNote, user, query), Value(0.0))
+            + Coalesce(_note_rank(UserNote, user, query), Value(0.0))
+        )
+
+    return Question.objects.filter(is_active=True, id__in=matches).annotate(rank=rank)
+
+
+def _substring_search(terms, user):
+    """
+    Fallback for databases without full-text search: every word must appear
+    in the question, its topic name or one of the user's notes.
+    """
+    questions = Question.objects.filter(is_active=True)
+    rank = Value(0.0)
+    for word in terms.split():
+        match = Q(question__icontains=word) | Q(topic__name__icontains=word)
+        rank = rank + Case(When(question__icontains=word, then=Value(1.0)), default=Value(0.0))
+        rank = rank + Case(When(topic__name__icontains=word, then=Value(0.4)), default=Value(0.0))
+        if user is not None:
+            in_notes = (
+                Q(id__in=MarkdownNote.objects.filter(user=user, content__icontains=word).values('question_id'))
+                | Q(id__in=UserNote.objects.filter(user=user, content__icontains=word).values('question_id'))
+            )
+            match |= in_notes
+            rank = rank + Case(When(in_notes, then=Value(NOTE_WEIGHT)), default=Value(0.0))
+        questions = questions.filter(match)
+    return questions.annotate(rank=rank)
+
+
+def search_questions(terms, user=None):
+    """
+    Active questions matching a search, best first.
+
+    On PostgreSQL, terms use websearch syntax ("quoted phrases", -exclusions,
+    or) against the indexed question/topic vector and, when a user is given,
+    that user's markdown notes and notes. Elsewhere each word is matched
+    with icontains.
+
+    Returns:
+        QuerySet: Questions annotated with 'rank', ordered by rank then id.
+    """
+    if user is not None and not user.is_authenticated:
+        user = None
+    search = _full_text_search if full_text_supported() else _substring_search
+    return search(terms, user).order_by('-rank', 'id')
+
+
+def search_page(terms, user=None, page=1, page_size=DEFAULT_PAGE_SIZE):
+    """
+    One page of search results.
+
+    Returns:
+        tuple: (list of result dicts, has_next)
+    """
+    offset = (page - 1) * page_size
+    rows = list(
+        search_questions(terms, user).values(
+            'id', 'question', 'link', 'platform', 'difficulty',
+            'topic_id', 'topic__name', 'topic__sheet_id', 'topic__sheet__name', 'rank',
+        )[offset:offset + page_size + 1]
+    )
+    results = [
+        {
+            'id': row['id'],
+            'question': row['question'],
+            'link': row['link'],
+            'platform': row['platform'],
+            'difficulty': row['difficulty'],
+            'topic_id': row['topic_id'],
+            'topic': row['topic__name'],
+            'sheet_id': row['topic__sheet_id'],
+            'sheet': row['topic__sheet__name'],
+            'rank': round(row['rank'], 4),
+        }
+        for row in rows[:page_size]
+    ]
+    return results, len(rows) > page_size
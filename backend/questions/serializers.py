@@ -1,6 +1,8 @@
 from rest_framework import serializers
 from .models import DSASheet, Topic, Question, UserQuestionStatus, UserSheetProgress
 from questions.models import Topic, Question, UserNote, MarkdownNote
+from .catalog import get_sheet_catalog
+from .overlay import StatusOverlay
 
 class DSASheetSerializer(serializers.ModelSerializer):
     class Meta:
@@ -8,38 +10,19 @@ class DSASheetSerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'description', 'image']
 
 
-class QuestionDetailSerializer(serializers.ModelSerializer):
-    user_status = serializers.SerializerMethodField()
-
-    class Meta:
-        model = Question
-        fields = ['id', 'question', 'link', 'solution', 'platform', 'difficulty', 'user_status']
-
-    def get_user_status(self, obj):
-        user = self.context.get('request').user
-        if user.is_authenticated:
-            status = UserQuestionStatus.objects.filter(user=user, question=obj).first()
-            return status.status if status else None
-        return None
-
-
-class TopicDetailSerializer(serializers.ModelSerializer):
-    questions = QuestionDetailSerializer(many=True, read_only=True)
-
-    class Meta:
-        model = Topic
-        fields = ['id', 'name', 'questions']
-
-
 class DSASheetDetailSerializer(serializers.ModelSerializer):
-    topics = TopicDetailSerializer(many=True, read_only=True)
+    topics = serializers.SerializerMethodField()
     user_progress = serializers.SerializerMethodField()
-    total_questions = serializers.SerializerMethodField()
 
     class Meta:
         model = DSASheet
         fields = ['id', 'name', 'description', 'image', 'topics', 'user_progress', 'total_questions']
 
+    def get_topics(self, obj):
+        # Cached question tree plus one status query, instead of one query per question
+        overlay = StatusOverlay.for_user(self.context.get('request').user, sheet_id=obj.id)
+        return overlay.apply_user_status(get_sheet_catalog(obj.id, obj.catalog_version))
+
     def get_user_progress(self, obj):
         user = self.context.get('request').user
         if user.is_authenticated:
@@ -49,15 +32,12 @@ class DSASheetDetailSerializer(serializers.ModelSerializer):
             }
         return None
 
-    def get_total_questions(self, obj):
-        return Question.objects.filter(topic__sheet=obj).count()
-
 
 class UserSheetProgressSerializer(serializers.ModelSerializer):
-    total_questions = serializers.SerializerMethodField()
-    total_easy = serializers.SerializerMethodField()
-    total_medium = serializers.SerializerMethodField()
-    total_hard = serializers.SerializerMethodField()
+    total_questions = serializers.IntegerField(source='sheet.total_questions', read_only=True)
+    total_easy = serializers.IntegerField(source='sheet.total_easy', read_only=True)
+    total_medium = serializers.IntegerField(source='sheet.total_medium', read_only=True)
+    total_hard = serializers.IntegerField(source='sheet.total_hard', read_only=True)
 
     class Meta:
         model = UserSheetProgress
@@ -72,44 +52,6 @@ class UserSheetProgressSerializer(serializers.ModelSerializer):
             'total_hard',
         ]
 
-    def get_total_questions(self, obj):
-        return Question.objects.filter(topic__sheet=obj.sheet).count()
-
-    def get_total_easy(self, obj):
-        return Question.objects.filter(topic__sheet=obj.sheet, difficulty='EASY').count()
-
-    def get_total_medium(self, obj):
-        return Question.objects.filter(topic__sheet=obj.sheet, difficulty='MEDIUM').count()
-
-    def get_total_hard(self, obj):
-        return Question.objects.filter(topic__sheet=obj.sheet, difficulty='HARD').count()
-    
-
-class TopicWithQuestionsSerializer(serializers.ModelSerializer):
-    questions = serializers.SerializerMethodField()
-
-    class Meta:
-        model = Topic
-        fields = ['id', 'name', 'questions']  # <-- questions must be included here
-
-    def get_questions(self, topic):
-        user = self.context.get('user')
-        questions = topic.questions.all()
-
-        data = []
-        for q in questions:
-            data.append({
-                'id': q.id,
-                'question': q.question,
-                'link': q.link,
-                'solution': q.solution,
-                'platform': q.platform,
-                'difficulty': q.difficulty,
-                'is_saved': UserQuestionStatus.objects.filter(user=user, question=q, status="SAVED").exists() if user and user.is_authenticated else False,
-                'is_solved': UserQuestionStatus.objects.filter(user=user, question=q, status="SOLVED").exists() if user and user.is_authenticated else False,
-            })
-        return data
-
 
 class UserNoteSerializer(serializers.ModelSerializer):
     class Meta:
@@ -118,35 +60,22 @@ class UserNoteSerializer(serializers.ModelSerializer):
 
 
 class SavedQuestionSerializer(serializers.ModelSerializer):
-    is_saved = serializers.SerializerMethodField()
-    is_solved = serializers.SerializerMethodField()
+    # Annotated onto the queryset by SavedQuestionsByTopicView
+    is_saved = serializers.BooleanField(read_only=True)
+    is_solved = serializers.BooleanField(read_only=True)
 
     class Meta:
         model = Question
         fields = ['id', 'question', 'difficulty', 'platform', 'link', 'solution', 'is_saved', 'is_solved']
 
-    def get_is_saved(self, obj):
-        user = self.context.get('user')
-        return UserQuestionStatus.objects.filter(user=user, question=obj, status="SAVED").exists()
-
-    def get_is_solved(self, obj):
-        user = self.context.get('user')
-        return UserQuestionStatus.objects.filter(user=user, question=obj, status="SOLVED").exists()
-
 
 class SimpleQuestionWithNoteSerializer(serializers.ModelSerializer):
-    content = serializers.SerializerMethodField()
+    # Annotated by questions.notes.questions_with_notes
+    content = serializers.CharField(read_only=True)
     
     class Meta:
         model = Question
         fields = ['id', 'question', 'content']
-    
-    def get_content(self, obj):
-        user = self.context.get('user')
-        if user:
-            note = MarkdownNote.objects.filter(user=user, question=obj).first()
-            return note.content if note else ""
-        return ""
 
 
 class MarkdownNoteSerializer(serializers.ModelSerializer):
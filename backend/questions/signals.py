@@ -1,18 +1,88 @@
-from django.db.models.signals import post_save
+import threading
+from contextlib import contextmanager
+
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from users.models import CustomUser
-from .models import DSASheet, UserSheetProgress
+from .models import DSASheet, Topic, Question, Problem
+from .catalog import bump_catalog_version, evict_local_catalog, evict_max_score, refresh_sheet_totals
+from .problems import attach_problem
+from .progress import recompute_progress_for_problems
+from .search import refresh_search_vectors
+
+_muted = threading.local()
+
+
+@contextmanager
+def sheet_signals_muted(sheet_id):
+    """
+    Skip the per-row Topic and Question receivers for one sheet in this thread,
+    e.g. while the sheet is deleted wholesale. The caller resyncs whatever they
+    would have kept up to date.
+    """
+    topic_ids = set(Topic.objects.filter(sheet_id=sheet_id).values_list('id', flat=True))
+    previous = getattr(_muted, 'sheets', None)
+    _muted.sheets = (sheet_id, topic_ids)
+    try:
+        yield
+    finally:
+        _muted.sheets = previous
+
+
+def _muted_sheet(sheet_id=None, topic_id=None):
+    muted = getattr(_muted, 'sheets', None)
+    return muted is not None and (sheet_id == muted[0] or topic_id in muted[1])
+
 
 @receiver(post_save, sender=DSASheet)
-def create_progress_for_new_sheet(sender, instance, created, **kwargs):
-    if created:
-        users = CustomUser.objects.all()
-        for user in users:
-            UserSheetProgress.objects.create(
-                user=user,
-                sheet=instance,
-                solved_count=0,
-                solved_easy=0,
-                solved_medium=0,
-                solved_hard=0
-            )
+def refresh_sheet_on_save(sender, instance, created, **kwargs):
+    # save() writes back whatever totals were loaded, so recount them
+    if not created:
+        refresh_sheet_totals(instance.id)
+
+
+@receiver(post_delete, sender=DSASheet)
+def invalidate_catalog_on_sheet_delete(sender, instance, **kwargs):
+    evict_local_catalog(instance.id)
+    evict_max_score()
+
+
+@receiver([post_save, post_delete], sender=Topic)
+def invalidate_catalog_on_topic_change(sender, instance, **kwargs):
+    if _muted_sheet(sheet_id=instance.sheet_id):
+        return
+    bump_catalog_version(instance.sheet_id)
+
+
+@receiver(post_save, sender=Topic)
+def refresh_search_on_topic_save(sender, instance, **kwargs):
+    # Topic names are part of their questions' search vectors
+    refresh_search_vectors(topic_id=instance.id)
+
+
+# Registered before refresh_sheet_on_question_change, so the catalog rebuilt after it sees the problem
+@receiver(post_save, sender=Question)
+def resolve_problem_on_question_save(sender, instance, **kwargs):
+    # Solves of the old and new problem move into or out of this question's sheet
+    affected = attach_problem(instance)
+    if affected:
+        recompute_progress_for_problems(affected, question_ids=[instance.pk])
+
+
+@receiver([post_save, post_delete], sender=Question)
+def refresh_sheet_on_question_change(sender, instance, **kwargs):
+    if _muted_sheet(topic_id=instance.topic_id):
+        return
+    sheet_id = Topic.objects.filter(id=instance.topic_id).values_list('sheet_id', flat=True).first()
+    if sheet_id is not None:
+        refresh_sheet_totals(sheet_id)
+
+
+@receiver(post_save, sender=Question)
+def refresh_search_on_question_save(sender, instance, **kwargs):
+    refresh_search_vectors(question_id=instance.id)
+
+
+@receiver([post_save, post_delete], sender=Problem)
+def evict_max_score_on_problem_change(sender, instance, **kwargs):
+    # Every Problem counts once towards the max score
+    evict_max_score()
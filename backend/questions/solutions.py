@@ -0,0 +1,255 @@
+import hashlib
+import json
+import threading
+
+import google.generativeai as genai  # pip install google-generativeai
+from django.conf import settings
+from django.db import DatabaseError, connection
+
+from .models import CachedSolution
+
+genai.configure(api_key=settings.GEMINI_API_KEY)
+
+MODEL_NAME = "gemini-2.5-flash"
+
+GENERATION_CONFIG = {
+    'temperature': 0.7,
+    'top_p': 0.8,
+    'top_k': 40,
+    'max_output_tokens': 8192,
+}
+
+model = genai.GenerativeModel(MODEL_NAME)
+
+# How long a reader waits for the next chunk before checking the drain thread is still alive
+DRAIN_CHECK_SECONDS = 5
+
+# Editing the template or the config changes its hash, so earlier cached solutions stop matching
+SOLUTION_PROMPT = """
+You are an expert coding mentor specializing in data structures and algorithms.
+
+The user is solving the following LeetCode problem:
+
+**Title:** {title}
+
+**Problem Description:**
+{content_text}
+
+**Language:** {lang}
+
+**Starter Code:**
+```{lang_lower}
+{code}
+```
+
+**Instructions:**
+Please provide a comprehensive solution following this structure:
+
+1. **Problem Understanding**: Briefly explain what the problem is asking for and identify key constraints.
+
+2. **Approach Strategy**: 
+   - Describe the algorithmic approach you'll use
+   - Explain why this approach is suitable for this problem
+   - Mention any alternative approaches if applicable
+
+3. **Step-by-Step Solution**:
+   - Break down the solution into logical steps
+   - Explain the reasoning behind each step
+
+4. **Complete Code Solution**: 
+   - Provide the complete, working code in {lang}
+   - Use the given starter code structure
+   - Include clear comments explaining key logic
+   - Follow language-specific best practices
+
+5. **Example Walkthrough**: 
+   - Walk through the solution with at least one example from the problem
+   - Show how variables change during execution
+   - Explain the flow of logic
+
+6. **Complexity Analysis**:
+   - Time Complexity: O(?) with explanation
+   - Space Complexity: O(?) with explanation
+   - Justify your complexity analysis
+
+7. **Edge Cases & Considerations**:
+   - Mention important edge cases to consider
+   - Any potential pitfalls or optimizations
+
+**Requirements:**
+- Write clean, readable, and efficient code
+- Use meaningful variable names
+- Add inline comments for complex logic
+- Ensure the solution handles all constraints mentioned in the problem
+- Format code properly with consistent indentation
+
+Please structure your response clearly with headers for each section.
+"""
+
+PROMPT_HASH = hashlib.sha256(SOLUTION_PROMPT.encode()).hexdigest()
+CONFIG_HASH = hashlib.sha256(
+    json.dumps({'model': MODEL_NAME, **GENERATION_CONFIG}, sort_keys=True).encode()
+).hexdigest()
+
+
+def solution_key(slug, lang):
+    return {'slug': slug, 'language': lang, 'prompt_hash': PROMPT_HASH, 'config_hash': CONFIG_HASH}
+
+
+def build_prompt(problem, lang):
+    """
+    Args:
+        problem (dict): get_leetcode_problem_html output ('title', 'content_text', 'code').
+    """
+    return SOLUTION_PROMPT.format(
+        title=problem['title'],
+        content_text=problem['content_text'],
+        lang=lang,
+        lang_lower=lang.lower(),
+        code=problem['code'],
+    )
+
+
+def sse_event(type, content, status):
+    # Format each chunk as JSON for frontend consumption
+    return f"data: {json.dumps({'type': type, 'content': content, 'status': status})}\n\n"
+
+
+def replay(chunks):
+    for text in chunks:
+        yield sse_event('content', text, 'generating')
+    yield sse_event('complete', '', 'completed')
+
+
+class _Generation:
+    """
+    One upstream generation, read by every request that asked for its key.
+
+    A background thread drains the Gemini stream into `chunks`, so the
+    generation finishes and is cached even if the request that started it
+    disconnects. Readers replay what arrived so far and then follow along.
+    """
+
+    def __init__(self, key):
+        self.key = key
+        self.chunks = []
+        self.done = False
+        self.error = None
+        self.thread = None
+        self.changed = threading.Condition()
+
+    def start(self, prompt):
+        # The first call raises here for bad requests, before anything is streamed
+        response = model.generate_content(
+            prompt,
+            stream=True,
+            generation_config=genai.types.GenerationConfig(**GENERATION_CONFIG),
+        )
+        self.thread = threading.Thread(target=self.drain, args=(response,), daemon=True)
+        self.thread.start()
+
+    def drain(self, response):
+        try:
+            for chunk in response:
+                if chunk.text:
+                    with self.changed:
+                        self.chunks.append(chunk.text)
+                        self.changed.notify_all()
+        except Exception as e:
+            self.error = e
+        try:
+            if self.error is None:
+                CachedSolution.objects.bulk_create(
+                    [CachedSolution(chunks=self.chunks, **self.key)], ignore_conflicts=True
+                )
+        except DatabaseError:
+            # Readers still get the full solution; the next miss regenerates it
+            pass
+        finally:
+            connection.close()
+            self.finish()
+
+    def finish(self, error=None):
+        # Leave the in-flight table only once the result is stored, so later requests hit the cache
+        with _inflight_lock:
+            if _inflight.get(_inflight_key(self.key)) is self:
+                del _inflight[_inflight_key(self.key)]
+        with self.changed:
+            self.error = self.error or error
+            self.done = True
+            self.changed.notify_all()
+
+    def drain_died(self):
+        # No thread yet means start() is still running, and it finishes the generation if it fails
+        return self.thread is not None and not self.thread.is_alive()
+
+    def events(self):
+        sent = 0
+        while True:
+            stalled = False
+            with self.changed:
+                while sent == len(self.chunks) and not self.done:
+                    if not self.changed.wait(DRAIN_CHECK_SECONDS) and self.drain_died():
+                        stalled = True
+                        break
+                new, sent = self.chunks[sent:], len(self.chunks)
+                done, error = self.done, self.error
+            if stalled:
+                # The drain thread exited without finishing; end every reader's stream with an error
+                self.finish(error=RuntimeError("Solution generation stopped unexpectedly"))
+                continue
+            for text in new:
+                yield sse_event('content', text, 'generating')
+            if done:
+                if error is None:
+                    yield sse_event('complete', '', 'completed')
+                else:
+                    yield sse_event('error', str(error), 'error')
+                return
+
+
+# Generations running in this process, so concurrent misses share one upstream call
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+
+def _inflight_key(key):
+    return tuple(sorted(key.items()))
+
+
+def stream_solution(slug, lang, problem):
+    """
+    Stream an AI solution as SSE `data:` events, from the cache when possible.
+
+    A cached solution is replayed at once. Otherwise requests for the same
+    (slug, language, prompt, config) join a single Gemini generation, which
+    is cached once it completes without error.
+
+    Args:
+        problem (dict): get_leetcode_problem_html output for the slug and language.
+
+    Returns:
+        iterator: SSE-framed strings.
+
+    Raises:
+        Exception: Gemini rejected the request before streaming started.
+    """
+    key = solution_key(slug, lang)
+    chunks = CachedSolution.objects.filter(**key).values_list('chunks', flat=True).first()
+    if chunks is not None:
+        return replay(chunks)
+
+    with _inflight_lock:
+        generation = _inflight.get(_inflight_key(key))
+        leader = generation is None
+        if leader:
+            generation = _inflight[_inflight_key(key)] = _Generation(key)
+
+    if leader:
+        try:
+            generation.start(build_prompt(problem, lang))
+        except Exception as e:
+            # Followers already waiting see the error as an event
+            generation.finish(error=e)
+            raise
+    return generation.events()
@@ -1,3 +1,1434 @@
-from django.test import TestCase
+import io
+import json
+import os
+import random
+import re
+import tempfile
+import threading
+import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock, skipIf
 
-# Create your tests here.
+import requests
+from django.contrib.postgres.search import SearchQuery, SearchVector
+from django.db import connection
+from django.contrib.admin import site
+from django.core.management import call_command
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from backend.http_client import CircuitOpenError, HttpClient, use_client
+from users.models import CustomUser
+from users.utils import calculate_rank
+from .catalog import evict_max_score, get_max_score, get_sheet_catalog, refresh_sheet_totals
+from .importer import import_rows
+from .leetcode import evict_local_problem, fetch_problem, get_leetcode_problem_html, prewarm_problems
+from .notes import MARKDOWN_NOTE, USER_NOTE, iter_user_notes
+from .models import DSASheet, Topic, Question, UserQuestionStatus, UserSheetProgress, UserTopicProgress, UserNote, MarkdownNote, LeetCodeProblem, CachedSolution
+from .search import search_questions
+from .progress import MAX_BATCH_OPERATIONS, backfill_progress_rows, solve_question, unsolve_question
+from .solutions import stream_solution
+from .management.commands.benchmark_text_extraction import extract_formatted_text_soup
+from .utils import extract_formatted_text
+
+HTML_TO_TEXT_CORPUS = os.path.join(os.path.dirname(__file__), 'testdata', 'html_to_text')
+
+
+def make_sheet(name, topic_count, questions_per_topic):
+    sheet = DSASheet.objects.create(name=name, description=f"{name} sheet")
+    for t in range(topic_count):
+        topic = Topic.objects.create(sheet=sheet, name=f"Topic {t}")
+        for q in range(questions_per_topic):
+            Question.objects.create(
+                topic=topic,
+                question=f"{name} question {t}.{q}",
+                link=f"https://leetcode.com/problems/{name}-{t}-{q}/",
+                platform="leetcode",
+                difficulty="EASY",
+            )
+    return sheet
+
+
+class SheetDetailQueryCountTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user("reader@example.com", "reader", "Reader", "pw")
+        self.client.force_login(self.user)
+
+    def fetch(self, sheet):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(f"/questions/sheets/{sheet.id}/")
+        self.assertEqual(response.status_code, 200)
+        return response.json(), len(ctx)
+
+    def mark_every_other_question(self, sheet):
+        for i, question in enumerate(Question.objects.filter(topic__sheet=sheet)):
+            UserQuestionStatus.objects.create(user=self.user, question=question, status="SOLVED" if i % 2 else "SAVED")
+
+    def test_query_count_is_flat_in_question_count(self):
+        small = make_sheet("small", topic_count=1, questions_per_topic=2)
+        large = make_sheet("large", topic_count=6, questions_per_topic=25)
+        self.mark_every_other_question(small)
+        self.mark_every_other_question(large)
+
+        _, small_queries = self.fetch(small)
+        data, large_queries = self.fetch(large)
+
+        self.assertEqual(small_queries, large_queries)
+        self.assertEqual(data["total_questions"], 150)
+        self.assertEqual(sum(len(t["questions"]) for t in data["topics"]), 150)
+
+    def test_user_status_matches_first_status_row(self):
+        sheet = make_sheet("status", topic_count=1, questions_per_topic=3)
+        first, second, _ = Question.objects.filter(topic__sheet=sheet).order_by("id")
+        UserQuestionStatus.objects.create(user=self.user, question=first, status="SAVED")
+        UserQuestionStatus.objects.create(user=self.user, question=first, status="SOLVED")
+        UserQuestionStatus.objects.create(user=self.user, question=second, status="SOLVED")
+
+        data, _ = self.fetch(sheet)
+
+        statuses = [q["user_status"] for q in data["topics"][0]["questions"]]
+        self.assertEqual(statuses, ["SAVED", "SOLVED", None])
+
+
+class TopicsWithQuestionsQueryCountTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user("topics@example.com", "topics", "Topics", "pw")
+        self.client.force_login(self.user)
+
+    def fetch(self, sheet):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(f"/questions/sheets/{sheet.id}/topics-with-questions/")
+        self.assertEqual(response.status_code, 200)
+        return response.json(), len(ctx)
+
+    def flags(self, sheet):
+        data, _ = self.fetch(sheet)
+        return [(q["is_saved"], q["is_solved"]) for t in data for q in t["questions"]]
+
+    def test_query_count_is_flat_in_question_count(self):
+        small = make_sheet("small", topic_count=1, questions_per_topic=2)
+        large = make_sheet("large", topic_count=6, questions_per_topic=25)
+        for sheet in (small, large):
+            for i, question in enumerate(Question.objects.filter(topic__sheet=sheet)):
+                UserQuestionStatus.objects.create(user=self.user, question=question, status="SOLVED" if i % 2 else "SAVED")
+
+        _, small_queries = self.fetch(small)
+        data, large_queries = self.fetch(large)
+
+        self.assertEqual(small_queries, large_queries)
+        self.assertEqual(sum(len(t["questions"]) for t in data), 150)
+
+    def test_saved_and_solved_flags(self):
+        blind = DSASheet.objects.create(name="blind", description="blind sheet")
+        neet = DSASheet.objects.create(name="neet", description="neet sheet")
+        import_rows(blind, [
+            {"topic": "Arrays", "question": "Two Sum", "link": "https://leetcode.com/problems/two-sum/", "difficulty": "EASY", "platform": "leetcode"},
+            {"topic": "Arrays", "question": "3Sum", "link": "https://leetcode.com/problems/3sum/", "difficulty": "MEDIUM", "platform": "leetcode"},
+        ])
+        import_rows(neet, [
+            {"topic": "Hashing", "question": "Two Sum", "link": "https://leetcode.com/problems/two-sum/", "difficulty": "EASY", "platform": "leetcode"},
+            {"topic": "Hashing", "question": "Valid Anagram", "link": "https://leetcode.com/problems/valid-anagram/", "difficulty": "EASY", "platform": "leetcode"},
+        ])
+        two_sum, three_sum = Question.objects.filter(topic__sheet=blind).order_by("id")
+        _, anagram = Question.objects.filter(topic__sheet=neet).order_by("id")
+        solve_question(self.user, two_sum)
+        UserQuestionStatus.objects.create(user=self.user, question=three_sum, status="SAVED")
+        UserQuestionStatus.objects.create(user=self.user, question=anagram, status="SAVED")
+
+        self.assertEqual(self.flags(blind), [(False, True), (True, False)])
+        # Two Sum was solved in the other sheet and still shows as solved here
+        self.assertEqual(self.flags(neet), [(False, True), (True, False)])
+
+        self.client.logout()
+        self.assertEqual(self.flags(neet), [(False, False), (False, False)])
+
+
+class SheetCatalogCacheTests(TestCase):
+    def setUp(self):
+        self.sheet = make_sheet("cached", topic_count=1, questions_per_topic=2)
+        self.topic = self.sheet.topics.get()
+        self.question = self.topic.questions.order_by("id").first()
+
+    def version(self):
+        return DSASheet.objects.values_list("catalog_version", flat=True).get(pk=self.sheet.pk)
+
+    def cached_catalog(self):
+        """The catalog at the current version, and the queries it took to get it."""
+        with CaptureQueriesContext(connection) as ctx:
+            catalog = get_sheet_catalog(self.sheet.id)
+        return catalog, len(ctx)
+
+    def test_saving_a_question_or_topic_bumps_the_version_and_invalidates_the_catalog(self):
+        self.cached_catalog()
+        catalog, queries = self.cached_catalog()
+        # Only the version read; the catalog itself came from the cache
+        self.assertEqual(queries, 1)
+
+        version = self.version()
+        self.question.question = "Renamed question"
+        self.question.save()
+        self.assertGreater(self.version(), version)
+        catalog, queries = self.cached_catalog()
+        self.assertGreater(queries, 1)
+        self.assertEqual(catalog[0]["questions"][0]["question"], "Renamed question")
+
+        version = self.version()
+        self.topic.name = "Renamed topic"
+        self.topic.save()
+        self.assertGreater(self.version(), version)
+        self.assertEqual(self.cached_catalog()[0][0]["name"], "Renamed topic")
+
+        # Deleting a question drops it from the next read too
+        self.question.delete()
+        self.assertEqual(len(self.cached_catalog()[0][0]["questions"]), 1)
+
+    def totals(self):
+        return DSASheet.objects.values_list("total_questions", "total_easy", "total_medium", "total_hard").get(pk=self.sheet.pk)
+
+    def test_totals_follow_question_changes(self):
+        self.assertEqual(self.totals(), (2, 2, 0, 0))
+
+        added = Question.objects.create(
+            topic=self.topic, question="Added", link="https://leetcode.com/problems/added/", platform="leetcode", difficulty="HARD",
+        )
+        self.assertEqual(self.totals(), (3, 2, 0, 1))
+
+        self.question.difficulty = "MEDIUM"
+        self.question.save()
+        self.assertEqual(self.totals(), (3, 1, 1, 1))
+
+        # Retired questions leave the totals and count again when reactivated
+        added.is_active = False
+        added.save()
+        self.assertEqual(self.totals(), (2, 1, 1, 0))
+        added.is_active = True
+        added.save()
+        self.assertEqual(self.totals(), (3, 1, 1, 1))
+
+        self.question.delete()
+        self.assertEqual(self.totals(), (2, 1, 0, 1))
+
+        # Queryset updates skip the signals until the totals are refreshed
+        Question.objects.filter(topic=self.topic).update(difficulty="EASY")
+        self.assertEqual(self.totals(), (2, 1, 0, 1))
+        refresh_sheet_totals(self.sheet.id)
+        self.assertEqual(self.totals(), (2, 2, 0, 0))
+
+
+class SavedQuestionsQueryCountTests(TestCase):
+    def test_single_query_grouped_by_sheet_and_topic(self):
+        user = CustomUser.objects.create_user("saver@example.com", "saver", "Saver", "pw")
+        for name, topics in (("first", 2), ("second", 3)):
+            make_sheet(name, topic_count=topics, questions_per_topic=4)
+        questions = list(Question.objects.order_by("-id"))
+        for i, question in enumerate(questions):
+            UserQuestionStatus.objects.create(user=user, question=question, status="SAVED")
+            if i % 3 == 0:
+                UserQuestionStatus.objects.create(user=user, question=question, status="SOLVED")
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get("/questions/saved/", {"email": user.email})
+
+        self.assertEqual(response.status_code, 200)
+        # User lookup by email, then the saved questions
+        self.assertEqual(len(ctx), 2)
+        groups = response.json()
+        self.assertEqual([g["name"] for g in groups][:3], ["Topic 0 (first)", "Topic 1 (first)", "Topic 0 (second)"])
+        saved = [q for g in groups for q in g["questions"]]
+        self.assertEqual(len(saved), 20)
+        self.assertTrue(all(q["is_saved"] for q in saved))
+        solved = {q.id for i, q in enumerate(questions) if i % 3 == 0}
+        self.assertEqual({q["id"] for q in saved if q["is_solved"]}, solved)
+
+
+class TopicNotesTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user("notes@example.com", "notes", "Notes", "pw")
+        self.other = CustomUser.objects.create_user("other@example.com", "other", "Other", "pw")
+        self.client.force_login(self.user)
+
+    def fetch(self, topic):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post("/questions/topic/questions-notes/", {"topic_id": topic.id})
+        self.assertEqual(response.status_code, 200)
+        return response.json(), len(ctx)
+
+    def per_question(self, topic):
+        """The response the view built with one note query per question, in id order."""
+        data = []
+        for question in Question.objects.filter(topic=topic).order_by("id"):
+            note = MarkdownNote.objects.filter(user=self.user, question=question).first()
+            data.append({"id": question.id, "question": question.question, "content": note.content if note else ""})
+        return data
+
+    def test_query_count_is_flat_in_question_count(self):
+        small = make_sheet("small", topic_count=1, questions_per_topic=2).topics.get()
+        large = make_sheet("large", topic_count=1, questions_per_topic=40).topics.get()
+        for topic in (small, large):
+            for question in topic.questions.all()[::2]:
+                MarkdownNote.objects.create(user=self.user, question=question, content=f"note on {question.id}")
+
+        _, small_queries = self.fetch(small)
+        data, large_queries = self.fetch(large)
+
+        self.assertEqual(small_queries, large_queries)
+        self.assertEqual(len(data), 40)
+        self.assertEqual(sum(1 for q in data if q["content"]), 20)
+
+    def test_matches_the_per_question_lookup(self):
+        topic = make_sheet("notes", topic_count=1, questions_per_topic=4).topics.get()
+        first, second, retired, bare = Question.objects.filter(topic=topic).order_by("id")
+        Question.objects.filter(pk=retired.pk).update(is_active=False)
+        MarkdownNote.objects.create(user=self.user, question=first, content="first")
+        MarkdownNote.objects.create(user=self.user, question=first, content="duplicate")
+        MarkdownNote.objects.create(user=self.user, question=retired, content="kept after retiring")
+        MarkdownNote.objects.create(user=self.other, question=second, content="someone else's")
+        # Plain notes are not part of this view
+        UserNote.objects.create(user=self.user, question=second, content="plain note")
+        UserNote.objects.create(user=self.user, question=bare, content="plain note")
+
+        data, _ = self.fetch(topic)
+
+        self.assertEqual(data, self.per_question(topic))
+        self.assertEqual([q["content"] for q in data], ["first", "", "kept after retiring", ""])
+
+
+class NoteExportTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user("export@example.com", "export", "Export", "pw")
+        other = CustomUser.objects.create_user("bystander@example.com", "bystander", "Bystander", "pw")
+        self.client.force_login(self.user)
+        self.alpha = make_sheet("alpha", topic_count=2, questions_per_topic=2)
+        self.beta = make_sheet("beta", topic_count=1, questions_per_topic=1)
+        (self.a1, self.a2), (self.a3, _) = [
+            list(Question.objects.filter(topic=topic).order_by("id")) for topic in self.alpha.topics.order_by("id")
+        ]
+        self.b1 = Question.objects.get(topic__sheet=self.beta)
+
+        # Created out of export order, so the order below comes from the export itself
+        MarkdownNote.objects.create(user=self.user, question=self.b1, content="beta markdown")
+        UserNote.objects.create(user=self.user, question=self.a1, content="plain note\nacross lines")
+        UserNote.objects.create(user=self.user, question=self.a2, content="plain only")
+        MarkdownNote.objects.create(user=self.user, question=self.a3, content="alpha markdown 3")
+        MarkdownNote.objects.create(user=self.user, question=self.a1, content="alpha markdown 1")
+        MarkdownNote.objects.create(user=self.user, question=self.a1, content="duplicate markdown")
+        UserNote.objects.create(user=self.user, question=self.b1, content="beta plain")
+        MarkdownNote.objects.create(user=other, question=self.a2, content="not mine")
+        UserNote.objects.create(user=other, question=self.a1, content="not mine either")
+        self.day = f"{UserNote.objects.first().created_at:%Y-%m-%d}"
+
+    @staticmethod
+    def entries(data):
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            return [(name, archive.read(name).decode()) for name in archive.namelist()]
+
+    def test_user_notes_merge_both_kinds_in_question_order(self):
+        rows = [(row[4], row[7], row[9]) for row in iter_user_notes(self.user, chunk_size=2)]
+        self.assertEqual(rows, [
+            (self.a1.id, MARKDOWN_NOTE, "alpha markdown 1"),
+            (self.a1.id, MARKDOWN_NOTE, "duplicate markdown"),
+            (self.a1.id, USER_NOTE, "plain note\nacross lines"),
+            (self.a2.id, USER_NOTE, "plain only"),
+            (self.a3.id, MARKDOWN_NOTE, "alpha markdown 3"),
+            (self.b1.id, MARKDOWN_NOTE, "beta markdown"),
+            (self.b1.id, USER_NOTE, "beta plain"),
+        ])
+
+    def test_zip_has_one_file_per_topic_in_order(self):
+        response = self.client.post("/questions/notes/export/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/zip")
+
+        entries = self.entries(b"".join(response.streaming_content))
+
+        self.assertEqual([name for name, _ in entries], ["alpha/Topic 0.md", "alpha/Topic 1.md", "beta/Topic 0.md"])
+        self.assertEqual(entries[0][1], (
+            "# Topic 0 (alpha)\n"
+            f"\n## [alpha question 0.0]({self.a1.link})\n"
+            "\nalpha markdown 1\n"
+            "\nduplicate markdown\n"
+            "\n### Notes\n\n"
+            f"- {self.day}: plain note\n  across lines\n"
+            f"\n## [alpha question 0.1]({self.a2.link})\n"
+            "\n### Notes\n\n"
+            f"- {self.day}: plain only\n"
+        ))
+        self.assertNotIn("not mine", "".join(text for _, text in entries))
+
+    def test_export_command_matches_the_view_with_small_chunks(self):
+        expected = self.entries(b"".join(self.client.post("/questions/notes/export/").streaming_content))
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "notes.zip")
+            call_command("export_notes", "export", path, chunk_size=2, stdout=io.StringIO())
+            with open(path, "rb") as f:
+                self.assertEqual(self.entries(f.read()), expected)
+
+    def test_sheet_ndjson_is_scoped_to_the_sheet_and_user(self):
+        response = self.client.post("/questions/sheet/notes-export/", {"sheet_id": self.alpha.id})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        notes = [json.loads(line) for line in lines]
+        self.assertEqual(
+            [(n["question_id"], n["content"]) for n in notes],
+            [(self.a1.id, "alpha markdown 1"), (self.a3.id, "alpha markdown 3")],
+        )
+        self.assertEqual({n["topic_id"] for n in notes}, {self.a1.topic_id, self.a3.topic_id})
+
+        response = self.client.post("/questions/sheet/notes-export/", {"sheet_id": 0})
+        self.assertEqual(response.status_code, 404)
+
+
+class QuestionSearchTests(TestCase):
+    """Runs on PostgreSQL full-text search and on the SQLite icontains fallback."""
+
+    def setUp(self):
+        self.user = CustomUser.objects.create_user("seeker@example.com", "seeker", "Seeker", "pw")
+        sheet = DSASheet.objects.create(name="search", description="search sheet")
+        rows = [
+            ("Dynamic Programming", "Climbing Stairs", "climbing-stairs"),
+            ("Graphs", "Number of Islands", "number-of-islands"),
+            ("Arrays", "Two Sum", "two-sum"),
+            ("Arrays", "Trapping Rain Water", "trapping-rain-water"),
+        ]
+        import_rows(sheet, [
+            {"topic": topic, "question": question, "link": f"https://leetcode.com/problems/{slug}/",
+             "difficulty": "EASY", "platform": "leetcode"}
+            for topic, question, slug in rows
+        ])
+
+    def search(self, q, **params):
+        response = self.client.get("/questions/search/", {"q": q, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def titles(self, q, **params):
+        return [r["question"] for r in self.search(q, **params)["results"]]
+
+    def test_matches_question_text_and_topic_name(self):
+        self.assertEqual(self.titles("islands"), ["Number of Islands"])
+        self.assertEqual(self.titles("programming"), ["Climbing Stairs"])
+
+    def test_topic_rename_is_searchable(self):
+        topic = Topic.objects.get(name="Graphs")
+        topic.name = "Grid Traversal"
+        topic.save()
+        self.assertEqual(self.titles("grid"), ["Number of Islands"])
+
+    def test_own_notes_are_searched_and_rank_below_title_matches(self):
+        two_sum = Question.objects.get(question="Two Sum")
+        MarkdownNote.objects.create(user=self.user, question=two_sum, content="like the stairs problem")
+
+        self.assertEqual(self.titles("stairs"), ["Climbing Stairs"])
+        self.assertEqual(self.titles("stairs", email=self.user.email), ["Climbing Stairs", "Two Sum"])
+
+    def test_pagination(self):
+        first = self.search("arrays", page_size=1)
+        second = self.search("arrays", page_size=1, page=2)
+        self.assertTrue(first["has_next"])
+        self.assertFalse(second["has_next"])
+        self.assertEqual(
+            {r["question"] for r in first["results"] + second["results"]},
+            {"Two Sum", "Trapping Rain Water"},
+        )
+
+
+class AdminSearchTests(TestCase):
+    """Full-text matches on PostgreSQL are OR'd with the default lookups on the other search fields."""
+
+    def setUp(self):
+        admin = CustomUser.objects.create_superuser("admin@example.com", "admin", "Admin", "pw")
+        self.client.force_login(admin)
+        sheet = DSASheet.objects.create(name="admin", description="admin sheet")
+        import_rows(sheet, [
+            {"topic": "Graphs", "question": "Number of Islands", "link": "https://leetcode.com/problems/number-of-islands/",
+             "difficulty": "MEDIUM", "platform": "leetcode"},
+            {"topic": "Graphs", "question": "Knight Moves", "link": "https://www.spoj.com/problems/NAKANJ/",
+             "difficulty": "MEDIUM", "platform": "spoj"},
+        ])
+        islands, knight = Question.objects.order_by("id")
+        UserNote.objects.create(user=admin, question=islands, content="flood fill from every land cell")
+        writer = CustomUser.objects.create_user("writer@example.com", "writer", "Writer", "pw")
+        UserNote.objects.create(user=writer, question=knight, content="breadth first search on the board")
+
+    def results(self, model, q):
+        response = self.client.get(f"/admin/questions/{model}/", {"q": q})
+        self.assertEqual(response.status_code, 200)
+        return list(response.context["cl"].result_list)
+
+    def test_question_search_matches_text_and_platform(self):
+        titles = lambda q: {question.question for question in self.results("question", q)}
+        self.assertEqual(titles("islands"), {"Number of Islands"})
+        self.assertEqual(titles("spoj"), {"Knight Moves"})
+        self.assertEqual(titles("tree"), set())
+
+    def test_note_search_matches_content_and_author(self):
+        notes = lambda q: {note.content for note in self.results("usernote", q)}
+        self.assertEqual(notes("flood"), {"flood fill from every land cell"})
+        self.assertEqual(notes("writer@example.com"), {"breadth first search on the board"})
+        self.assertEqual(notes("Knight"), {"breadth first search on the board"})
+
+
+class SharedProblemTests(TestCase):
+    """The same problem in two sheets is solved once and counts in both."""
+
+    def setUp(self):
+        self.user = CustomUser.objects.create_user("twin@example.com", "twin", "Twin", "pw")
+        self.client.force_login(self.user)
+        self.blind = DSASheet.objects.create(name="blind", description="blind sheet")
+        self.neet = DSASheet.objects.create(name="neet", description="neet sheet")
+        import_rows(self.blind, [self.row("Arrays", "Two Sum", "https://leetcode.com/problems/two-sum/")])
+        import_rows(self.neet, [self.row("Hashing", "2. Two Sum", "https://leetcode.com/problems/two-sum/description/")])
+        self.blind_q = Question.objects.get(topic__sheet=self.blind)
+        self.neet_q = Question.objects.get(topic__sheet=self.neet)
+
+    @staticmethod
+    def row(topic, question, link):
+        return {"topic": topic, "question": question, "link": link, "difficulty": "EASY", "platform": "leetcode"}
+
+    def solved_counts(self):
+        return {
+            p.sheet.name: p.solved_count
+            for p in UserSheetProgress.objects.filter(user=self.user).select_related("sheet")
+        }
+
+    def statuses(self, sheet):
+        data = self.client.get(f"/questions/sheets/{sheet.id}/").json()
+        return [q["user_status"] for t in data["topics"] for q in t["questions"]]
+
+    def test_solve_counts_in_both_sheets_and_scores_once(self):
+        self.assertEqual(self.blind_q.problem_id, self.neet_q.problem_id)
+        solve_question(self.user, self.blind_q)
+        self.assertFalse(solve_question(self.user, self.neet_q))
+
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.score, 5)
+        self.assertEqual(self.solved_counts(), {"blind": 1, "neet": 1})
+        self.assertEqual(self.statuses(self.neet), ["SOLVED"])
+        self.assertNotIn("problem_id", self.client.get(f"/questions/sheets/{self.neet.id}/").json()["topics"][0]["questions"][0])
+
+        unsolve_question(self.user, self.neet_q)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.score, 0)
+        self.assertEqual(self.solved_counts(), {"blind": 0, "neet": 0})
+        self.assertEqual(self.statuses(self.blind), [None])
+
+    def test_max_score_counts_each_problem_once(self):
+        evict_max_score()
+        self.assertEqual(get_max_score(), 5)
+
+        # The higher-scoring copy sets the problem's worth; a question without a link stands alone
+        Question.objects.filter(pk=self.neet_q.pk).update(difficulty="MEDIUM")
+        Question.objects.create(topic=self.blind_q.topic, question="Offline", link="", platform="misc", difficulty="HARD")
+        self.assertEqual(get_max_score(), 10 + 15)
+
+    def test_importing_a_solved_problem_credits_the_new_sheet(self):
+        solve_question(self.user, self.blind_q)
+        later = DSASheet.objects.create(name="later", description="later sheet")
+        import_rows(later, [self.row("Arrays", "Two Sum", "https://www.leetcode.com/problems/two-sum")])
+
+        self.assertEqual(self.solved_counts(), {"blind": 1, "neet": 1, "later": 1})
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.score, 5)
+
+    def test_relinking_recounts_only_the_sheets_it_touches(self):
+        other = CustomUser.objects.create_user("other@example.com", "other", "Other", "pw")
+        solve_question(self.user, self.blind_q)
+        solve_question(other, self.blind_q)
+        unrelated = DSASheet.objects.create(name="unrelated", description="unrelated sheet")
+        import_rows(unrelated, [self.row("Graphs", "Clone Graph", "https://leetcode.com/problems/clone-graph/")])
+        # A sentinel no recount would write
+        UserSheetProgress.objects.create(user=self.user, sheet=unrelated, solved_count=7)
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.neet_q.link = "https://leetcode.com/problems/three-sum/"
+            self.neet_q.save()
+
+        self.assertEqual(self.solved_counts(), {"blind": 1, "neet": 0, "unrelated": 7})
+        self.assertEqual(UserSheetProgress.objects.get(user=other, sheet=self.neet).solved_count, 0)
+        self.assertEqual(UserTopicProgress.objects.get(user=self.user, topic=self.neet_q.topic).solved_count, 0)
+        if connection.features.has_select_for_update:
+            locks = [q["sql"] for q in ctx.captured_queries if "FOR UPDATE" in q["sql"]]
+            self.assertEqual(len(locks), 1)
+
+        # Relinking back moves the solve into the sheet again
+        self.neet_q.link = "https://leetcode.com/problems/two-sum/"
+        self.neet_q.save()
+        self.assertEqual(self.solved_counts(), {"blind": 1, "neet": 1, "unrelated": 7})
+
+    def test_importing_overlapping_sheets_creates_no_zero_rows(self):
+        for i in range(3):
+            solve_question(CustomUser.objects.create_user(f"solver{i}@example.com", f"solver{i}", "Solver", "pw"), self.blind_q)
+        faang = DSASheet.objects.create(name="faang", description="faang sheet")
+        import_rows(faang, [
+            self.row(f"Topic {i}", f"Problem {i}", f"https://leetcode.com/problems/problem-{i}/") for i in range(5)
+        ] + [self.row("Hashing", "Two Sum", "https://leetcode.com/problems/two-sum/")])
+
+        self.assertFalse(UserTopicProgress.objects.filter(solved_count=0).exists())
+        self.assertFalse(UserSheetProgress.objects.filter(solved_count=0).exists())
+        # One row per solver, in the new sheet and in the one topic holding the shared problem
+        self.assertEqual(UserSheetProgress.objects.filter(sheet=faang).count(), 3)
+        self.assertEqual(UserTopicProgress.objects.filter(topic__sheet=faang).count(), 3)
+
+
+class ProgressBackfillTests(TestCase):
+    def setUp(self):
+        self.none = CustomUser.objects.create_user("none@example.com", "none", "None", "pw")
+        self.some = CustomUser.objects.create_user("some@example.com", "some", "Some", "pw")
+        self.first = make_sheet("first", 1, 2)
+        self.second = make_sheet("second", 1, 3)
+        solve_question(self.some, Question.objects.filter(topic__sheet=self.first).first())
+
+    def progress(self, username, sheet):
+        response = self.client.get(f"/questions/progress/{username}/{sheet.id}/")
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        return data["solved_count"], data["total_questions"]
+
+    def rows(self):
+        return set(UserSheetProgress.objects.values_list("user__username", "sheet__name", "solved_count"))
+
+    def test_missing_rows_read_as_zero(self):
+        self.assertEqual(self.progress("none", self.first), (0, 2))
+        self.assertEqual(self.progress("some", self.second), (0, 3))
+        self.assertEqual(self.progress("some", self.first), (1, 2))
+        self.assertEqual(self.client.get(f"/questions/progress/nobody/{self.first.id}/").status_code, 404)
+        self.assertEqual(self.client.get("/questions/progress/none/0/").status_code, 404)
+
+    def test_backfill_fills_gaps_once_and_keeps_counts(self):
+        self.assertEqual(self.rows(), {("some", "first", 1)})
+
+        self.assertEqual(backfill_progress_rows(), 3)
+        self.assertEqual(self.rows(), {
+            ("none", "first", 0), ("none", "second", 0), ("some", "first", 1), ("some", "second", 0),
+        })
+        self.assertEqual(backfill_progress_rows(), 0)
+        self.assertEqual(len(self.rows()), 4)
+
+        # Backfilled rows read the same as the missing ones did
+        self.assertEqual(self.progress("none", self.first), (0, 2))
+        self.assertEqual(self.progress("some", self.first), (1, 2))
+
+
+class SheetLeaderboardTests(TestCase):
+    def setUp(self):
+        self.sheet = make_sheet("ranked", topic_count=2, questions_per_topic=3)
+        self.first_topic, self.second_topic = self.sheet.topics.order_by("id")
+        questions = list(Question.objects.filter(topic__sheet=self.sheet).order_by("id"))
+        self.users = {
+            name: CustomUser.objects.create_user(f"{name}@example.com", name, name.title(), "pw")
+            for name in ("ada", "bob", "cy", "dee", "eve")
+        }
+        solves = {"ada": [0, 1, 2], "bob": [0, 3], "cy": [3, 4], "eve": [5]}
+        for name, indexes in solves.items():
+            for i in indexes:
+                solve_question(self.users[name], questions[i])
+        # A row that dropped back to zero reads like no row at all
+        unsolve_question(self.users["eve"], questions[5])
+        self.questions = questions
+
+    def top(self, path, **params):
+        response = self.client.get(f"/questions/leaderboard/{path}/", params)
+        self.assertEqual(response.status_code, 200)
+        return [(u["username"], u["position"], u["solved_count"]) for u in response.json()["users"]]
+
+    def standing(self, path, username):
+        response = self.client.get(f"/questions/leaderboard/{path}/{username}/")
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        return data["solved_count"], data["position"], data["percentile"], data["total_users"]
+
+    def test_top_solvers_share_positions_on_ties(self):
+        sheet = f"sheets/{self.sheet.id}"
+        self.assertEqual(self.top(sheet), [("ada", 1, 3), ("bob", 2, 2), ("cy", 2, 2)])
+        self.assertEqual(self.top(sheet, limit=2), [("ada", 1, 3), ("bob", 2, 2)])
+        self.assertEqual(self.top(f"topics/{self.first_topic.id}"), [("ada", 1, 3), ("bob", 2, 1)])
+        self.assertEqual(self.top(f"topics/{self.second_topic.id}"), [("cy", 1, 2), ("bob", 2, 1)])
+
+    def test_percentile_counts_users_below(self):
+        sheet = f"sheets/{self.sheet.id}"
+        self.assertEqual(self.standing(sheet, "ada"), (3, 1, 80.0, 5))
+        # Tied users share a position and a percentile
+        self.assertEqual(self.standing(sheet, "bob"), (2, 2, 40.0, 5))
+        self.assertEqual(self.standing(sheet, "cy"), (2, 2, 40.0, 5))
+        # Nobody is below a user who solved nothing, with or without a progress row
+        self.assertEqual(self.standing(sheet, "dee"), (0, 4, 0.0, 5))
+        self.assertEqual(self.standing(sheet, "eve"), (0, 4, 0.0, 5))
+        self.assertEqual(self.standing(f"topics/{self.second_topic.id}", "bob"), (1, 2, 60.0, 5))
+
+    def test_single_user(self):
+        for name in ("bob", "cy", "dee", "eve"):
+            self.users[name].delete()
+        sheet = f"sheets/{self.sheet.id}"
+        self.assertEqual(self.standing(sheet, "ada"), (3, 1, 0.0, 1))
+        self.assertEqual(self.standing(f"topics/{self.second_topic.id}", "ada"), (0, 1, 0.0, 1))
+
+    def test_topic_progress_follows_solves_and_unsolves(self):
+        topic = f"topics/{self.second_topic.id}"
+        bob, solved_here = self.users["bob"], self.questions[3]
+
+        unsolve_question(bob, solved_here)
+        self.assertEqual(self.top(topic), [("cy", 1, 2)])
+        self.assertEqual(self.standing(topic, "bob"), (0, 2, 0.0, 5))
+        self.assertEqual(self.standing(f"topics/{self.first_topic.id}", "bob")[0], 1)
+
+        solve_question(bob, solved_here)
+        solve_question(bob, self.questions[5])
+        self.assertEqual(self.top(topic), [("bob", 1, 2), ("cy", 1, 2)])
+        self.assertEqual(
+            UserTopicProgress.objects.get(user=bob, topic=self.second_topic).solved_count,
+            UserQuestionStatus.objects.filter(user=bob, status="SOLVED", question__topic=self.second_topic).count(),
+        )
+
+    def test_unknown_sheet_topic_user_and_bad_limit(self):
+        self.assertEqual(self.client.get("/questions/leaderboard/sheets/0/").status_code, 404)
+        self.assertEqual(self.client.get("/questions/leaderboard/topics/0/ada/").status_code, 404)
+        self.assertEqual(self.client.get(f"/questions/leaderboard/sheets/{self.sheet.id}/nobody/").status_code, 404)
+        for limit in ("0", "abc", "101"):
+            response = self.client.get(f"/questions/leaderboard/sheets/{self.sheet.id}/", {"limit": limit})
+            self.assertEqual(response.status_code, 400, limit)
+
+
+class BatchStatusUpdateTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user("batch@example.com", "batch", "Batch", "pw")
+        self.sheet = DSASheet.objects.create(name="batch", description="batch sheet")
+        import_rows(self.sheet, [
+            {"topic": "Arrays", "question": difficulty.title(), "link": f"https://leetcode.com/problems/{difficulty.lower()}/",
+             "difficulty": difficulty, "platform": "leetcode"}
+            for difficulty in ("EASY", "MEDIUM", "HARD")
+        ])
+        self.easy, self.medium, self.hard = Question.objects.filter(topic__sheet=self.sheet).order_by("id")
+        evict_max_score()
+        self.addCleanup(evict_max_score)
+
+    def post(self, operations):
+        return self.client.post(
+            "/questions/update-status/batch/",
+            json.dumps({"email": self.user.email, "operations": operations}),
+            content_type="application/json",
+        )
+
+    def apply(self, *operations):
+        response = self.post([{"question_id": q.id, "action": action} for q, action in operations])
+        self.assertEqual(response.status_code, 200)
+        return response.json()["results"]
+
+    def statuses(self):
+        return set(UserQuestionStatus.objects.filter(user=self.user).values_list("question_id", "status"))
+
+    def progress(self, sheet=None):
+        row = UserSheetProgress.objects.get(user=self.user, sheet=sheet or self.sheet)
+        return row.solved_count, row.solved_easy, row.solved_medium, row.solved_hard
+
+    def test_operations_replay_in_order_and_only_net_changes_are_written(self):
+        results = self.apply(
+            (self.easy, "solve"), (self.easy, "unsolve"), (self.easy, "solve"),
+            (self.medium, "save"), (self.medium, "unsave"),
+            (self.hard, "solve"), (self.hard, "solve"), (self.hard, "unsolve"),
+        )
+        self.assertEqual([r["changed"] for r in results], [True, True, True, True, True, True, False, True])
+        self.assertEqual(self.statuses(), {(self.easy.id, "SOLVED")})
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.score, 5)
+
+        # Nothing changes on replay, so nothing is written
+        with CaptureQueriesContext(connection) as ctx:
+            results = self.apply((self.easy, "solve"), (self.medium, "unsave"))
+        self.assertEqual([r["changed"] for r in results], [False, False])
+        writes = [q["sql"] for q in ctx.captured_queries if q["sql"].startswith(("INSERT", "UPDATE", "DELETE"))]
+        self.assertEqual(writes, [])
+
+    def test_score_rank_and_progress_deltas(self):
+        self.apply((self.easy, "solve"), (self.medium, "solve"), (self.hard, "solve"), (self.easy, "save"))
+        self.user.refresh_from_db()
+        self.assertEqual((self.user.score, self.user.rank), (30, calculate_rank(30, 30)))
+        self.assertEqual(self.progress(), (3, 1, 1, 1))
+        self.assertEqual(UserTopicProgress.objects.get(user=self.user, topic=self.easy.topic).solved_count, 3)
+
+        self.apply((self.medium, "unsolve"), (self.easy, "unsave"))
+        self.user.refresh_from_db()
+        self.assertEqual((self.user.score, self.user.rank), (20, calculate_rank(20, 30)))
+        self.assertNotEqual(calculate_rank(20, 30), calculate_rank(30, 30))
+        self.assertEqual(self.progress(), (2, 1, 0, 1))
+        self.assertEqual(self.statuses(), {(self.easy.id, "SOLVED"), (self.hard.id, "SOLVED")})
+
+    def test_operation_limit_and_malformed_operations(self):
+        too_many = [{"question_id": self.easy.id, "action": "save"}] * (MAX_BATCH_OPERATIONS + 1)
+        self.assertEqual(self.post(too_many).status_code, 400)
+        self.assertEqual(self.post([]).status_code, 400)
+        self.assertEqual(self.post({"question_id": self.easy.id, "action": "solve"}).status_code, 400)
+        self.assertEqual(self.statuses(), set())
+
+        response = self.post([
+            {"question_id": "first", "action": "solve"},
+            "solve",
+            {"question_id": self.easy.id, "action": "finish"},
+            {"question_id": 10 ** 9, "action": "solve"},
+            {"question_id": str(self.hard.id), "action": "solve"},
+        ])
+        self.assertEqual(response.status_code, 200)
+        results = response.json()["results"]
+        self.assertEqual([r.get("error") for r in results], [
+            "Question not found", "Invalid action", "Invalid action", "Question not found", None,
+        ])
+        self.assertEqual([r["success"] for r in results], [False, False, False, False, True])
+        # Bad operations don't block the good ones
+        self.assertEqual(self.statuses(), {(self.hard.id, "SOLVED")})
+
+    def test_operations_on_questions_sharing_a_problem(self):
+        other = DSASheet.objects.create(name="other", description="other sheet")
+        import_rows(other, [{"topic": "Warmup", "question": "Easy again", "link": "https://leetcode.com/problems/easy/description/",
+                             "difficulty": "EASY", "platform": "leetcode"}])
+        twin = Question.objects.get(topic__sheet=other)
+        self.assertEqual(twin.problem_id, self.easy.problem_id)
+
+        results = self.apply((self.easy, "solve"), (twin, "solve"))
+        self.assertEqual([r["changed"] for r in results], [True, False])
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.score, 5)
+        self.assertEqual(self.statuses(), {(self.easy.id, "SOLVED")})
+        self.assertEqual((self.progress()[0], self.progress(other)[0]), (1, 1))
+
+        # Unsolving either copy unsolves the problem everywhere
+        results = self.apply((self.easy, "solve"), (twin, "unsolve"))
+        self.assertEqual([r["changed"] for r in results], [False, True])
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.score, 0)
+        self.assertEqual(self.statuses(), set())
+        self.assertEqual((self.progress()[0], self.progress(other)[0]), (0, 0))
+
+
+class ImportRowsTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user("importer@example.com", "importer", "Importer", "pw")
+        self.sheet = DSASheet.objects.create(name="import", description="import sheet")
+        self.rows = [
+            self.row("Arrays", "Two Sum", "two-sum"),
+            self.row("Arrays", "3Sum", "3sum", "MEDIUM"),
+            self.row("Graphs", "Number of Islands", "number-of-islands"),
+        ]
+        import_rows(self.sheet, self.rows)
+
+    @staticmethod
+    def row(topic, question, slug, difficulty="EASY"):
+        return {"topic": topic, "question": question, "link": f"https://leetcode.com/problems/{slug}/",
+                "difficulty": difficulty, "platform": "leetcode"}
+
+    def question(self, slug):
+        return Question.objects.get(topic__sheet=self.sheet, link=f"https://leetcode.com/problems/{slug}/")
+
+    def snapshot(self):
+        return list(Question.objects.order_by("id").values_list("id", "topic__name", "question", "is_active"))
+
+    def solved_count(self, sheet=None):
+        # A missing row reads as zero
+        progress = UserSheetProgress.objects.filter(user=self.user, sheet=sheet or self.sheet)
+        return progress.values_list("solved_count", flat=True).first() or 0
+
+    def test_dry_run_reports_without_writing(self):
+        before = self.snapshot()
+        rows = [self.row("Hashing", "1. Two Sum", "two-sum"), self.row("Arrays", "4Sum", "4sum")]
+
+        report = import_rows(self.sheet, rows, dry_run=True, match_links=True, retire_missing=True)
+
+        self.assertEqual(
+            (report.topics_created, report.questions_created, report.questions_updated, report.questions_retired),
+            (1, 1, 1, 2),
+        )
+        self.assertEqual(self.snapshot(), before)
+        self.assertFalse(Topic.objects.filter(name="Hashing").exists())
+
+        # A sheet that does not exist yet
+        report = import_rows(None, self.rows, dry_run=True)
+        self.assertEqual((report.topics_created, report.questions_created), (2, 3))
+
+    def test_match_links_updates_renamed_and_moved_questions_in_place(self):
+        two_sum = self.question("two-sum")
+        solve_question(self.user, two_sum)
+
+        report = import_rows(self.sheet, [self.row("Hashing", "1. Two Sum", "two-sum/description")], match_links=True)
+
+        self.assertEqual((report.questions_created, report.questions_updated, report.topics_created), (0, 1, 1))
+        two_sum.refresh_from_db()
+        self.assertEqual((two_sum.question, two_sum.topic.name), ("1. Two Sum", "Hashing"))
+        self.assertTrue(UserQuestionStatus.objects.filter(user=self.user, question=two_sum, status="SOLVED").exists())
+
+        # Without match_links the renamed row is a new question
+        report = import_rows(self.sheet, [self.row("Hashing", "Two Sum (renamed)", "two-sum")])
+        self.assertEqual((report.questions_created, report.questions_updated), (1, 0))
+
+    def test_retiring_and_reactivating_questions_updates_progress(self):
+        solve_question(self.user, self.question("two-sum"))
+        solve_question(self.user, self.question("3sum"))
+        self.assertEqual(self.solved_count(), 2)
+
+        report = import_rows(self.sheet, [self.rows[0], self.rows[2]], retire_missing=True)
+
+        self.assertEqual(report.questions_retired, 1)
+        three_sum = self.question("3sum")
+        self.assertFalse(three_sum.is_active)
+        self.sheet.refresh_from_db()
+        self.assertEqual((self.sheet.total_questions, self.solved_count()), (2, 1))
+        # The solve itself is kept, so the score is unchanged
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.score, 15)
+
+        report = import_rows(self.sheet, self.rows)
+
+        self.assertEqual((report.questions_created, report.questions_updated), (0, 1))
+        three_sum.refresh_from_db()
+        self.assertTrue(three_sum.is_active)
+        self.sheet.refresh_from_db()
+        self.assertEqual((self.sheet.total_questions, self.solved_count()), (3, 2))
+
+    def test_retired_copy_of_a_problem_is_not_counted(self):
+        other = DSASheet.objects.create(name="other", description="other sheet")
+        import_rows(other, [self.row("Warmup", "Two Sum", "two-sum")])
+        import_rows(self.sheet, self.rows[1:], retire_missing=True)
+        twin = Question.objects.get(topic__sheet=other)
+
+        solve_question(self.user, twin)
+        self.sheet.refresh_from_db()
+        self.assertEqual((self.sheet.total_questions, self.solved_count(), self.solved_count(other)), (2, 0, 1))
+
+        unsolve_question(self.user, twin)
+        self.assertEqual((self.solved_count(), self.solved_count(other)), (0, 0))
+
+        # Reactivating the retired copy credits the solve made through the other sheet
+        solve_question(self.user, twin)
+        import_rows(self.sheet, self.rows)
+        self.assertEqual(self.solved_count(), 1)
+
+    def reimport(self, name, size):
+        """Run the destructive reimport of a sheet with `size` questions, returning its query count."""
+        with tempfile.NamedTemporaryFile("w", suffix=".tsv", delete=False, encoding="utf-8") as f:
+            f.write("Problem Name\tProblem Link\tTopic\tSolution Link\tDifficulty\n")
+            for i in range(size):
+                f.write(f"Problem {i}\thttps://leetcode.com/problems/{name}-{i}/\tTopic {i % 4}\t\tEasy\n")
+        self.addCleanup(os.remove, f.name)
+        call_command("reimport_questions", f.name, name, stdout=io.StringIO())
+        sheet = DSASheet.objects.get(name=name)
+        for question in Question.objects.filter(topic__sheet=sheet)[:2]:
+            solve_question(self.user, question)
+            MarkdownNote.objects.create(user=self.user, question=question, content="note")
+        with CaptureQueriesContext(connection) as ctx:
+            call_command("reimport_questions", f.name, name, stdout=io.StringIO())
+        return len(ctx)
+
+    def test_destructive_reimport_query_count_is_flat(self):
+        small, large = self.reimport("small", 4), self.reimport("large", 60)
+        self.assertEqual(small, large)
+        self.assertLess(large, 40)
+        sheet = DSASheet.objects.get(name="large")
+        self.assertEqual((sheet.total_questions, sheet.topics.count()), (60, 4))
+
+
+class StubLeetCode:
+    """A local stand-in for the LeetCode GraphQL endpoint that counts its requests."""
+
+    def __init__(self, problems):
+        self.problems = problems
+        self.requests = []
+        # Status codes to answer with before serving normally
+        self.statuses = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                slug = body["variables"]["titleSlug"]
+                stub.requests.append(slug)
+                payload = json.dumps({"data": {"question": stub.problems.get(slug)}}).encode()
+                self.send_response(stub.statuses.pop(0) if stub.statuses else 200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/graphql"
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class LeetCodeProblemCacheTests(TestCase):
+    PROBLEMS = {
+        "two-sum": {
+            "title": "Two Sum",
+            "content": "<p>Given an array <code>nums</code>.</p><pre>Input: [2,7]</pre>",
+            "codeSnippets": [
+                {"lang": "C++", "code": "class Solution {};"},
+                {"lang": "Python3", "code": "class Solution:"},
+            ],
+        },
+    }
+
+    def setUp(self):
+        evict_local_problem()
+        self.addCleanup(evict_local_problem)
+        self.stub = self.enterContext(StubLeetCode(self.PROBLEMS))
+        self.enterContext(override_settings(LEETCODE_GRAPHQL_URL=self.stub.url))
+
+    def test_repeat_requests_make_one_outbound_call(self):
+        first = get_leetcode_problem_html("two-sum", "C++")
+        self.assertEqual(first, {
+            "title": "Two Sum",
+            "content_text": "Given an array nums.\nInput: [2,7]",
+            "code": "class Solution {};",
+        })
+
+        with self.assertNumQueries(0):
+            self.assertEqual(get_leetcode_problem_html("two-sum", "Python3")["code"], "class Solution:")
+        self.assertEqual(get_leetcode_problem_html("two-sum", "Rust")["code"], "")
+        self.assertEqual(self.stub.requests, ["two-sum"])
+
+    def test_stored_problems_survive_the_process_cache(self):
+        get_leetcode_problem_html("two-sum")
+        evict_local_problem()
+
+        with self.assertNumQueries(1):
+            self.assertEqual(get_leetcode_problem_html("two-sum")["title"], "Two Sum")
+        self.assertEqual(self.stub.requests, ["two-sum"])
+        self.assertEqual(LeetCodeProblem.objects.get().code_snippets["C++"], "class Solution {};")
+
+    def test_unknown_slug_is_not_cached(self):
+        self.assertEqual(get_leetcode_problem_html("no-such-problem"), {"error": "Problem not found."})
+        get_leetcode_problem_html("no-such-problem")
+        self.assertEqual(self.stub.requests, ["no-such-problem", "no-such-problem"])
+        self.assertFalse(LeetCodeProblem.objects.exists())
+
+
+class OutboundHttpClientTests(TestCase):
+    def setUp(self):
+        self.stub = self.enterContext(StubLeetCode(LeetCodeProblemCacheTests.PROBLEMS))
+        self.enterContext(override_settings(LEETCODE_GRAPHQL_URL=self.stub.url))
+        self.http = self.enterContext(use_client(HttpClient(retries=2, backoff=0, breaker_threshold=2)))
+        self.host = self.stub.url.split("/")[2]
+
+    def test_transient_errors_are_retried(self):
+        self.stub.statuses = [503, 502]
+        self.assertEqual(fetch_problem("two-sum")["title"], "Two Sum")
+        self.assertEqual(self.stub.requests, ["two-sum"] * 3)
+        metrics = self.http.metrics()[self.host]
+        self.assertEqual((metrics["requests"], metrics["errors"], metrics["retries"]), (3, 2, 2))
+        self.assertEqual(metrics["circuit"], "closed")
+
+    def test_circuit_opens_after_repeated_failures(self):
+        self.stub.statuses = [500] * 10
+        for _ in range(2):
+            with self.assertRaises(requests.HTTPError):
+                fetch_problem("two-sum")
+        with self.assertRaises(CircuitOpenError):
+            fetch_problem("two-sum")
+        # 500 is not retried, and the open circuit sends nothing
+        self.assertEqual(len(self.stub.requests), 2)
+        self.assertEqual(self.http.metrics()[self.host]["rejected"], 1)
+
+        # Once the cooldown passes, one successful trial closes it
+        self.http.breakers[self.host].opened_at -= self.http.breaker_cooldown
+        self.stub.statuses = []
+        self.assertEqual(fetch_problem("two-sum")["title"], "Two Sum")
+        self.assertEqual(self.http.metrics()[self.host]["circuit"], "closed")
+
+    def test_unexpected_error_in_trial_call_still_settles_the_circuit(self):
+        self.stub.statuses = [500] * 2
+        for _ in range(2):
+            with self.assertRaises(requests.HTTPError):
+                fetch_problem("two-sum")
+        breaker = self.http.breakers[self.host]
+        breaker.opened_at -= self.http.breaker_cooldown
+
+        with mock.patch.object(self.http.session, "request", side_effect=ValueError("bad payload")):
+            with self.assertRaises(ValueError):
+                fetch_problem("two-sum")
+        # The trial slot is released instead of leaving the circuit stuck mid-trial
+        self.assertFalse(breaker.trial_running)
+        self.assertEqual(fetch_problem("two-sum")["title"], "Two Sum")
+        self.assertEqual(breaker.state, "closed")
+
+    def test_only_host_failures_count_against_the_circuit(self):
+        fetch_problem("two-sum")
+        breaker = self.http.breakers[self.host]
+        for error in (requests.exceptions.InvalidHeader("bad header"), requests.exceptions.MissingSchema("no scheme")):
+            with mock.patch.object(self.http.session, "request", side_effect=error) as request:
+                for _ in range(3):
+                    with self.assertRaises(type(error)):
+                        fetch_problem("two-sum")
+            # Caller errors are neither retried nor recorded
+            self.assertEqual(request.call_count, 3)
+        self.assertEqual((breaker.failures, breaker.state), (0, "closed"))
+
+        # Rate limiting is retried, but the host did answer
+        self.stub.statuses = [429] * 3
+        with self.assertRaises(requests.HTTPError):
+            fetch_problem("two-sum")
+        self.assertEqual((breaker.failures, breaker.state), (0, "closed"))
+
+        with mock.patch.object(self.http.session, "request", side_effect=requests.Timeout("slow")):
+            with self.assertRaises(requests.Timeout):
+                fetch_problem("two-sum")
+        self.stub.statuses = [500]
+        with self.assertRaises(requests.HTTPError):
+            fetch_problem("two-sum")
+        self.assertEqual(breaker.state, "open")
+
+    def test_caller_error_in_trial_call_leaves_the_circuit_open(self):
+        self.stub.statuses = [500] * 2
+        for _ in range(2):
+            with self.assertRaises(requests.HTTPError):
+                fetch_problem("two-sum")
+        breaker = self.http.breakers[self.host]
+        breaker.opened_at -= self.http.breaker_cooldown
+
+        with mock.patch.object(self.http.session, "request", side_effect=requests.exceptions.InvalidURL("bad url")):
+            with self.assertRaises(requests.exceptions.InvalidURL):
+                fetch_problem("two-sum")
+        self.assertEqual((breaker.trial_running, breaker.state, breaker.failures), (False, "open", 2))
+        # The next call is the trial
+        self.assertEqual(fetch_problem("two-sum")["title"], "Two Sum")
+        self.assertEqual(breaker.state, "closed")
+
+    def test_metrics_are_served_to_staff_only(self):
+        fetch_problem("two-sum")
+        member = CustomUser.objects.create_user("member@example.com", "member", "Member", "pw")
+        self.client.force_login(member)
+        self.assertEqual(self.client.get("/questions/health/http/").status_code, 403)
+
+        staff = CustomUser.objects.create_superuser("staff@example.com", "staff", "Staff", "pw")
+        self.client.force_login(staff)
+        response = self.client.get("/questions/health/http/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[self.host]["requests"], 1)
+        self.assertEqual(response.json()[self.host]["circuit"], "closed")
+
+    def test_client_can_be_replaced_by_a_fake(self):
+        class FakeClient:
+            def post(self, url, **kwargs):
+                response = requests.Response()
+                response.status_code = 200
+                response._content = json.dumps({"data": {"question": {"title": "Fake", "content": "<p>x</p>"}}}).encode()
+                return response
+
+        with use_client(FakeClient()):
+            self.assertEqual(fetch_problem("anything"), {"title": "Fake", "content_text": "x", "code_snippets": {}})
+        self.assertEqual(self.stub.requests, [])
+
+    def test_solution_view_answers_503_when_leetcode_fails(self):
+        CustomUser.objects.create_user("learner@example.com", "learner", "Learner", "pw")
+        evict_local_problem()
+
+        class FailingClient:
+            def __init__(self, error):
+                self.error = error
+
+            def post(self, url, **kwargs):
+                raise self.error
+
+        for error in (requests.Timeout("slow"), CircuitOpenError("open")):
+            with use_client(FailingClient(error)):
+                response = self.client.post("/questions/stream_output/", {"email": "learner@example.com", "slug": "two-sum"})
+            self.assertEqual(response.status_code, 503)
+            self.assertIn("error", response.json())
+
+
+class PrewarmProblemsTests(TestCase):
+    def setUp(self):
+        problems = {
+            slug: {"title": slug.title(), "content": f"<p>{slug}</p>", "codeSnippets": []}
+            for slug in ("two-sum", "3sum", "valid-anagram")
+        }
+        self.stub = self.enterContext(StubLeetCode(problems))
+        self.enterContext(override_settings(LEETCODE_GRAPHQL_URL=self.stub.url))
+        import_rows(DSASheet.objects.create(name="warm", description="warm sheet"), [
+            {"topic": "Arrays", "question": slug, "link": f"https://leetcode.com/problems/{slug}/description/"}
+            for slug in ("two-sum", "3sum", "valid-anagram", "deleted-problem")
+        ] + [{"topic": "Arrays", "question": "gfg", "link": "https://www.geeksforgeeks.org/some-problem/"}])
+
+    def test_fetches_catalog_slugs_once(self):
+        LeetCodeProblem.objects.create(slug="valid-anagram", title="Valid Anagram", content_text="stored")
+
+        report = prewarm_problems(workers=3, rate=0, batch_size=1)
+
+        self.assertEqual((report.stored, report.skipped, report.missing, report.failed), (2, 1, ["deleted-problem"], {}))
+        self.assertEqual(sorted(self.stub.requests), ["3sum", "deleted-problem", "two-sum"])
+        self.assertEqual(LeetCodeProblem.objects.get(slug="3sum").content_text, "3sum")
+        self.assertEqual(LeetCodeProblem.objects.get(slug="valid-anagram").content_text, "stored")
+
+        self.stub.requests.clear()
+        report = prewarm_problems(rate=0)
+        self.assertEqual((report.stored, report.skipped), (0, 3))
+        self.assertEqual(self.stub.requests, ["deleted-problem"])
+
+
+class ExtractFormattedTextTests(TestCase):
+    """Golden files: questions/testdata/html_to_text/<name>.html and the expected <name>.txt."""
+
+    def corpus(self):
+        for name in sorted(os.listdir(HTML_TO_TEXT_CORPUS)):
+            if name.endswith(".html"):
+                path = os.path.join(HTML_TO_TEXT_CORPUS, name)
+                with open(path, encoding="utf-8") as f, open(path[:-len(".html")] + ".txt", encoding="utf-8") as g:
+                    yield name, f.read(), g.read()
+
+    def test_matches_golden_files(self):
+        for name, html, expected in self.corpus():
+            with self.subTest(name):
+                self.assertEqual(extract_formatted_text(html), expected)
+
+    def test_matches_the_beautifulsoup_implementation(self):
+        for name, html, expected in self.corpus():
+            with self.subTest(name):
+                self.assertEqual(extract_formatted_text_soup(html), expected)
+
+        rng = random.Random(23)
+        pieces = ["<p>", "</p>", "<pre>", "</pre>", "<br>", "<br/>", "</br>", "<li>", "<b>", "</b>", "<script>x</script>",
+                  "<!-- c -->", " ", "\n", "\t", "a b", "&amp;", "&nbsp;", "&#150;", "&bogus;", "<textarea>", "</div>"]
+        for _ in range(500):
+            html = "".join(rng.choice(pieces) for _ in range(rng.randint(0, 30)))
+            self.assertEqual(extract_formatted_text(html), extract_formatted_text_soup(html), html)
+
+
+class FakeGemini:
+    """Streams fixed chunks, optionally holding the stream until `gate` is set or failing midway."""
+
+    def __init__(self, chunks, fail_after=None):
+        self.chunks = chunks
+        self.fail_after = fail_after
+        self.calls = []
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def generate_content(self, prompt, stream, generation_config):
+        self.calls.append(prompt)
+        return self.stream()
+
+    def stream(self):
+        self.gate.wait(5)
+        for i, text in enumerate(self.chunks):
+            if i == self.fail_after:
+                raise RuntimeError("quota exceeded")
+            yield mock.Mock(text=text)
+
+
+# The generation thread writes the cache on its own connection, so no wrapping test transaction
+class SolutionCacheTests(TransactionTestCase):
+    def setUp(self):
+        CustomUser.objects.create_user("learner@example.com", "learner", "Learner", "pw")
+        LeetCodeProblem.objects.create(
+            slug="two-sum", title="Two Sum", content_text="Find two numbers.",
+            code_snippets={"C++": "class Solution {};", "Python3": "class Solution:"},
+        )
+        evict_local_problem()
+        self.addCleanup(evict_local_problem)
+        self.gemini = FakeGemini(["## Approach", "\nUse a hash map."])
+        self.enterContext(mock.patch("questions.solutions.model", self.gemini))
+
+    def ask(self, lang="C++"):
+        response = self.client.post("/questions/stream_output/", {"email": "learner@example.com", "slug": "two-sum", "lang": lang})
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        return b"".join(response.streaming_content).decode()
+
+    def events(self, body):
+        return [json.loads(line[len("data: "):]) for line in body.split("\n\n") if line]
+
+    def test_repeat_requests_replay_the_cached_stream(self):
+        first = self.ask()
+        self.assertEqual(self.events(first), [
+            {"type": "content", "content": "## Approach", "status": "generating"},
+            {"type": "content", "content": "\nUse a hash map.", "status": "generating"},
+            {"type": "complete", "content": "", "status": "completed"},
+        ])
+        self.assertIn("class Solution {};", self.gemini.calls[0])
+
+        self.assertEqual(self.ask(), first)
+        self.assertEqual(len(self.gemini.calls), 1)
+
+        # Another language is another solution
+        self.ask("Python3")
+        self.assertEqual(len(self.gemini.calls), 2)
+        self.assertEqual(CachedSolution.objects.count(), 2)
+
+    def test_concurrent_misses_share_one_generation(self):
+        self.gemini.gate.clear()
+        problem = get_leetcode_problem_html("two-sum")
+        leader = stream_solution("two-sum", "C++", problem)
+        follower = stream_solution("two-sum", "C++", problem)
+        self.gemini.gate.set()
+
+        self.assertEqual(list(leader), list(follower))
+        self.assertEqual(len(self.gemini.calls), 1)
+        self.assertEqual(CachedSolution.objects.get().chunks, ["## Approach", "\nUse a hash map."])
+
+    def test_failed_generations_are_not_cached(self):
+        self.gemini.fail_after = 1
+        events = self.events(self.ask())
+        self.assertEqual(events[-1], {"type": "error", "content": "quota exceeded", "status": "error"})
+        self.assertFalse(CachedSolution.objects.exists())
+
+        self.gemini.fail_after = None
+        self.assertEqual(self.events(self.ask())[-1]["type"], "complete")
+        self.assertEqual(len(self.gemini.calls), 2)
+
+
+    def test_readers_end_with_an_error_if_the_drain_thread_dies(self):
+        broken = mock.Mock()
+        broken.close.side_effect = RuntimeError("connection lost")
+        # Closing the connection fails before the generation is marked finished
+        with mock.patch("questions.solutions.connection", broken), \
+                mock.patch("questions.solutions.DRAIN_CHECK_SECONDS", 0.05), \
+                mock.patch("threading.excepthook"):
+            events = self.events("".join(stream_solution("two-sum", "C++", get_leetcode_problem_html("two-sum"))))
+        self.assertEqual(events[-1], {"type": "error", "content": "Solution generation stopped unexpectedly", "status": "error"})
+
+        # The dead generation left the in-flight table, so the next miss starts afresh
+        CachedSolution.objects.all().delete()
+        self.assertEqual(self.events(self.ask())[-1]["type"], "complete")
+        self.assertEqual(len(self.gemini.calls), 2)
+
+@skipIf(connection.vendor == "sqlite", "SQLite serializes writers; run against PostgreSQL")
+class ConcurrentSolveTests(TransactionTestCase):
+    THREADS = 8
+
+    def setUp(self):
+        self.user = CustomUser.objects.create_user("racer@example.com", "racer", "Racer", "pw")
+        self.sheet = DSASheet.objects.create(name="race", description="race sheet")
+        topic = Topic.objects.create(sheet=self.sheet, name="Race")
+        difficulties = ["EASY", "MEDIUM", "HARD", "UNMARKED"]
+        self.questions = [
+            Question.objects.create(
+                topic=topic,
+                question=f"race question {i}",
+                link=f"https://leetcode.com/problems/race-{i}/",
+                platform="leetcode",
+                difficulty=difficulties[i % len(difficulties)],
+            )
+            for i in range(20)
+        ]
+
+    def hammer(self, action):
+        """Run action on every question from every thread, in a different order per thread."""
+        errors = []
+        barrier = threading.Barrier(self.THREADS)
+
+        def worker(seed):
+            try:
+                user = CustomUser.objects.get(pk=self.user.pk)
+                questions = list(Question.objects.select_related("topic").filter(topic__sheet=self.sheet))
+                random.Random(seed).shuffle(questions)
+                barrier.wait()
+                for question in questions:
+                    action(user, question)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(self.THREADS)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(errors, [])
+
+    def test_parallel_solves_and_unsolves_keep_counts_exact(self):
+        self.hammer(solve_question)
+
+        self.user.refresh_from_db()
+        progress = UserSheetProgress.objects.get(user=self.user, sheet=self.sheet)
+        self.assertEqual(self.user.score, sum(q.get_score() for q in self.questions))
+        self.assertEqual(progress.solved_count, 20)
+        self.assertEqual(progress.solved_easy, 5)
+        self.assertEqual(progress.solved_medium, 5)
+        self.assertEqual(progress.solved_hard, 5)
+        self.assertEqual(UserQuestionStatus.objects.filter(user=self.user, status="SOLVED").count(), 20)
+
+        self.hammer(unsolve_question)
+
+        self.user.refresh_from_db()
+        progress.refresh_from_db()
+        self.assertEqual(self.user.score, 0)
+        self.assertEqual(self.user.rank, "Chulbul Pandey")
+        self.assertEqual(
+            (progress.solved_count, progress.solved_easy, progress.solved_medium, progress.solved_hard),
+            (0, 0, 0, 0),
+        )
+
+
+class QueryPlanTests(TestCase):
+    """Hot lookups must have an index path; a sequential scan of their table fails the test."""
+
+    def setUp(self):
+        self.user = CustomUser.objects.create_user("planner@example.com", "planner", "Planner", "pw")
+        self.sheet = make_sheet("plan", topic_count=2, questions_per_topic=5)
+        self.question = Question.objects.filter(topic__sheet=self.sheet).first()
+        UserQuestionStatus.objects.create(user=self.user, question=self.question, status="SAVED")
+        if connection.vendor == "postgresql":
+            # Tiny test tables are cheaper to scan, so only fall back to a seq scan when no index applies
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+
+    def assertUsesIndex(self, queryset):
+        table = queryset.model._meta.db_table
+        plan = queryset.explain()
+        if connection.vendor == "postgresql":
+            self.assertNotRegex(plan, rf"Seq Scan on {table}\b", plan)
+        else:
+            # SQLite: "SCAN <table>" without "USING ... INDEX" walks the whole table
+            self.assertIsNone(re.search(rf"\bSCAN {table}\b(?! USING)", plan), plan)
+
+    def test_status_existence_probe(self):
+        self.assertUsesIndex(
+            UserQuestionStatus.objects.filter(user=self.user, question=self.question, status="SOLVED")
+        )
+
+    def test_saved_questions_scan(self):
+        self.assertUsesIndex(UserQuestionStatus.objects.filter(user=self.user, status="SAVED"))
+
+    def test_user_statuses_in_sheet(self):
+        self.assertUsesIndex(
+            UserQuestionStatus.objects.filter(user=self.user, question__topic__sheet=self.sheet)
+        )
+
+    def test_status_overlay(self):
+        self.assertUsesIndex(UserQuestionStatus.objects.filter(user=self.user).order_by("pk"))
+
+    def test_global_leaderboard_page(self):
+        self.assertUsesIndex(CustomUser.objects.order_by("-score", "id")[:50])
+
+    def test_sheet_leaderboard(self):
+        self.assertUsesIndex(
+            UserSheetProgress.objects.filter(sheet=self.sheet, solved_count__gt=0).order_by("-solved_count", "user_id")[:10]
+        )
+
+    @skipIf(connection.vendor != "postgresql", "full-text search needs PostgreSQL")
+    def test_admin_note_content_search(self):
+        UserNote.objects.create(user=self.user, question=self.question, content="two pointers")
+        request = RequestFactory().get("/admin/questions/usernote/")
+        queryset, _ = site._registry[UserNote].get_search_results(request, UserNote.objects.all(), "pointers")
+        self.assertUsesIndex(queryset)
+
+    @skipIf(connection.vendor != "postgresql", "full-text search needs PostgreSQL")
+    def test_question_search_with_notes(self):
+        MarkdownNote.objects.create(user=self.user, question=self.question, content="two pointers")
+        UserNote.objects.create(user=self.user, question=self.question, content="sliding window")
+        plan = search_questions("pointers", self.user).explain()
+        for table in ("questions_question", "questions_markdownnote", "questions_usernote"):
+            self.assertNotRegex(plan, rf"Seq Scan on {table}\b", plan)
+        self.assertIn("question_search_vector_gin", plan)
+
+        # Both note kinds filter on the expression their content index covers
+        query = SearchQuery("pointers", config="english")
+        for model, index in ((MarkdownNote, "markdownnote_content_search_gin"), (UserNote, "usernote_content_search_gin")):
+            notes = model.objects.annotate(vector=SearchVector("content", config="english")).filter(vector=query)
+            self.assertIn(index, notes.explain())
@@ -1,15 +1,26 @@
 from django.urls import path
-from .views import DSASheetListView, DSASheetDetailView, get_user_sheet_progress, TopicsWithQuestionsView, update_question_status, UserNoteView, SavedQuestionsByTopicView, TopicQuestionsNotesView, MarkdownNoteUpsertView, my_streaming_view
+from .views import search_questions_view
+from .views import sheet_leaderboard, sheet_leaderboard_standing, topic_leaderboard, topic_leaderboard_standing
+from .views import DSASheetListView, DSASheetDetailView, get_user_sheet_progress, TopicsWithQuestionsView, update_question_status, update_question_status_batch, UserNoteView, SavedQuestionsByTopicView, TopicQuestionsNotesView, SheetNotesExportView, NotesExportView, MarkdownNoteUpsertView, my_streaming_view, outbound_http_metrics
 
 urlpatterns = [
     path('sheets/', DSASheetListView.as_view(), name='sheet-list'),
     path('sheets/<int:sheet_id>/', DSASheetDetailView.as_view(), name='sheet-detail'),
     path('progress/<str:user_name>/<int:sheet_id>/', get_user_sheet_progress, name='get_user_sheet_progress'),
+    path('leaderboard/sheets/<int:sheet_id>/', sheet_leaderboard, name='sheet-leaderboard'),
+    path('leaderboard/sheets/<int:sheet_id>/<str:user_name>/', sheet_leaderboard_standing, name='sheet-leaderboard-standing'),
+    path('leaderboard/topics/<int:topic_id>/', topic_leaderboard, name='topic-leaderboard'),
+    path('leaderboard/topics/<int:topic_id>/<str:user_name>/', topic_leaderboard_standing, name='topic-leaderboard-standing'),
     path('sheets/<int:sheet_id>/topics-with-questions/', TopicsWithQuestionsView.as_view(), name='topics-with-questions'),
+    path('search/', search_questions_view, name='question-search'),
     path("update-status/", update_question_status, name="update_question_status"),
+    path("update-status/batch/", update_question_status_batch, name="update_question_status_batch"),
     path('notes/', UserNoteView.as_view(), name='user-notes'),
     path('saved/', SavedQuestionsByTopicView.as_view(), name='saved-questions'),
     path('topic/questions-notes/', TopicQuestionsNotesView.as_view()),
+    path('sheet/notes-export/', SheetNotesExportView.as_view(), name='sheet-notes-export'),
+    path('notes/export/', NotesExportView.as_view(), name='notes-export'),
     path('markdown-note/upsert/', MarkdownNoteUpsertView.as_view()),
     path('stream_output/', my_streaming_view, name='stream_output'),
+    path('health/http/', outbound_http_metrics, name='outbound-http-metrics'),
 ]
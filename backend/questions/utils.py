@@ -1,97 +1,211 @@
-import requests
-from bs4 import BeautifulSoup
-from bs4.element import NavigableString
+import re
+from html.entities import html5
+from html.parser import HTMLParser
+from urllib.parse import urlsplit
 
+LEETCODE_PROBLEM_PATH = re.compile(r"^/problems/([^/]+)")
 
-def extract_formatted_text(html_content):
+
+def leetcode_slug(link):
     """
-    Convert HTML content to well-formatted plain text.
-    Handles newlines and spacing for readability.
+    Extract the problem slug from a leetcode.com problem URL, or None.
     """
-    soup = BeautifulSoup(html_content, "html.parser")
+    parts = urlsplit(link.strip().lower())
+    if parts.netloc.removeprefix("www.") != "leetcode.com":
+        return None
+    match = LEETCODE_PROBLEM_PATH.match(parts.path)
+    return match.group(1) if match else None
+
 
-    # Add newlines before and after block-level elements
-    block_tags = ['p', 'pre', 'ul', 'ol', 'li', 'div', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6']
-    for tag in soup.find_all(block_tags):
-        tag.insert_before(NavigableString("\n"))
-        tag.insert_after(NavigableString("\n"))
+def normalize_problem_link(link):
+    """
+    Reduce a problem URL to a stable identity for matching.
 
-    # Replace <br> with line breaks
-    for br in soup.find_all("br"):
-        br.replace_with("\n")
+    Scheme, "www.", query string, fragment and trailing slashes are dropped,
+    and LeetCode links collapse to their /problems/<slug> so that
+    ".../two-sum/" and ".../two-sum/description/" compare equal.
 
-    # Optional: Format <pre> code blocks more clearly
-    for pre in soup.find_all("pre"):
-        text = pre.get_text(strip=True)
-        pre.string = f"\n{text}\n"
+    Returns:
+        str: e.g. "leetcode.com/problems/two-sum", or "" for an empty link.
+    """
+    if not link or not link.strip():
+        return ""
+    slug = leetcode_slug(link)
+    if slug:
+        return f"leetcode.com/problems/{slug}"
+    parts = urlsplit(link.strip().lower())
+    return f"{parts.netloc.removeprefix('www.')}{parts.path.rstrip('/')}"
 
-    # Convert to plain text
-    text = soup.get_text()
 
-    # Remove excessive empty lines
-    lines = [line.strip() for line in text.splitlines()]
-    cleaned_text = "\n".join([line for line in lines if line])
+# Tags extract_formatted_text puts on lines of their own
+BLOCK_TAGS = frozenset(['p', 'pre', 'ul', 'ol', 'li', 'div', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6'])
 
-    return cleaned_text
+# The rest mirror how BeautifulSoup's html.parser tree builder shapes the
+# document, so both converters see the same text in the same places.
+# Elements closed as soon as they open
+VOID_TAGS = frozenset([
+    'area', 'base', 'basefont', 'bgsound', 'br', 'col', 'command', 'embed', 'frame', 'hr', 'image',
+    'img', 'input', 'isindex', 'keygen', 'link', 'menuitem', 'meta', 'nextid', 'param', 'source',
+    'spacer', 'track', 'wbr',
+])
+# Elements whose text is left out of the document text
+HIDDEN_TEXT_TAGS = frozenset(['rt', 'rp', 'style', 'script', 'template'])
+# Elements whose whitespace-only strings are kept verbatim
+PRESERVE_WHITESPACE_TAGS = frozenset(['pre', 'textarea'])
+ASCII_SPACES = '\x20\x0a\x09\x0c\x0d'
 
 
-def get_leetcode_problem_html(slug, lang="C++"):
+class _TextExtractor(HTMLParser):
     """
-    Fetch LeetCode problem title, clean description text, and starter code.
-    
-    Args:
-        slug (str): Problem slug (e.g., "set-matrix-zeroes")
-        lang (str): Programming language for starter code (default: "C++")
-    
-    Returns:
-        dict: {'title': ..., 'content_text': ..., 'code': ...}
+    Single-pass HTML to text: block tags and <br> become newlines and each
+    outermost <pre> collapses to its stripped strings joined together.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=False)
+        self.parts = []
+        self.open_tags = []
+        self.closed_voids = []
+        # Character data since the last tag, comment or declaration
+        self.data = []
+        self.pre_parts = []
+        self.depth = dict.fromkeys(('br', 'pre', 'hidden', 'whitespace'), 0)
+
+    def emit(self, text, hidden=False):
+        # Anything under a <br> is dropped along with it
+        if self.depth['br'] or hidden:
+            return
+        if self.depth['pre']:
+            self.pre_parts.append(text.strip())
+        else:
+            self.parts.append(text)
+
+    def flush(self, cdata=False):
+        if not self.data:
+            return
+        text = ''.join(self.data)
+        self.data = []
+        if not self.depth['whitespace'] and not text.strip(ASCII_SPACES):
+            text = '\n' if '\n' in text else ' '
+        self.emit(text, hidden=self.depth['hidden'] and not cdata)
+
+    def open_tag(self, tag):
+        if tag in BLOCK_TAGS or tag == 'br':
+            self.emit('\n')
+        self.open_tags.append(tag)
+        if tag == 'br':
+            self.depth['br'] += 1
+        elif tag == 'pre':
+            self.depth['pre'] += 1
+        if tag in HIDDEN_TEXT_TAGS:
+            self.depth['hidden'] += 1
+        if tag in PRESERVE_WHITESPACE_TAGS:
+            self.depth['whitespace'] += 1
+
+    def close_tag(self, tag=None):
+        """
+        Close the innermost open tag of this name and everything inside it,
+        or every open tag; a tag that is not open is ignored.
+        """
+        if tag is None:
+            index = 0
+        elif tag in self.open_tags:
+            index = len(self.open_tags) - 1 - self.open_tags[::-1].index(tag)
+        else:
+            return
+        while len(self.open_tags) > index:
+            tag = self.open_tags.pop()
+            if tag == 'br':
+                self.depth['br'] -= 1
+            elif tag == 'pre':
+                self.depth['pre'] -= 1
+                if not self.depth['pre']:
+                    self.emit(f"\n{''.join(self.pre_parts)}\n")
+                    self.pre_parts = []
+            if tag in HIDDEN_TEXT_TAGS:
+                self.depth['hidden'] -= 1
+            if tag in PRESERVE_WHITESPACE_TAGS:
+                self.depth['whitespace'] -= 1
+            if tag in BLOCK_TAGS:
+                self.emit('\n')
+
+    def handle_starttag(self, tag, attrs, close_void=True):
+        self.flush()
+        self.open_tag(tag)
+        if close_void and tag in VOID_TAGS:
+            self.close_tag(tag)
+            # A later </br> for it is ignored
+            self.closed_voids.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs, close_void=False)
+        self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if tag in self.closed_voids:
+            self.closed_voids.remove(tag)
+            return
+        self.flush()
+        self.close_tag(tag)
+
+    def handle_data(self, data):
+        self.data.append(data)
+
+    def handle_charref(self, name):
+        code = int(name[1:], 16) if name[:1] in ('x', 'X') else int(name)
+        data = None
+        if code < 256:
+            # Numeric references below 256 are often really Windows-1252
+            try:
+                data = bytes([code]).decode('windows-1252')
+            except UnicodeDecodeError:
+                pass
+        if not data:
+            try:
+                data = chr(code)
+            except (ValueError, OverflowError):
+                pass
+        self.data.append(data or '\N{REPLACEMENT CHARACTER}')
+
+    def handle_entityref(self, name):
+        self.data.append(html5.get(f'{name};', f'&{name}'))
+
+    def handle_comment(self, data):
+        self.flush()
+
+    def handle_decl(self, data):
+        self.flush()
+
+    def handle_pi(self, data):
+        self.flush()
+
+    def unknown_decl(self, data):
+        self.flush()
+        if data.upper().startswith('CDATA['):
+            self.data.append(data[len('CDATA['):])
+            self.flush(cdata=True)
+
+    def text(self):
+        self.close()
+        self.flush()
+        self.close_tag()
+        return ''.join(self.parts)
+
+
+def extract_formatted_text(html_content):
     """
-    url = "https://leetcode.com/graphql"
-    query = """
-    query getQuestionDetail($titleSlug: String!) {
-      question(titleSlug: $titleSlug) {
-        title
-        content
-        codeSnippets {
-          lang
-          code
-        }
-      }
-    }
+    Convert HTML content to well-formatted plain text.
+    Handles newlines and spacing for readability.
+
+    Streams html.parser events instead of building a BeautifulSoup tree
+    and walking it three times; the output is identical to the old
+    BeautifulSoup version, kept in the benchmark_text_extraction command.
     """
-    variables = {"titleSlug": slug}
-    headers = {
-        "Content-Type": "application/json",
-        "Referer": f"https://leetcode.com/problems/{slug}/",
-        "User-Agent": "Mozilla/5.0"
-    }
-    json_data = {"query": query, "variables": variables}
-    
-    response = requests.post(url, json=json_data, headers=headers)
-    response.raise_for_status()
-    data = response.json()
-    
-    question = data.get("data", {}).get("question", {})
-    if not question:
-        return {"error": "Problem not found."}
-    
-    # Convert HTML content to clean plain text
-    content_html = question.get("content", "")
-    content_text = extract_formatted_text(content_html)
-    
-    # Find starter code for the requested language
-    code_snippets = question.get("codeSnippets", [])
-    code = next((c["code"] for c in code_snippets if c["lang"] == lang), "")
-    
-    return {
-        "title": question.get("title", ""),
-        "content_text": content_text,
-        "code": code
-    }
-
-
-# Example usage
-# result = get_leetcode_problem_html("set-matrix-zeroes", "C++")
-# print("Title:", result["title"])
-# print("\nDescription:\n", result["content_text"])
-# print("\nStarter Code:\n", result["code"])
+    extractor = _TextExtractor()
+    extractor.feed(html_content)
+    text = extractor.text()
+
+    # Remove excessive empty lines
+    lines = [line.strip() for line in text.splitlines()]
+    return "\n".join([line for line in lines if line])
+
@@ -2,23 +2,27 @@ from rest_framework.views import APIView
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework import status
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticatedOrReadOnly, IsAuthenticated, AllowAny
+from rest_framework.permissions import IsAuthenticatedOrReadOnly, IsAuthenticated, AllowAny, IsAdminUser
 from .models import DSASheet, UserSheetProgress, CustomUser, Topic, Question, SCORE_MAPPING, UserQuestionStatus, UserNote, MarkdownNote
-from .serializers import DSASheetSerializer, DSASheetDetailSerializer, UserSheetProgressSerializer, TopicWithQuestionsSerializer, UserNoteSerializer, SavedQuestionSerializer, SimpleQuestionWithNoteSerializer, MarkdownNoteSerializer
-from users.utils import calculate_rank
+from .serializers import DSASheetSerializer, DSASheetDetailSerializer, UserSheetProgressSerializer, UserNoteSerializer, SavedQuestionSerializer, SimpleQuestionWithNoteSerializer, MarkdownNoteSerializer
 from django.shortcuts import get_object_or_404
+from django.db.models import Exists, OuterRef, Q, Value
 from django.http import StreamingHttpResponse
-import google.generativeai as genai  # pip install google-generativeai
 import json
-from .utils import get_leetcode_problem_html
-from django.conf import settings
+import requests
+from itertools import groupby
+from operator import attrgetter
+from backend.http_client import get_client
+from .leetcode import get_leetcode_problem_html
+from users.authentication import request_user
+from .overlay import StatusOverlay
+from .search import DEFAULT_PAGE_SIZE as SEARCH_PAGE_SIZE, MAX_PAGE_SIZE as SEARCH_MAX_PAGE_SIZE, search_page
+from .notes import iter_notes_zip, iter_sheet_notes, questions_with_notes
+from .catalog import get_sheet_catalog
+from .progress import MAX_BATCH_OPERATIONS, apply_status_operations, solve_question, unsolve_question
+from .solutions import stream_solution
+from .rankings import DEFAULT_TOP_N, MAX_TOP_N, sheet_standing, sheet_top_solvers, topic_standing, topic_top_solvers
 
-GEMINI_API_KEY = settings.GEMINI_API_KEY
-genai.configure(api_key=GEMINI_API_KEY)
-
-# client = genai.Client()
-
-model = genai.GenerativeModel("gemini-2.5-flash")
 
 class DSASheetListView(APIView):
     permission_classes = [IsAuthenticatedOrReadOnly]
@@ -45,34 +49,110 @@ class DSASheetDetailView(APIView):
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def get_user_sheet_progress(request, user_name, sheet_id):
+    # Sheet totals are denormalized onto DSASheet, so this join is the only query on the happy path
     try:
-        user = CustomUser.objects.get(username=user_name)
-    except CustomUser.DoesNotExist:
-        return Response({'detail': 'User not found'}, status=status.HTTP_404_NOT_FOUND)
-
-    try:
-        progress = UserSheetProgress.objects.get(user=user, sheet_id=sheet_id)
+        progress = UserSheetProgress.objects.select_related('sheet').get(user__username=user_name, sheet_id=sheet_id)
     except UserSheetProgress.DoesNotExist:
-        return Response({'detail': 'Progress not found'}, status=status.HTTP_404_NOT_FOUND)
+        if not CustomUser.objects.filter(username=user_name).exists():
+            return Response({'detail': 'User not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        # Progress rows are created on first solve; until then the user has solved nothing
+        sheet = DSASheet.objects.filter(id=sheet_id).first()
+        if sheet is None:
+            return Response({'detail': 'Progress not found'}, status=status.HTTP_404_NOT_FOUND)
+        progress = UserSheetProgress(sheet=sheet)
 
     serializer = UserSheetProgressSerializer(progress)
     return Response(serializer.data)
 
 
+def _top_n(request):
+    try:
+        n = int(request.GET.get('limit', DEFAULT_TOP_N))
+    except ValueError:
+        return None
+    return n if 0 < n <= MAX_TOP_N else None
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def sheet_leaderboard(request, sheet_id):
+    n = _top_n(request)
+    if n is None:
+        return Response({'detail': f'limit must be between 1 and {MAX_TOP_N}'}, status=status.HTTP_400_BAD_REQUEST)
+    if not DSASheet.objects.filter(id=sheet_id).exists():
+        return Response({'detail': 'Sheet not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    return Response({'sheet_id': sheet_id, 'users': sheet_top_solvers(sheet_id, n)})
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def sheet_leaderboard_standing(request, sheet_id, user_name):
+    user = CustomUser.objects.filter(username=user_name).first()
+    if user is None:
+        return Response({'detail': 'User not found'}, status=status.HTTP_404_NOT_FOUND)
+    if not DSASheet.objects.filter(id=sheet_id).exists():
+        return Response({'detail': 'Sheet not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    return Response({'sheet_id': sheet_id, 'username': user_name, **sheet_standing(user, sheet_id)})
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def topic_leaderboard(request, topic_id):
+    n = _top_n(request)
+    if n is None:
+        return Response({'detail': f'limit must be between 1 and {MAX_TOP_N}'}, status=status.HTTP_400_BAD_REQUEST)
+    if not Topic.objects.filter(id=topic_id).exists():
+        return Response({'detail': 'Topic not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    return Response({'topic_id': topic_id, 'users': topic_top_solvers(topic_id, n)})
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def topic_leaderboard_standing(request, topic_id, user_name):
+    user = CustomUser.objects.filter(username=user_name).first()
+    if user is None:
+        return Response({'detail': 'User not found'}, status=status.HTTP_404_NOT_FOUND)
+    if not Topic.objects.filter(id=topic_id).exists():
+        return Response({'detail': 'Topic not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    return Response({'topic_id': topic_id, 'username': user_name, **topic_standing(user, topic_id)})
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def search_questions_view(request):
+    terms = request.GET.get('q', '').strip()
+    if not terms:
+        return Response({'error': 'q is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        page = int(request.GET.get('page', 1))
+        page_size = int(request.GET.get('page_size', SEARCH_PAGE_SIZE))
+    except ValueError:
+        return Response({'error': 'page and page_size must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+    if page < 1 or not 0 < page_size <= SEARCH_MAX_PAGE_SIZE:
+        return Response(
+            {'error': f'page must be positive and page_size between 1 and {SEARCH_MAX_PAGE_SIZE}'},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    # Notes are only searched for a known user
+    user = request_user(request, email=request.GET.get('email'))
+    results, has_next = search_page(terms, user, page, page_size)
+    return Response({'query': terms, 'page': page, 'has_next': has_next, 'results': results})
+
+
 class TopicsWithQuestionsView(APIView):
     def get(self, request, sheet_id):
-        email = request.GET.get('email')
-        user = None
-
-        if email:
-            try:
-                user = CustomUser.objects.get(email=email)
-            except CustomUser.DoesNotExist:
-                user = None
+        user = request_user(request, email=request.GET.get('email'))
 
-        topics = Topic.objects.filter(sheet_id=sheet_id).order_by('-id').prefetch_related('questions').reverse()
-        serializer = TopicWithQuestionsSerializer(topics, many=True, context={'user': user})
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        catalog = get_sheet_catalog(sheet_id) or []
+        overlay = StatusOverlay.for_user(user, sheet_id=sheet_id)
+        return Response(overlay.apply(catalog), status=status.HTTP_200_OK)
 
     
 
@@ -82,64 +162,23 @@ def update_question_status(request):
     question_id = request.data.get("question_id")
     action = request.data.get("action")  # Expected: "solve", "unsolve", "save", "unsave"
 
-    if not email or not question_id or not action:
+    if not (email or request.user.is_authenticated) or not question_id or not action:
         return Response({"error": "Missing email, question_id, or action"}, status=400)
 
-    try:
-        user = CustomUser.objects.get(email=email)
-    except CustomUser.DoesNotExist:
+    user = request_user(request, email=email)
+    if user is None:
         return Response({"error": "User not found"}, status=404)
 
     try:
-        question = Question.objects.get(id=question_id)
+        question = Question.objects.select_related('topic').get(id=question_id)
     except Question.DoesNotExist:
         return Response({"error": "Question not found"}, status=404)
 
-    sheet = question.topic.sheet
-    score_value = question.get_score()
-    max_score = 1985  # Centralized value
-
     if action == "solve":
-        status_obj, created = UserQuestionStatus.objects.get_or_create(
-            user=user, question=question, status="SOLVED"
-        )
-        if created:
-            user.score += score_value
-            user.rank = calculate_rank(user.score, max_score)
-            user.save()
-
-            progress, _ = UserSheetProgress.objects.get_or_create(user=user, sheet=sheet)
-            progress.solved_count += 1
-            if question.difficulty == "EASY":
-                progress.solved_easy += 1
-            elif question.difficulty == "MEDIUM":
-                progress.solved_medium += 1
-            elif question.difficulty == "HARD":
-                progress.solved_hard += 1
-            progress.save()
+        solve_question(user, question)
 
     elif action == "unsolve":
-        try:
-            status_obj = UserQuestionStatus.objects.get(user=user, question=question, status="SOLVED")
-            status_obj.delete()
-            user.score = max(user.score - score_value, 0)
-            user.rank = calculate_rank(user.score, max_score)
-            user.save()
-
-            try:
-                progress = UserSheetProgress.objects.get(user=user, sheet=sheet)
-                progress.solved_count = max(progress.solved_count - 1, 0)
-                if question.difficulty == "EASY":
-                    progress.solved_easy = max(progress.solved_easy - 1, 0)
-                elif question.difficulty == "MEDIUM":
-                    progress.solved_medium = max(progress.solved_medium - 1, 0)
-                elif question.difficulty == "HARD":
-                    progress.solved_hard = max(progress.solved_hard - 1, 0)
-                progress.save()
-            except UserSheetProgress.DoesNotExist:
-                pass
-        except UserQuestionStatus.DoesNotExist:
-            pass
+        unsolve_question(user, question)
 
     elif action == "save":
         UserQuestionStatus.objects.get_or_create(user=user, question=question, status="SAVED")
@@ -153,19 +192,48 @@ def update_question_status(request):
     return Response({"message": f"Question {action} successful"}, status=200)
 
 
+@api_view(["POST"])
+def update_question_status_batch(request):
+    email = request.data.get("email")
+    operations = request.data.get("operations")  # [{"question_id": ..., "action": "solve" | "unsolve" | "save" | "unsave"}, ...]
+
+    if not (email or request.user.is_authenticated) or not isinstance(operations, list) or not operations:
+        return Response({"error": "Missing email or operations"}, status=400)
+
+    if len(operations) > MAX_BATCH_OPERATIONS:
+        return Response({"error": f"At most {MAX_BATCH_OPERATIONS} operations are allowed per request"}, status=400)
+
+    user = request_user(request, email=email)
+    if user is None:
+        return Response({"error": "User not found"}, status=404)
+
+    parsed = []
+    for op in operations:
+        op = op if isinstance(op, dict) else {}
+        try:
+            question_id = int(op.get("question_id"))
+        except (TypeError, ValueError):
+            question_id = None
+        parsed.append((question_id, op.get("action")))
+
+    results = apply_status_operations(user, parsed)
+    return Response({"results": results}, status=200)
+
+
 class UserNoteView(APIView):
     def get(self, request):
         email = request.query_params.get('email')
         question_id = request.query_params.get('question_id')
 
-        if not email or not question_id:
+        if not (email or request.user.is_authenticated) or not question_id:
             return Response({'error': 'Email and question_id are required.'}, status=status.HTTP_400_BAD_REQUEST)
 
+        user = request_user(request, email=email)
+        if user is None:
+            return Response({'error': 'User not found.'}, status=status.HTTP_404_NOT_FOUND)
+
         try:
-            user = CustomUser.objects.get(email=email)
             question = Question.objects.get(id=question_id)
-        except CustomUser.DoesNotExist:
-            return Response({'error': 'User not found.'}, status=status.HTTP_404_NOT_FOUND)
         except Question.DoesNotExist:
             return Response({'error': 'Question not found.'}, status=status.HTTP_404_NOT_FOUND)
 
@@ -178,14 +246,15 @@ class UserNoteView(APIView):
         question_id = request.data.get('question_id')
         content = request.data.get('content')
 
-        if not email or not question_id or not content:
+        if not (email or request.user.is_authenticated) or not question_id or not content:
             return Response({'error': 'Email, question_id and content are required.'}, status=status.HTTP_400_BAD_REQUEST)
 
+        user = request_user(request, email=email)
+        if user is None:
+            return Response({'error': 'User not found.'}, status=status.HTTP_404_NOT_FOUND)
+
         try:
-            user = CustomUser.objects.get(email=email)
             question = Question.objects.get(id=question_id)
-        except CustomUser.DoesNotExist:
-            return Response({'error': 'User not found.'}, status=status.HTTP_404_NOT_FOUND)
         except Question.DoesNotExist:
             return Response({'error': 'Question not found.'}, status=status.HTTP_404_NOT_FOUND)
 
@@ -197,14 +266,15 @@ class UserNoteView(APIView):
         email = request.data.get('email')
         note_id = request.data.get('note_id')
 
-        if not email or not note_id:
+        if not (email or request.user.is_authenticated) or not note_id:
             return Response({'error': 'Email and note_id are required.'}, status=status.HTTP_400_BAD_REQUEST)
 
+        user = request_user(request, email=email)
+        if user is None:
+            return Response({'error': 'User not found.'}, status=status.HTTP_404_NOT_FOUND)
+
         try:
-            user = CustomUser.objects.get(email=email)
             note = UserNote.objects.get(id=note_id, user=user)  # Ensure user owns the note
-        except CustomUser.DoesNotExist:
-            return Response({'error': 'User not found.'}, status=status.HTTP_404_NOT_FOUND)
         except UserNote.DoesNotExist:
             return Response({'error': 'Note not found or does not belong to user.'}, status=status.HTTP_404_NOT_FOUND)
 
@@ -216,34 +286,36 @@ class SavedQuestionsByTopicView(APIView):
 
     def get(self, request):
         email = request.query_params.get("email")
-        if not email:
+        if not (email or request.user.is_authenticated):
             return Response({"error": "Email is required"}, status=400)
 
-        try:
-            user = CustomUser.objects.get(email=email)
-        except CustomUser.DoesNotExist:
+        user = request_user(request, email=email)
+        if user is None:
             return Response({"error": "User not found"}, status=404)
 
-        saved_statuses = UserQuestionStatus.objects.filter(user=user, status="SAVED").select_related('question__topic__sheet')
-        
-        # Create mapping from topic to list of questions
-        topic_map = {}
-        for status in saved_statuses:
-            question = status.question
-            topic_obj = question.topic
-            topic_key = f"{topic_obj.name} ({topic_obj.sheet.name})"
-            
-            if topic_key not in topic_map:
-                topic_map[topic_key] = []
-
-            topic_map[topic_key].append(question)
+        # One query: saved questions with their topic and sheet, plus whether each is also solved
+        saved_questions = (
+            Question.objects.filter(user_statuses__user=user, user_statuses__status="SAVED")
+            .select_related('topic__sheet')
+            .annotate(
+                is_saved=Value(True),
+                # Solved here or, for a shared problem, in any sheet
+                is_solved=Exists(
+                    UserQuestionStatus.objects.filter(user=user, status="SOLVED").filter(
+                        Q(question=OuterRef('pk')) | Q(problem_id=OuterRef('problem_id'))
+                    )
+                ),
+            )
+            .order_by('topic__sheet_id', 'topic_id', 'id')
+        )
 
         result = []
-        for topic_name, questions in topic_map.items():
-            serialized_questions = SavedQuestionSerializer(questions, many=True, context={'user': user}).data
+        for _, questions in groupby(saved_questions.iterator(), key=attrgetter('topic_id')):
+            questions = list(questions)
+            topic_obj = questions[0].topic
             result.append({
-                "name": topic_name,
-                "questions": serialized_questions
+                "name": f"{topic_obj.name} ({topic_obj.sheet.name})",
+                "questions": SavedQuestionSerializer(questions, many=True).data,
             })
 
         return Response(result)
@@ -256,21 +328,22 @@ class TopicQuestionsNotesView(APIView):
         topic_id = request.data.get('topic_id')
         
         # Validate required fields
-        if not username or not topic_id:
+        if not (username or request.user.is_authenticated) or not topic_id:
             return Response(
                 {'error': 'Both username and topic_id are required'},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
         # Get user and topic
-        try:
-            user = CustomUser.objects.get(username=username)
-            topic = Topic.objects.get(id=topic_id)
-        except CustomUser.DoesNotExist:
+        user = request_user(request, username=username)
+        if user is None:
             return Response(
                 {'error': 'User not found'},
                 status=status.HTTP_404_NOT_FOUND
             )
+
+        try:
+            topic = Topic.objects.get(id=topic_id)
         except Topic.DoesNotExist:
             return Response(
                 {'error': 'Topic not found'},
@@ -278,18 +351,49 @@ class TopicQuestionsNotesView(APIView):
             )
         
         # Get questions with notes
-        questions = Question.objects.filter(topic=topic)
-        data = []
-        
-        for question in questions:
-            note = MarkdownNote.objects.filter(user=user, question=question).first()
-            data.append({
-                'id': question.id,
-                'question': question.question,
-                'content': note.content if note else ""
-            })
-        
-        return Response(data, status=status.HTTP_200_OK)
+        questions = questions_with_notes(user, topic=topic)
+        serializer = SimpleQuestionWithNoteSerializer(questions, many=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+class SheetNotesExportView(APIView):
+    def post(self, request):
+        username = request.data.get('username')
+        sheet_id = request.data.get('sheet_id')
+
+        if not (username or request.user.is_authenticated) or not sheet_id:
+            return Response(
+                {'error': 'Both username and sheet_id are required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        user = request_user(request, username=username)
+        if user is None:
+            return Response({'error': 'User not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        if not DSASheet.objects.filter(id=sheet_id).exists():
+            return Response({'error': 'Sheet not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        # One JSON object per line, written as rows arrive from the database
+        lines = (json.dumps(note) + "\n" for note in iter_sheet_notes(user, sheet_id))
+        response = StreamingHttpResponse(lines, content_type='application/x-ndjson')
+        response['Content-Disposition'] = f'attachment; filename="sheet-{sheet_id}-notes.ndjson"'
+        return response
+
+
+class NotesExportView(APIView):
+    def post(self, request):
+        username = request.data.get('username')
+        if not (username or request.user.is_authenticated):
+            return Response({'error': 'username is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+        user = request_user(request, username=username)
+        if user is None:
+            return Response({'error': 'User not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        response = StreamingHttpResponse(iter_notes_zip(user), content_type='application/zip')
+        response['Content-Disposition'] = f'attachment; filename="{user.username}-notes.zip"'
+        return response
 
 
 class MarkdownNoteUpsertView(APIView):
@@ -300,21 +404,22 @@ class MarkdownNoteUpsertView(APIView):
         content = request.data.get('content')
         
         # Validate required fields
-        if not username or not question_id or not content:
+        if not (username or request.user.is_authenticated) or not question_id or not content:
             return Response(
                 {'error': 'username, question_id and content are required'},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
         # Get user and question
-        try:
-            user = CustomUser.objects.get(username=username)
-            question = Question.objects.get(id=question_id)
-        except CustomUser.DoesNotExist:
+        user = request_user(request, username=username)
+        if user is None:
             return Response(
                 {'error': 'User not found'},
                 status=status.HTTP_404_NOT_FOUND
             )
+
+        try:
+            question = Question.objects.get(id=question_id)
         except Question.DoesNotExist:
             return Response(
                 {'error': 'Question not found'},
@@ -343,12 +448,11 @@ class MarkdownNoteUpsertView(APIView):
 @api_view(['POST'])
 def my_streaming_view(request):
     email = request.data.get('email')
-    if not email:
+    if not (email or request.user.is_authenticated):
         return Response({'error': 'Email is required'}, status=status.HTTP_400_BAD_REQUEST)
     
-    try:
-        user = CustomUser.objects.get(email=email)
-    except CustomUser.DoesNotExist:
+    user = request_user(request, email=email)
+    if user is None:
         return Response({"error": "User not found"}, status=status.HTTP_404_NOT_FOUND)
     
     slug = request.data.get('slug')
@@ -356,114 +460,24 @@ def my_streaming_view(request):
         return Response({"error": "Slug is required"}, status=400)
 
     preferred_lang = request.data.get('lang', 'C++')
-    data = get_leetcode_problem_html(slug, preferred_lang)
-
-    prompt = f"""
-You are an expert coding mentor specializing in data structures and algorithms.
-
-The user is solving the following LeetCode problem:
-
-**Title:** {data['title']}
-
-**Problem Description:**
-{data['content_text']}
-
-**Language:** {preferred_lang}
-
-**Starter Code:**
-```{preferred_lang.lower()}
-{data['code']}
-```
-
-**Instructions:**
-Please provide a comprehensive solution following this structure:
-
-1. **Problem Understanding**: Briefly explain what the problem is asking for and identify key constraints.
-
-2. **Approach Strategy**: 
-   - Describe the algorithmic approach you'll use
-   - Explain why this approach is suitable for this problem
-   - Mention any alternative approaches if applicable
-
-3. **Step-by-Step Solution**:
-   - Break down the solution into logical steps
-   - Explain the reasoning behind each step
-
-4. **Complete Code Solution**: 
-   - Provide the complete, working code in {preferred_lang}
-   - Use the given starter code structure
-   - Include clear comments explaining key logic
-   - Follow language-specific best practices
-
-5. **Example Walkthrough**: 
-   - Walk through the solution with at least one example from the problem
-   - Show how variables change during execution
-   - Explain the flow of logic
-
-6. **Complexity Analysis**:
-   - Time Complexity: O(?) with explanation
-   - Space Complexity: O(?) with explanation
-   - Justify your complexity analysis
-
-7. **Edge Cases & Considerations**:
-   - Mention important edge cases to consider
-   - Any potential pitfalls or optimizations
-
-**Requirements:**
-- Write clean, readable, and efficient code
-- Use meaningful variable names
-- Add inline comments for complex logic
-- Ensure the solution handles all constraints mentioned in the problem
-- Format code properly with consistent indentation
-
-Please structure your response clearly with headers for each section.
-"""
-
     try:
-        # Generate streaming response from Gemini model
-        response = model.generate_content(
-            prompt,
-            stream=True,
-            generation_config=genai.types.GenerationConfig(
-                temperature=0.7,
-                top_p=0.8,
-                top_k=40,
-                max_output_tokens=8192,
-            )
+        data = get_leetcode_problem_html(slug, preferred_lang)
+    except requests.RequestException:
+        # LeetCode is down, slow or its circuit is open
+        return Response(
+            {'error': 'LeetCode is unavailable, please try again later'},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE
         )
-        
-        def generate_response():
-            try:
-                for chunk in response:
-                    if chunk.text:
-                        # Format each chunk as JSON for frontend consumption
-                        data = {
-                            'type': 'content',
-                            'content': chunk.text,
-                            'status': 'generating'
-                        }
-                        yield f"data: {json.dumps(data)}\n\n"
-                
-                # Send completion signal
-                completion_data = {
-                    'type': 'complete',
-                    'content': '',
-                    'status': 'completed'
-                }
-                yield f"data: {json.dumps(completion_data)}\n\n"
-                
-            except Exception as e:
-                # Send error signal
-                error_data = {
-                    'type': 'error',
-                    'content': str(e),
-                    'status': 'error'
-                }
-                yield f"data: {json.dumps(error_data)}\n\n"
-        
+    if 'error' in data:
+        return Response(data, status=status.HTTP_404_NOT_FOUND)
+
+    try:
+        # Cached solutions replay at once; concurrent misses share one Gemini generation
+        events = stream_solution(slug, preferred_lang, data)
+
         # Return streaming response with appropriate headers
         streaming_response = StreamingHttpResponse(
-            generate_response(),
+            events,
             content_type='text/event-stream'
         )
         streaming_response['Cache-Control'] = 'no-cache'
@@ -476,4 +490,14 @@ Please structure your response clearly with headers for each section.
         return Response(
             {'error': f'Failed to generate response: {str(e)}'}, 
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
-        )
\ No newline at end of file
+        )
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def outbound_http_metrics(request):
+    """
+    Per-host request counts, errors, retries, latencies and circuit state of
+    this process's outbound HTTP client, for staff.
+    """
+    return Response(get_client().metrics())
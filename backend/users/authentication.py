@@ -0,0 +1,75 @@
+import copy
+import threading
+
+from cachetools import TTLCache
+from django.conf import settings
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import CustomUser
+
+# user id -> CustomUser, so a token's user is not reloaded on every request
+_users = TTLCache(maxsize=settings.JWT_USER_CACHE_SIZE, ttl=max(settings.JWT_USER_CACHE_TTL, 1))
+_users_lock = threading.Lock()
+
+
+def evict_cached_user(user_id):
+    with _users_lock:
+        _users.pop(user_id, None)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    Stateless JWT authentication that resolves the token's user id through a
+    short-lived in-process cache.
+
+    Each request gets its own copy of the cached user, so views may use it
+    like a freshly loaded instance. Fields such as score can lag by up to
+    JWT_USER_CACHE_TTL seconds; reload the user when they matter.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken("Token contained no recognizable user identification")
+
+        if settings.JWT_USER_CACHE_TTL <= 0:
+            return super().get_user(validated_token)
+
+        with _users_lock:
+            user = _users.get(user_id)
+        if user is None:
+            user = super().get_user(validated_token)
+            with _users_lock:
+                _users[user_id] = user
+        elif not user.is_active:
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+        return copy.copy(user)
+
+
+def request_user(request, **lookup):
+    """
+    The user making a request.
+
+    An authenticated request always acts as request.user, with no query,
+    whatever the parameters name. Otherwise the user is looked up by the
+    legacy email/username parameter, if given and if
+    settings.ALLOW_ANONYMOUS_USER_LOOKUP allows it.
+
+    Args:
+        request: DRF request.
+        **lookup: e.g. email=... or username=...; empty values are ignored.
+
+    Returns:
+        CustomUser or None
+    """
+    if request.user.is_authenticated:
+        return request.user
+    if not settings.ALLOW_ANONYMOUS_USER_LOOKUP:
+        return None
+    lookup = {field: value for field, value in lookup.items() if value}
+    if not lookup:
+        return None
+    return CustomUser.objects.filter(**lookup).first()
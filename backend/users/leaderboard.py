@@ -0,0 +1,123 @@
+from django.db.models import Count, F, Q, Sum
+
+from .models import CustomUser, ScoreBucket
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+MAX_NEIGHBOURS = 50
+
+
+def _shift_bucket(score, delta):
+    ScoreBucket.objects.bulk_create([ScoreBucket(score=score, user_count=0)], ignore_conflicts=True)
+    ScoreBucket.objects.filter(score=score).update(user_count=F('user_count') + delta)
+
+
+def record_score_change(old_score, new_score):
+    """
+    Move one user between score buckets. O(1) writes regardless of how many users share either score.
+
+    Buckets are touched in ascending score order so concurrent moves cannot deadlock.
+    """
+    if old_score == new_score:
+        return
+    for score, delta in sorted([(old_score, -1), (new_score, 1)]):
+        _shift_bucket(score, delta)
+
+
+def record_user_added(score):
+    _shift_bucket(score, 1)
+
+
+def record_user_removed(score):
+    _shift_bucket(score, -1)
+
+
+def rebuild_score_buckets():
+    """
+    Recompute every bucket from the user table, e.g. after scores were edited in the admin.
+
+    Returns:
+        int: Number of distinct scores.
+    """
+    counts = CustomUser.objects.values_list('score').order_by('score').annotate(n=Count('id'))
+    ScoreBucket.objects.all().delete()
+    ScoreBucket.objects.bulk_create([ScoreBucket(score=score, user_count=n) for score, n in counts])
+    return len(counts)
+
+
+def total_users():
+    """
+    Count users from the score buckets instead of scanning the user table.
+    """
+    return ScoreBucket.objects.aggregate(total=Sum('user_count'))['total'] or 0
+
+
+def positions_for_scores(scores):
+    """
+    Map each score to its leaderboard position (1 + users with a higher score) with one bucket query.
+    Tied scores share a position.
+    """
+    if not scores:
+        return {}
+    buckets = ScoreBucket.objects.filter(score__gt=min(scores)).order_by('-score').values_list('score', 'user_count')
+
+    positions, above = {}, 0
+    pending = sorted(set(scores), reverse=True)
+    for score, user_count in buckets:
+        while pending and pending[0] >= score:
+            positions[pending.pop(0)] = above + 1
+        above += user_count
+    for score in pending:
+        positions[score] = above + 1
+    return positions
+
+
+def parse_cursor(cursor):
+    """
+    Parse a "<score>:<id>" keyset cursor. Raises ValueError when malformed.
+    """
+    score, user_id = cursor.split(':')
+    return int(score), int(user_id)
+
+
+def make_cursor(user):
+    return f"{user.score}:{user.id}"
+
+
+def leaderboard_page(cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    One page of users ordered by score (highest first), then id.
+
+    Keyset pagination: the cursor is the last (score, id) seen, so every
+    page is an index range scan no matter how deep it is.
+
+    Returns:
+        tuple: (users, positions by score, next cursor or None)
+    """
+    users = CustomUser.objects.order_by('-score', 'id')
+    if cursor:
+        score, user_id = parse_cursor(cursor)
+        users = users.filter(Q(score__lt=score) | Q(score=score, id__gt=user_id))
+
+    page = list(users[:limit + 1])
+    next_cursor = make_cursor(page[limit - 1]) if len(page) > limit else None
+    page = page[:limit]
+    return page, positions_for_scores([u.score for u in page]), next_cursor
+
+
+def leaderboard_neighbours(user, k):
+    """
+    The k users ranked directly above and below a user, plus the user.
+
+    Returns:
+        tuple: (users in leaderboard order, positions by score)
+    """
+    above = CustomUser.objects.filter(
+        Q(score__gt=user.score) | Q(score=user.score, id__lt=user.id)
+    ).order_by('score', '-id')[:k]
+    below = CustomUser.objects.filter(
+        Q(score__lt=user.score) | Q(score=user.score, id__gt=user.id)
+    ).order_by('-score', 'id')[:k]
+
+    users = list(reversed(above)) + [user] + list(below)
+    return users, positions_for_scores([u.score for u in users])
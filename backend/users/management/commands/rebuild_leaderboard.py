@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from users.leaderboard import rebuild_score_buckets
+
+
+class Command(BaseCommand):
+    help = "Recount the leaderboard score buckets from user scores (e.g. after editing scores in the admin)"
+
+    def handle(self, *args, **kwargs):
+        with transaction.atomic():
+            scores = rebuild_score_buckets()
+        self.stdout.write(self.style.SUCCESS(f"Leaderboard rebuilt across {scores} distinct scores."))
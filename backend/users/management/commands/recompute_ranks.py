@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from questions.catalog import get_max_score
+from users.models import CustomUser
+from users.utils import rank_expression
+
+
+class Command(BaseCommand):
+    help = "Reassign every user's rank tier from their score and the current max score"
+
+    def handle(self, *args, **kwargs):
+        max_score = get_max_score()
+        # One UPDATE ... SET rank = CASE ... END; no per-user save()
+        updated = CustomUser.objects.exclude(rank=rank_expression(max_score)).update(rank=rank_expression(max_score))
+        self.stdout.write(self.style.SUCCESS(f"Max score is {max_score}; {updated} user ranks changed."))
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.7 on 2026-10-18 11:31
+
+# Catch-up migration for models that had drifted from the committed migrations:
+# CustomUser.preferred_language and the rank default.
+# Databases that already have them should record it without running it,
+# scoped so that later migrations still run:
+#   python manage.py migrate users 0005 --fake
+#   python manage.py migrate questions 0003 --fake
+#   python manage.py migrate
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0004_customuser_profile_banner"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="customuser",
+            name="preferred_language",
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+        migrations.AlterField(
+            model_name="customuser",
+            name="rank",
+            field=models.CharField(
+                blank=True, default="Chulbul Pandey", max_length=50, null=True
+            ),
+        ),
+    ]
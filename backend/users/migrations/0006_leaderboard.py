@@ -0,0 +1,43 @@
+# Generated by Django 5.1.7 on 2026-10-18 11:42
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_score_buckets(apps, schema_editor):
+    CustomUser = apps.get_model("users", "CustomUser")
+    ScoreBucket = apps.get_model("users", "ScoreBucket")
+    counts = CustomUser.objects.values_list("score").order_by("score").annotate(n=Count("id"))
+    ScoreBucket.objects.bulk_create([ScoreBucket(score=score, user_count=n) for score, n in counts])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auth", "0012_alter_user_first_name_max_length"),
+        ("users", "0005_customuser_preferred_language_alter_customuser_rank"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ScoreBucket",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("score", models.IntegerField(unique=True)),
+                ("user_count", models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="customuser",
+            index=models.Index(fields=["-score", "id"], name="user_leaderboard_idx"),
+        ),
+        migrations.RunPython(backfill_score_buckets, migrations.RunPython.noop),
+    ]
@@ -74,5 +74,21 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username', 'display_name']
 
+    class Meta:
+        indexes = [
+            # Leaderboard order and keyset pagination: ORDER BY score DESC, id
+            models.Index(fields=['-score', 'id'], name='user_leaderboard_idx'),
+        ]
+
     def __str__(self):
         return self.display_name
+
+
+# Materialized leaderboard: how many users hold each score. A user's position is
+# 1 + the number of users with a higher score, summed over these rows.
+class ScoreBucket(models.Model):
+    score = models.IntegerField(unique=True)
+    user_count = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.score}: {self.user_count} users"
@@ -122,6 +122,12 @@ class SocialLinksUpdateSerializer(serializers.ModelSerializer):
 
 
 class UserSummarySerializer(serializers.ModelSerializer):
+    position = serializers.SerializerMethodField()
+
     class Meta:
         model = CustomUser
-        fields = ['username','display_name', 'profile_photo', 'score', 'rank']
\ No newline at end of file
+        fields = ['username','display_name', 'profile_photo', 'score', 'rank', 'position']
+
+    def get_position(self, obj):
+        # Leaderboard positions by score, computed once per page by the view
+        return self.context.get('positions', {}).get(obj.score)
@@ -1,18 +1,25 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save, pre_delete
 from django.dispatch import receiver
+
+from .authentication import evict_cached_user
+from .leaderboard import record_user_added, record_user_removed
 from .models import CustomUser
-from questions.models import DSASheet, UserSheetProgress
+
 
 @receiver(post_save, sender=CustomUser)
-def create_user_sheet_progress(sender, instance, created, **kwargs):
+def add_user_to_leaderboard(sender, instance, created, **kwargs):
     if created:
-        sheets = DSASheet.objects.all()
-        for sheet in sheets:
-            UserSheetProgress.objects.create(
-                user=instance,
-                sheet=sheet,
-                solved_count=0,
-                solved_easy=0,
-                solved_medium=0,
-                solved_hard=0
-            )
+        record_user_added(instance.score)
+
+
+@receiver([post_save, post_delete], sender=CustomUser)
+def evict_token_user(sender, instance, **kwargs):
+    evict_cached_user(instance.pk)
+
+
+@receiver(pre_delete, sender=CustomUser)
+def remove_user_from_leaderboard(sender, instance, **kwargs):
+    # The instance may hold a stale score; use the stored one
+    score = CustomUser.objects.filter(pk=instance.pk).values_list('score', flat=True).first()
+    if score is not None:
+        record_user_removed(score)
@@ -1,3 +1,253 @@
-from django.test import TestCase
+import io
+from collections import Counter
+from unittest import mock
 
-# Create your tests here.
+from cachetools import TTLCache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.tokens import AccessToken
+
+from questions.models import DSASheet, Question, Topic, UserQuestionStatus
+from questions.progress import solve_question, unsolve_question
+from .authentication import CachedJWTAuthentication
+from .leaderboard import MAX_PAGE_SIZE, positions_for_scores, rebuild_score_buckets, total_users
+from .models import CustomUser, ScoreBucket
+from .utils import DEFAULT_RANK, RANK_TIERS, calculate_rank, rank_expression
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user("token@example.com", "token", "Token", "pw", is_accepted=True)
+        self.clock = Clock()
+        self.cache = TTLCache(maxsize=2, ttl=60, timer=self.clock)
+        self.enterContext(mock.patch("users.authentication._users", self.cache))
+
+    def authenticate(self, user=None):
+        """Authenticate one request, returning (user, query count)."""
+        token = AccessToken.for_user(user or self.user)
+        request = APIRequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {token}")
+        with CaptureQueriesContext(connection) as ctx:
+            user, _ = CachedJWTAuthentication().authenticate(request)
+        return user, len(ctx)
+
+    def test_login_token_authenticates_requests(self):
+        response = self.client.post("/users/login/", {"email": "token@example.com", "password": "pw"})
+        self.assertEqual(response.status_code, 200)
+        access = response.json()["access"]
+
+        response = self.client.get("/questions/saved/", HTTP_AUTHORIZATION=f"Bearer {access}")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get("/questions/saved/").status_code, 400)
+        self.assertEqual(
+            self.client.get("/questions/saved/", HTTP_AUTHORIZATION="Bearer not-a-token").status_code, 401,
+        )
+
+    def test_repeat_requests_are_served_from_the_cache(self):
+        first, queries = self.authenticate()
+        self.assertEqual((first.pk, queries), (self.user.pk, 1))
+
+        second, queries = self.authenticate()
+        self.assertEqual((second.pk, queries), (self.user.pk, 0))
+        # Each request gets its own copy
+        self.assertIsNot(first, second)
+
+    def test_entries_expire_after_the_ttl(self):
+        self.authenticate()
+        self.clock.now += 59
+        self.assertEqual(self.authenticate()[1], 0)
+        self.clock.now += 2
+        self.assertEqual(self.authenticate()[1], 1)
+
+    def test_least_recently_used_user_is_evicted_when_full(self):
+        others = [
+            CustomUser.objects.create_user(f"other{i}@example.com", f"other{i}", "Other", "pw") for i in range(2)
+        ]
+        self.authenticate()
+        for other in others:
+            self.authenticate(other)
+        self.assertNotIn(self.user.pk, self.cache)
+        self.assertEqual(self.authenticate()[1], 1)
+
+    def test_saving_a_user_evicts_it(self):
+        self.authenticate()
+        self.user.display_name = "Renamed"
+        self.user.save()
+        user, queries = self.authenticate()
+        self.assertEqual((user.display_name, queries), ("Renamed", 1))
+
+    def test_deactivated_user_is_rejected_at_once(self):
+        self.authenticate()
+        self.user.is_active = False
+        self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    @override_settings(JWT_USER_CACHE_TTL=0)
+    def test_cache_can_be_disabled(self):
+        self.authenticate()
+        self.assertEqual(self.authenticate()[1], 1)
+        self.assertEqual(len(self.cache), 0)
+
+
+class RequestUserTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user("me@example.com", "me", "Me", "pw")
+        self.victim = CustomUser.objects.create_user("victim@example.com", "victim", "Victim", "pw")
+        sheet = DSASheet.objects.create(name="auth", description="auth sheet")
+        topic = Topic.objects.create(sheet=sheet, name="Arrays")
+        self.question = Question.objects.create(
+            topic=topic, question="Two Sum", link="https://leetcode.com/problems/two-sum/", platform="leetcode", difficulty="EASY",
+        )
+
+    def save_as(self, email, **headers):
+        return self.client.post(
+            "/questions/update-status/", {"email": email, "question_id": self.question.id, "action": "save"}, **headers,
+        )
+
+    def saved_by(self):
+        return set(UserQuestionStatus.objects.filter(status="SAVED").values_list("user__email", flat=True))
+
+    def test_authenticated_request_acts_as_its_own_user(self):
+        token = AccessToken.for_user(self.user)
+        response = self.save_as(self.victim.email, HTTP_AUTHORIZATION=f"Bearer {token}")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.saved_by(), {self.user.email})
+
+    def test_anonymous_lookup_by_email(self):
+        self.assertEqual(self.save_as(self.victim.email).status_code, 200)
+        self.assertEqual(self.saved_by(), {self.victim.email})
+
+    @override_settings(ALLOW_ANONYMOUS_USER_LOOKUP=False)
+    def test_anonymous_lookup_can_be_turned_off(self):
+        self.assertEqual(self.save_as(self.victim.email).status_code, 404)
+        self.assertEqual(self.saved_by(), set())
+
+
+class LeaderboardTests(TestCase):
+    SCORES = {"alpha": 50, "bravo": 30, "charlie": 30, "delta": 30, "echo": 10}
+
+    def setUp(self):
+        for username, score in self.SCORES.items():
+            CustomUser.objects.create_user(f"{username}@example.com", username, username.title(), "pw")
+            CustomUser.objects.filter(username=username).update(score=score)
+        rebuild_score_buckets()
+
+    def page(self, **params):
+        response = self.client.get("/users/summary/", params)
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        return [(u["username"], u["position"]) for u in data["users"]], data["next_cursor"]
+
+    def around(self, username, k):
+        response = self.client.get("/users/summary/around/", {"username": username, "k": k})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        return data["position"], [u["username"] for u in data["users"]]
+
+    def assertBucketsMatchUsers(self):
+        buckets = dict(ScoreBucket.objects.filter(user_count__gt=0).values_list("score", "user_count"))
+        self.assertEqual(buckets, dict(Counter(CustomUser.objects.values_list("score", flat=True))))
+        self.assertFalse(ScoreBucket.objects.filter(user_count__lt=0).exists())
+
+    def test_tied_scores_share_a_position(self):
+        self.assertEqual(positions_for_scores([50, 30, 10, 40, 0]), {50: 1, 40: 2, 30: 2, 10: 5, 0: 6})
+        self.assertEqual(positions_for_scores([]), {})
+
+    def test_cursor_walks_every_user_once_in_order(self):
+        first, cursor = self.page(limit=2)
+        self.assertEqual(first, [("alpha", 1), ("bravo", 2)])
+        bravo = CustomUser.objects.get(username="bravo")
+        self.assertEqual(cursor, f"30:{bravo.id}")
+
+        # The page boundary falls inside the tie at 30
+        second, cursor = self.page(limit=2, cursor=cursor)
+        self.assertEqual(second, [("charlie", 2), ("delta", 2)])
+        third, cursor = self.page(limit=2, cursor=cursor)
+        self.assertEqual((third, cursor), ([("echo", 5)], None))
+
+        everyone, cursor = self.page(limit=5)
+        self.assertEqual((everyone, cursor), (first + second + third, None))
+
+    def test_malformed_cursor_and_limit_are_rejected(self):
+        for cursor in ("abc", "30", "30:x", "x:1", "1:2:3", "30:1.5"):
+            response = self.client.get("/users/summary/", {"cursor": cursor})
+            self.assertEqual(response.status_code, 400, cursor)
+        for limit in ("0", "-1", "abc", str(MAX_PAGE_SIZE + 1)):
+            self.assertEqual(self.client.get("/users/summary/", {"limit": limit}).status_code, 400, limit)
+
+    def test_neighbours_at_the_edges(self):
+        self.assertEqual(self.around("alpha", 2), (1, ["alpha", "bravo", "charlie"]))
+        self.assertEqual(self.around("echo", 2), (5, ["charlie", "delta", "echo"]))
+        self.assertEqual(self.around("charlie", 1), (2, ["bravo", "charlie", "delta"]))
+        self.assertEqual(self.around("charlie", 10), (2, list(self.SCORES)))
+        self.assertEqual(self.client.get("/users/summary/around/", {"username": "nobody"}).status_code, 404)
+
+    def test_buckets_follow_solves_unsolves_and_deletes(self):
+        self.assertBucketsMatchUsers()
+        topic = Topic.objects.create(sheet=DSASheet.objects.create(name="lb", description="lb sheet"), name="Arrays")
+        question = Question.objects.create(
+            topic=topic, question="Hard", link="https://leetcode.com/problems/hard/", platform="leetcode", difficulty="HARD",
+        )
+        echo = CustomUser.objects.get(username="echo")
+
+        solve_question(echo, question)
+        self.assertBucketsMatchUsers()
+        self.assertEqual(self.around("echo", 1)[0], 5)
+        for username in ("bravo", "charlie"):
+            solve_question(CustomUser.objects.get(username=username), question)
+        self.assertBucketsMatchUsers()
+        self.assertEqual(positions_for_scores([45, 30, 25]), {45: 2, 30: 4, 25: 5})
+
+        unsolve_question(echo, question)
+        self.assertBucketsMatchUsers()
+        CustomUser.objects.get(username="alpha").delete()
+        self.assertBucketsMatchUsers()
+        self.assertEqual(total_users(), 4)
+
+
+class RankTierTests(TestCase):
+    # 1000 puts every threshold on an exact score; 137 puts none of them on one
+    MAX_SCORES = (1000, 137)
+
+    def setUp(self):
+        scores = {0}
+        for max_score in self.MAX_SCORES:
+            scores.add(max_score)
+            for threshold, _ in RANK_TIERS:
+                at = threshold * max_score // 100
+                scores.update((at - 1, at, at + 1))
+        CustomUser.objects.bulk_create(
+            CustomUser(email=f"tier{score}@example.com", username=f"tier{score}", display_name="Tier", score=score)
+            for score in sorted(scores)
+        )
+
+    def test_sql_case_matches_calculate_rank_at_every_boundary(self):
+        for max_score in (*self.MAX_SCORES, 0):
+            rows = CustomUser.objects.annotate(sql_rank=rank_expression(max_score)).values_list("score", "sql_rank")
+            for score, sql_rank in rows:
+                self.assertEqual(sql_rank, calculate_rank(score, max_score), (score, max_score))
+
+        # A tier needs strictly more than its share of the max score
+        for threshold, rank in RANK_TIERS:
+            self.assertEqual(calculate_rank(threshold * 10 + 1, 1000), rank)
+            self.assertNotEqual(calculate_rank(threshold * 10, 1000), rank)
+        self.assertEqual(calculate_rank(200, 1000), DEFAULT_RANK)
+
+    def test_recompute_ranks_command(self):
+        for max_score in self.MAX_SCORES:
+            with mock.patch("users.management.commands.recompute_ranks.get_max_score", return_value=max_score):
+                call_command("recompute_ranks", stdout=io.StringIO())
+            for score, rank in CustomUser.objects.values_list("score", "rank"):
+                self.assertEqual(rank, calculate_rank(score, max_score), (score, max_score))
@@ -1,10 +1,12 @@
 from django.urls import path
-from .views import UserRegistrationView, check_username, check_email, UserLoginView, UserProfileView, UpdateProfileBannerView, UpdateProfilePhotoView, all_users_summary
+from rest_framework_simplejwt.views import TokenRefreshView
+from .views import UserRegistrationView, check_username, check_email, UserLoginView, UserProfileView, UpdateProfileBannerView, UpdateProfilePhotoView, all_users_summary, leaderboard_around_user
 from .views import update_profile_info, update_social_links
 
 urlpatterns = [
     path('', UserRegistrationView.as_view(), name='user-register'),
     path('login/', UserLoginView.as_view(), name='login'),
+    path('token/refresh/', TokenRefreshView.as_view(), name='token-refresh'),
     path('check-username/', check_username, name='check-username'),
     path('check-email/', check_email, name='check-email'),
     path("profile/", UserProfileView.as_view(), name="user-profile"),
@@ -13,4 +15,5 @@ urlpatterns = [
     path('profile-info/', update_profile_info, name='update_profile_info'),
     path('social-links/', update_social_links, name='update_social_links'),
     path('summary/', all_users_summary, name='all_users_summary'),
+    path('summary/around/', leaderboard_around_user, name='leaderboard_around_user'),
 ]
@@ -1,14 +1,35 @@
 # users/utils.py
+from django.db.models import Case, Value, When
+
+# (percentage of the max score that must be exceeded, rank), best first
+RANK_TIERS = [
+    (95, "Bahubali"),
+    (80, "Rocky Bhai"),
+    (60, "Pushpa Bahu"),
+    (40, "Mass"),
+    (20, "Singham"),
+]
+DEFAULT_RANK = "Chulbul Pandey"
+
+
 def calculate_rank(score, max_score):
-    percentage = (score / max_score) * 100
-    if percentage > 95:
-        return "Bahubali"
-    elif percentage > 80:
-        return "Rocky Bhai"
-    elif percentage > 60:
-        return "Pushpa Bahu"
-    elif percentage > 40:
-        return "Mass"
-    elif percentage > 20:
-        return "Singham"
-    return "Chulbul Pandey"
+    if max_score <= 0:
+        return DEFAULT_RANK
+    for threshold, rank in RANK_TIERS:
+        # score / max_score * 100 > threshold, in integers
+        if score * 100 > threshold * max_score:
+            return rank
+    return DEFAULT_RANK
+
+
+def rank_expression(max_score):
+    """
+    SQL CASE expression equivalent to calculate_rank on the score column, for set-based updates.
+    """
+    if max_score <= 0:
+        return Value(DEFAULT_RANK)
+    return Case(
+        # Scores are integers, so score * 100 > threshold * max_score <=> score > floor(threshold * max_score / 100)
+        *[When(score__gt=threshold * max_score // 100, then=Value(rank)) for threshold, rank in RANK_TIERS],
+        default=Value(DEFAULT_RANK),
+    )
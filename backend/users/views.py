@@ -7,6 +7,8 @@ from .models import CustomUser
 from .serializers import UserRegistrationSerializer, CustomUserSerializer, ProfileBannerUpdateSerializer, ProfilePhotoUpdateSerializer, ProfileInfoUpdateSerializer, SocialLinksUpdateSerializer, UserSummarySerializer
 from rest_framework.decorators import api_view
 from django.contrib.auth import authenticate
+from rest_framework_simplejwt.tokens import RefreshToken
+from .leaderboard import DEFAULT_PAGE_SIZE, MAX_NEIGHBOURS, MAX_PAGE_SIZE, leaderboard_neighbours, leaderboard_page
 
 class UserRegistrationView(APIView):
     def post(self, request):
@@ -83,10 +85,14 @@ class UserLoginView(APIView):
                     # 'profile_banner': user.profile_banner if user.profile_banner else None,
                 }
 
+                refresh = RefreshToken.for_user(user)
+
                 return Response({
                     'success': True,
                     'message': 'Login successful',
-                    'user': user_data
+                    'user': user_data,
+                    'access': str(refresh.access_token),
+                    'refresh': str(refresh),
                 }, status=status.HTTP_200_OK)
             else:
                 return Response({'success': False, 'message': 'User is not accepted yet.'}, status=status.HTTP_403_FORBIDDEN)
@@ -161,8 +167,44 @@ def update_social_links(request):
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+def _page_size(request, name, default, maximum):
+    try:
+        value = int(request.GET.get(name, default))
+    except ValueError:
+        return None
+    return value if 0 < value <= maximum else None
+
+
 @api_view(['GET'])
 def all_users_summary(request):
-    users = CustomUser.objects.all()
-    serializer = UserSummarySerializer(users, many=True)
-    return Response({'users': serializer.data})
\ No newline at end of file
+    limit = _page_size(request, 'limit', DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE)
+    if limit is None:
+        return Response({"error": f"limit must be between 1 and {MAX_PAGE_SIZE}"}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        users, positions, next_cursor = leaderboard_page(request.GET.get('cursor'), limit)
+    except ValueError:
+        return Response({"error": "Invalid cursor"}, status=status.HTTP_400_BAD_REQUEST)
+
+    serializer = UserSummarySerializer(users, many=True, context={'positions': positions})
+    return Response({'users': serializer.data, 'next_cursor': next_cursor})
+
+
+@api_view(['GET'])
+def leaderboard_around_user(request):
+    username = request.GET.get("username")
+    if not username:
+        return Response({"error": "Username not provided"}, status=status.HTTP_400_BAD_REQUEST)
+
+    k = _page_size(request, 'k', 5, MAX_NEIGHBOURS)
+    if k is None:
+        return Response({"error": f"k must be between 1 and {MAX_NEIGHBOURS}"}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        user = CustomUser.objects.get(username=username)
+    except CustomUser.DoesNotExist:
+        return Response({"error": "User not found"}, status=status.HTTP_404_NOT_FOUND)
+
+    users, positions = leaderboard_neighbours(user, k)
+    serializer = UserSummarySerializer(users, many=True, context={'positions': positions})
+    return Response({'position': positions[user.score], 'users': serializer.data})
\ No newline at end of file